@@ -4,8 +4,12 @@ package.name = lenggyapp
 package.domain = org.example
 source.dir = .
 source.include_exts = py,png,jpg,json
+# Data the app writes at run time; a packaged profiles/ would also switch
+# the app into multi-profile mode on the device.
+source.exclude_dirs = tools, bin, tests, backups, profiles, sheets
+source.exclude_patterns = resume.json, shift_cache.json, *.tmp
 version = 0.1
-requirements = python3,kivy
+requirements = python3,kivy,tzdata
 icon.filename = assets/app_icon.png
 
 [buildozer]
@@ -0,0 +1,67 @@
+"""Kivy-free timesheet core: data model, storage and hour/pay computation.
+
+The Kivy app in ``main.py`` and the ``python -m lenggy`` CLI both build on
+this package. lenggy.backup and lenggy.team are left out of the package
+namespace and imported where they are used: they pull in gzip and
+multiprocessing, which most commands never need.
+"""
+
+from .cache import CACHE_FILE, ShiftCache
+from .history import EditHistory, history_depth
+from .memos import TOP_K, MemoIndex
+from .model import (
+    DATE_FORMAT,
+    format_time,
+    months_of,
+    parse_date_ordinal,
+    parse_date_range,
+    parse_minutes,
+    segment_minutes,
+    segments_of,
+    week_start,
+    work_time_string,
+)
+from .occupancy import DAY_MINUTES, Occupancy
+from .pay import (
+    PayBreakdown,
+    PayRules,
+    ShiftTable,
+    iter_pay_breakdown,
+    shift_minutes,
+    shift_rows,
+)
+from .storage import (
+    BACKUP_DIR,
+    EVENT_FILE,
+    MEMO_FILE,
+    PREVIEW_LENGTH,
+    PROFILE_DIR,
+    RESUME_FILE,
+    SETTINGS_FILE,
+    TEMPLATE_FILE,
+    MemoArchive,
+    create_profile,
+    file_stamp,
+    list_profiles,
+    load_events,
+    load_resume,
+    load_settings,
+    load_templates,
+    profile_path,
+    profile_settings,
+    save_events,
+    save_resume,
+    save_templates,
+)
+from .query import ShiftIndex, ShiftQuery, memo_words
+from .store import EventSnapshot, EventStore
+from .templates import (
+    ShiftTemplate,
+    expand_range,
+    iter_occurrences,
+    parse_weekdays,
+    release_weekdays,
+    resolve_day,
+    templates_on,
+)
+from .tz import ZoneTransitions, zone_transitions
@@ -0,0 +1,256 @@
+"""Deduplicated, incremental backups of an event store.
+
+A backup is a small manifest naming chunks by the SHA-256 of their
+content: one chunk per month of events, one for the templates file and
+one per block of the append-only memo file. Memo blocks end where the
+file ended at the previous backup, so the bytes appended since are all a
+backup adds. Chunks are stored gzip-compressed under their hash, so a
+backup writes only the chunks that changed since any earlier one. Months
+of an EventSnapshot that are shared with the previous backup's snapshot
+are not even serialised again.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import time
+from datetime import date, datetime
+
+from .model import months_of
+from .storage import BACKUP_DIR
+
+MEMO_BLOCK = 1 << 20
+KEEP_LAST = 20
+KEEP_DAILY = 30
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _month_bytes(month):
+    return json.dumps(month, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def _creation_order(snapshot_id):
+    # "YYYYmmdd-HHMMSS" plus "-n" for the n-th more in the same second;
+    # the counter compares as a number, so "-10" follows "-9".
+    suffix = snapshot_id[16:]
+    return snapshot_id[:15], int(suffix) if suffix.isdigit() else 0
+
+
+def _write_atomic(path, data):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class BackupStore:
+    def __init__(self, root=BACKUP_DIR):
+        self.root = root
+        self.chunk_dir = os.path.join(root, "chunks")
+        self.manifest_dir = os.path.join(root, "snapshots")
+        # What the last backup from this process saw, so unchanged months
+        # and memo blocks are skipped without hashing.
+        self._months = {}
+        # [(end offset, digest)] of the memo file's blocks.
+        self._memo_blocks = []
+        # Day ordinal of this process's last prune().
+        self.pruned_on = None
+
+    def _chunk_path(self, digest):
+        return os.path.join(self.chunk_dir, digest[:2], digest + ".gz")
+
+    def _put(self, data):
+        digest = _digest(data)
+        path = self._chunk_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write_atomic(path, gzip.compress(data, mtime=0))
+        return digest
+
+    def _get(self, digest):
+        with open(self._chunk_path(digest), "rb") as f:
+            data = gzip.decompress(f.read())
+        if _digest(data) != digest:
+            raise ValueError(f"backup chunk {digest[:12]} is damaged")
+        return data
+
+    def _month_chunks(self, events):
+        chunks = {}
+        seen = {}
+        for key, month in months_of(events):
+            cached = self._months.get(key)
+            if cached is not None and cached[0] is month:
+                digest = cached[1]
+            else:
+                digest = self._put(_month_bytes(month))
+            chunks[key] = digest
+            seen[key] = (month, digest)
+        self._months = seen
+        return chunks
+
+    def _memo_chunks(self, path, latest):
+        # The memo file only grows, so the blocks of the previous backup are
+        # kept and new ones start at its end. A new process takes them from
+        # the latest manifest once their bytes are checked; a file that no
+        # longer matches is stored again from the first differing block.
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return 0, [], []
+        blocks, check = self._memo_blocks, False
+        if not blocks and latest is not None:
+            blocks = list(zip(latest.get("memo_ends") or (), latest.get("memos") or ()))
+            check = True
+        kept = []
+        offset = 0
+        # Only up to the size seen above: the app may append while this runs,
+        # and those memos belong to a later version of the events.
+        with open(path, "rb") as f:
+            for end, digest in blocks:
+                if end > size or check and _digest(f.read(end - offset)) != digest:
+                    break
+                kept.append((end, digest))
+                offset = end
+            f.seek(offset)
+            while offset < size:
+                end = min(size, offset + MEMO_BLOCK)
+                kept.append((end, self._put(f.read(end - offset))))
+                offset = end
+        self._memo_blocks = kept
+        return size, [digest for _, digest in kept], [end for end, _ in kept]
+
+    def backup(self, events, templates_path=None, memos_path=None):
+        # Returns the new snapshot id, or None when nothing changed since
+        # the latest snapshot.
+        latest = self.snapshots()[-1:]
+        latest = self.manifest(latest[0]) if latest else None
+        manifest = {"events": self._month_chunks(events), "templates": None}
+        if templates_path and os.path.exists(templates_path):
+            with open(templates_path, "rb") as f:
+                manifest["templates"] = self._put(f.read())
+        if memos_path:
+            (
+                manifest["memos_size"],
+                manifest["memos"],
+                manifest["memo_ends"],
+            ) = self._memo_chunks(memos_path, latest)
+        if manifest == latest:
+            return None
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        snapshot_id = time.strftime("%Y%m%d-%H%M%S")
+        suffix = 0
+        while os.path.exists(self._manifest_path(snapshot_id)):
+            suffix += 1
+            snapshot_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{suffix}"
+        data = json.dumps(manifest, sort_keys=True, indent=1).encode("utf-8")
+        _write_atomic(self._manifest_path(snapshot_id), data)
+        return snapshot_id
+
+    def _manifest_path(self, snapshot_id):
+        return os.path.join(self.manifest_dir, snapshot_id + ".json")
+
+    def snapshots(self):
+        # Ids, oldest first.
+        if not os.path.isdir(self.manifest_dir):
+            return []
+        return sorted(
+            (
+                name[:-5]
+                for name in os.listdir(self.manifest_dir)
+                if name.endswith(".json")
+            ),
+            key=_creation_order,
+        )
+
+    def manifest(self, snapshot_id):
+        try:
+            with open(self._manifest_path(snapshot_id), "rb") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"no backup {snapshot_id!r}")
+
+    def load(self, snapshot_id):
+        # (events, templates file bytes or None, memo file bytes or None)
+        manifest = self.manifest(snapshot_id)
+        events = {}
+        for key in sorted(manifest["events"]):
+            events.update(json.loads(self._get(manifest["events"][key])))
+        templates = manifest.get("templates")
+        if templates is not None:
+            templates = self._get(templates)
+        memos = manifest.get("memos")
+        if memos is not None:
+            memos = b"".join(self._get(digest) for digest in memos)
+        return events, templates, memos
+
+    def restore(self, snapshot_id, events_path, templates_path=None, memos_path=None):
+        events, templates, memos = self.load(snapshot_id)
+        # The memo file first: restored events may point into it.
+        if memos is not None and memos_path:
+            _write_atomic(memos_path, memos)
+            # Checked against the latest manifest again on the next backup.
+            self._memo_blocks = []
+        if templates is not None and templates_path:
+            _write_atomic(templates_path, templates)
+        _write_atomic(events_path, json.dumps(events, indent=2).encode("utf-8"))
+        return events
+
+    def prune(self, keep_last=KEEP_LAST, keep_daily=KEEP_DAILY):
+        # Keeps the newest keep_last snapshots plus the newest snapshot of
+        # each of the last keep_daily days that have one, then deletes the
+        # chunks no kept snapshot refers to. Returns the removed ids. Every
+        # manifest is read, so the app runs it once a day, not per save.
+        self.pruned_on = date.today().toordinal()
+        ids = self.snapshots()
+        keep = set(ids[-keep_last:]) if keep_last > 0 else set()
+        days = {}
+        for snapshot_id in ids:
+            days[snapshot_id[:8]] = snapshot_id
+        for day in sorted(days)[-keep_daily:] if keep_daily > 0 else ():
+            keep.add(days[day])
+        removed = [i for i in ids if i not in keep]
+        if not removed:
+            return []
+        for snapshot_id in removed:
+            os.remove(self._manifest_path(snapshot_id))
+        self._collect_garbage()
+        return removed
+
+    def _collect_garbage(self):
+        live = set()
+        for snapshot_id in self.snapshots():
+            manifest = self.manifest(snapshot_id)
+            live.update(manifest["events"].values())
+            live.update(manifest.get("memos") or ())
+            if manifest.get("templates"):
+                live.add(manifest["templates"])
+        for prefix in os.listdir(self.chunk_dir):
+            folder = os.path.join(self.chunk_dir, prefix)
+            for name in os.listdir(folder):
+                if name.endswith(".gz") and name[:-3] not in live:
+                    os.remove(os.path.join(folder, name))
+        # Cached digests may name chunks that were just deleted.
+        self._months = {}
+        self._memo_blocks = []
+
+
+def retention(settings):
+    # (keep_last, keep_daily) from the "backup" section of settings.json.
+    policy = settings.get("backup", {})
+    return (
+        int(policy.get("keep_last", KEEP_LAST)),
+        int(policy.get("keep_daily", KEEP_DAILY)),
+    )
+
+
+def describe(snapshot_id):
+    # "20261019-132501" -> "2026-10-19 13:25:01"
+    try:
+        stamp = datetime.strptime(snapshot_id[:15], "%Y%m%d-%H%M%S")
+    except ValueError:
+        return snapshot_id
+    return stamp.strftime("%Y-%m-%d %H:%M:%S")
@@ -0,0 +1,126 @@
+"""Persistent cache of the shift rows that hour and pay totals sum.
+
+ShiftTable parses every stored shift into a (day, start, end, rate) row.
+ShiftCache keeps those rows per month in a file beside the events, each
+month under the SHA-256 of its entries, so a cold start builds the table
+from the file and parses only the months whose entries changed. While
+events.json still has the modification time and size recorded with the
+cache, the months loaded from it are not even hashed. Rates come from the
+pay rules, so other rates discard the file; template occurrences and time
+zone corrections are still added per range, as before.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+from .model import months_of, parse_date_ordinal, segments_of
+from .pay import ShiftTable, shift_rows
+
+CACHE_FILE = "shift_cache.json"
+
+
+def _digest(month):
+    data = json.dumps(month, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _rates_key(rules):
+    return json.dumps([rules.base_rate, sorted(rules.shift_rates.items())])
+
+
+def _month_columns(month, rules):
+    rows = []
+    for date_str, segments in month.items():
+        day = parse_date_ordinal(date_str)
+        if day is not None:
+            rows.extend(shift_rows(day, segments_of(segments), rules))
+    rows.sort()
+    if not rows:
+        return [[], [], [], []]
+    return [list(column) for column in zip(*rows)]
+
+
+class ShiftCache:
+    def __init__(self, path, rules):
+        self.path = path
+        self.rules = rules
+        self._rates = _rates_key(rules)
+        # "YYYY-MM" -> (month, digest, columns) for the version last seen,
+        # so a month unchanged since is neither hashed nor parsed.
+        self._months = {}
+        # The file's months, read on first use.
+        self._stored = None
+        # (events, file stamp) as last read from the events file.
+        self.disk = None
+        # Months parsed by the last table() or save().
+        self.recomputed = 0
+        # The UI thread builds tables while the save thread writes the file.
+        self._lock = threading.Lock()
+
+    def prime(self, events, stamp):
+        # events was just read from the events file, which had this
+        # file_stamp. Call before the first table().
+        self.disk = (events, stamp)
+
+    def _read(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("rates") != self._rates:
+            return {}
+        stored = data.get("months", {})
+        if self.disk is not None and self.disk[1] is not None:
+            if data.get("stamp") == self.disk[1]:
+                # Same events file as when the cache was written.
+                for key, month in months_of(self.disk[0]):
+                    entry = stored.get(key)
+                    if entry is not None:
+                        self._months[key] = (month, entry[0], entry[1:])
+        return stored
+
+    def _columns(self, events):
+        if self._stored is None:
+            self._stored = self._read()
+        seen = {}
+        recomputed = 0
+        for key, month in sorted(months_of(events)):
+            cached = self._months.get(key)
+            if cached is not None and cached[0] is month:
+                seen[key] = cached
+                continue
+            digest = _digest(month)
+            if cached is not None and cached[1] == digest:
+                columns = cached[2]
+            else:
+                entry = self._stored.pop(key, None)
+                if entry is not None and entry[0] == digest:
+                    columns = entry[1:]
+                else:
+                    columns = _month_columns(month, self.rules)
+                    recomputed += 1
+            seen[key] = (month, digest, columns)
+        self._months = seen
+        self.recomputed = recomputed
+        return [entry[2] for entry in seen.values()]
+
+    def table(self, events):
+        with self._lock:
+            return ShiftTable.from_months(self._columns(events), self.rules.zone)
+
+    def save(self, events, stamp):
+        # events is the version the events file with this stamp holds.
+        with self._lock:
+            self._columns(events)
+            months = {
+                key: [digest, *columns]
+                for key, (month, digest, columns) in self._months.items()
+            }
+        data = {"rates": self._rates, "stamp": stamp, "months": months}
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
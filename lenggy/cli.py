@@ -0,0 +1,487 @@
+"""Command-line reports over the event store.
+
+    python -m lenggy total 2025-01-01 2025-12-31 --pay
+    python -m lenggy month 2025-06
+    python -m lenggy export --from 2025-01-01 --format csv -o hours.csv
+    python -m lenggy template add mon-fri 08:00 17:00 --from 2025-01-06
+    python -m lenggy --profile alice month 2025-06
+    python -m lenggy team 2025-06
+    python -m lenggy occupancy 2025-04-01 2025-06-30 --window 09:00-17:00
+    python -m lenggy find --weekday sat --before 06:00 --memo market
+    python -m lenggy backup create
+    python -m lenggy backup restore 20250630-181502
+"""
+
+import argparse
+import csv
+import json
+import sys
+from datetime import date
+
+from .model import (
+    DATE_FORMAT,
+    parse_date_ordinal,
+    parse_date_range,
+    parse_minutes,
+    segments_of,
+    week_start,
+    work_time_string,
+)
+from .occupancy import Occupancy
+from .pay import PayRules, ShiftTable, iter_pay_breakdown, shift_minutes
+from .query import ShiftIndex, ShiftQuery
+from .storage import (
+    BACKUP_DIR,
+    EVENT_FILE,
+    MEMO_FILE,
+    PROFILE_DIR,
+    SETTINGS_FILE,
+    TEMPLATE_FILE,
+    MemoArchive,
+    create_profile,
+    list_profiles,
+    load_events,
+    load_settings,
+    load_templates,
+    profile_path,
+    profile_settings,
+    save_templates,
+)
+from .templates import ShiftTemplate, expand_range, parse_weekdays
+
+
+def _entries_between(events, templates, start_day, end_day, archive):
+    # Segments carry their full memo text, read from the memo file as needed.
+    if templates:
+        view = expand_range(events, templates, start_day, end_day)
+        for date_str in sorted(view):
+            yield date_str, archive.full(view[date_str])
+        return
+    for date_str in sorted(events):
+        day = parse_date_ordinal(date_str)
+        if day is not None and start_day <= day <= end_day:
+            yield date_str, archive.full(segments_of(events[date_str]))
+
+
+def _hours(minutes):
+    return "" if minutes is None else f"{minutes / 60.0:.2f}"
+
+
+def cmd_total(args, events, templates, rules, out):
+    start, end = parse_date_range(args.date_from, args.date_to)
+    table = ShiftTable(events, rules).with_templates(
+        templates, rules, week_start(start), end
+    )
+    if not args.pay:
+        out.write(f"Total: {round(table.total_minutes(start, end) / 60.0, 2)} hours\n")
+        return 0
+    for _, _, result in iter_pay_breakdown(table, rules, start, end):
+        pass
+    out.write(f"Total:    {result.hours} hours\n")
+    out.write(f"Regular:  {result.regular_hours}\n")
+    out.write(f"Overtime: {result.overtime_hours}\n")
+    out.write(f"Night:    {result.night_hours}\n")
+    out.write(f"Holiday:  {result.holiday_hours}\n")
+    if not rules.has_rates:
+        # No pay until a rate is configured; the hours above still apply.
+        out.write('Pay:      no rates set (settings.json "pay")\n')
+        return 0
+    out.write(f"Base pay:         {result.money(result.base_pay)}\n")
+    out.write(f"Overtime premium: {result.money(result.overtime_pay)}\n")
+    out.write(f"Night premium:    {result.money(result.night_pay)}\n")
+    out.write(f"Holiday premium:  {result.money(result.holiday_pay)}\n")
+    out.write(f"Total pay:        {result.money(result.total_pay)}\n")
+    return 0
+
+
+def _clock(minute):
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def cmd_occupancy(args, events, templates, rules, out):
+    start, end = parse_date_range(args.date_from, args.date_to)
+    if end < start:
+        raise ValueError("TO is before FROM")
+    # From the day before, so a shift running past midnight into the first
+    # day counts there.
+    table = ShiftTable(events, rules).with_templates(templates, rules, start - 1, end)
+    occupancy = Occupancy(table)
+    num_days = end - start + 1
+    buckets = occupancy.histogram(start, end, args.bucket)
+    peak = max(buckets) or 1
+    for index, minutes in enumerate(buckets):
+        bar = "#" * round(minutes * 40 / peak)
+        out.write(f"{_clock(index * args.bucket)}  {minutes / 60.0:8.2f}h  {bar}\n")
+    if args.at:
+        minute = parse_minutes(args.at)
+        if minute is None:
+            raise ValueError("--at must use HH:MM")
+        days = occupancy.days_at(minute, start, end)
+        out.write(
+            f"Working at {_clock(minute)} on {days} of {num_days} days "
+            f"({days * 100.0 / num_days:.1f}%)\n"
+        )
+    if args.window:
+        bounds = [parse_minutes(part) for part in args.window.split("-", 1)]
+        if len(bounds) != 2 or None in bounds:
+            raise ValueError("--window must look like HH:MM-HH:MM")
+        minutes = occupancy.window_minutes(start, end, *bounds)
+        out.write(
+            f"Inside {_clock(bounds[0])}-{_clock(bounds[1])}: "
+            f"{round(minutes / 60.0, 2)} hours\n"
+        )
+    return 0
+
+
+def _month_bounds(text):
+    try:
+        year, month = (int(part) for part in text.split("-"))
+        first = date(year, month, 1)
+    except ValueError:
+        raise ValueError(f"invalid month {text!r}, expected YYYY-MM")
+    return first.toordinal(), date(year + month // 12, month % 12 + 1, 1).toordinal() - 1
+
+
+def cmd_month(args, events, templates, rules, out):
+    first, last = _month_bounds(args.month)
+    total = 0
+    entries = _entries_between(events, templates, first, last, MemoArchive(args.memos))
+    for date_str, segments in entries:
+        for idx, segment in enumerate(segments):
+            minutes = shift_minutes(date_str, segment, rules) or 0
+            total += minutes
+            out.write(
+                f"{date_str}  Shift {idx + 1}  {work_time_string(segment) or '-':<19}  "
+                f"{minutes / 60.0:6.2f}h  {segment.get('memo', '')}\n"
+            )
+    out.write(f"Total: {round(total / 60.0, 2)} hours\n")
+    return 0
+
+
+def _export_bounds(events, templates):
+    # Without --from/--to, open-ended templates stop at today or the last
+    # explicit entry, whichever is later.
+    if not templates:
+        return 1, date.max.toordinal()
+    known = [d for d in map(parse_date_ordinal, events) if d is not None]
+    today = date.today().toordinal()
+    first = min(known + [t.first_day for t in templates])
+    return first, max(known + [today])
+
+
+def cmd_export(args, events, templates, rules, out):
+    first, last = _export_bounds(events, templates)
+    start = parse_date_ordinal(args.date_from) if args.date_from else first
+    end = parse_date_ordinal(args.date_to) if args.date_to else last
+    if start is None or end is None:
+        raise ValueError(f"dates must use {DATE_FORMAT}")
+    target = open(args.output, "w", newline="") if args.output else out
+    try:
+        entries = _entries_between(
+            events, templates, start, end, MemoArchive(args.memos)
+        )
+        if args.format == "json":
+            json.dump(dict(entries), target, indent=2)
+            target.write("\n")
+        else:
+            writer = csv.writer(target)
+            writer.writerow(["date", "shift", "time_in", "time_out", "hours", "memo"])
+            for date_str, segments in entries:
+                for idx, segment in enumerate(segments):
+                    writer.writerow(
+                        [
+                            date_str,
+                            idx + 1,
+                            segment.get("time_in", ""),
+                            segment.get("time_out", ""),
+                            _hours(shift_minutes(date_str, segment, rules)),
+                            segment.get("memo", ""),
+                        ]
+                    )
+    finally:
+        if target is not out:
+            target.close()
+    return 0
+
+
+def cmd_find(args, events, templates, rules, out):
+    query = ShiftQuery.parse(
+        args.date_from or "",
+        args.date_to or "",
+        args.weekday or "",
+        args.after or "",
+        args.before or "",
+        args.memo or "",
+    )
+    archive = MemoArchive(args.memos)
+    index = ShiftIndex.from_events(events, archive.text)
+    if args.explain:
+        name, estimate, _ = index.plan(query)
+        out.write(f"plan: {name} index, {estimate} of {len(index)} days\n")
+    total = 0
+    count = 0
+    for date_str, segment in index.run(query, templates):
+        segment = archive.full([segment])[0]
+        minutes = shift_minutes(date_str, segment, rules) or 0
+        total += minutes
+        count += 1
+        out.write(
+            f"{date_str}  {work_time_string(segment) or '-':<19}  "
+            f"{minutes / 60.0:6.2f}h  {segment.get('memo', '')}\n"
+        )
+    out.write(f"{count} shifts, {round(total / 60.0, 2)} hours\n")
+    return 0
+
+
+def cmd_template_list(args, events, templates, rules, out):
+    for template in templates:
+        memo = f"  {template.memo}" if template.memo else ""
+        out.write(f"{template.id}  {template.describe()}{memo}\n")
+    return 0
+
+
+def cmd_template_add(args, events, templates, rules, out):
+    times = [parse_minutes(args.time_in), parse_minutes(args.time_out)]
+    if None in times:
+        raise ValueError("times must use HH:MM")
+    time_in, time_out = (f"{m // 60:02d}:{m % 60:02d}" for m in times)
+    for value in (args.date_from, args.until):
+        if value and parse_date_ordinal(value) is None:
+            raise ValueError(f"dates must use {DATE_FORMAT}")
+    template = ShiftTemplate(
+        parse_weekdays(args.weekdays),
+        time_in,
+        time_out,
+        memo=args.memo,
+        start=args.date_from or date.today().strftime(DATE_FORMAT),
+        end=args.until or "",
+    )
+    templates.append(template)
+    save_templates(templates, args.templates)
+    out.write(f"{template.id}  {template.describe()}\n")
+    return 0
+
+
+def cmd_template_remove(args, events, templates, rules, out):
+    remaining = [t for t in templates if t.id != args.id]
+    if len(remaining) == len(templates):
+        raise ValueError(f"no template with id {args.id!r}")
+    save_templates(remaining, args.templates)
+    return 0
+
+
+def cmd_team(args, events, templates, rules, out):
+    if len(args.period) == 1:
+        start, end = _month_bounds(args.period[0])
+    elif len(args.period) == 2:
+        start, end = parse_date_range(*args.period)
+    else:
+        raise ValueError("expected YYYY-MM or FROM TO")
+    from .team import team_summary
+
+    rows, total = team_summary(
+        start, end, load_settings(args.settings), args.profiles, args.workers
+    )
+    if not rows:
+        raise ValueError(f"no profiles under {args.profiles!r}")
+    width = max(len("Total"), *(len(name) for name, _ in rows))
+    out.write(f"{'Profile':<{width}}  {'Hours':>8}  {'Overtime':>8}  {'Pay':>12}\n")
+    for name, result in rows + [("Total", total)]:
+        out.write(
+            f"{name:<{width}}  {result.hours:8.2f}  {result.overtime_hours:8.2f}  "
+            f"{result.money(result.total_pay):>12}\n"
+        )
+    return 0
+
+
+def cmd_profile_list(args, events, templates, rules, out):
+    for name in list_profiles(args.profiles):
+        out.write(f"{name}\n")
+    return 0
+
+
+def cmd_profile_add(args, events, templates, rules, out):
+    out.write(f"{create_profile(args.name, args.profiles)}\n")
+    return 0
+
+
+def cmd_backup_create(args, events, templates, rules, out):
+    from .backup import BackupStore, retention
+
+    backups = BackupStore(args.backups)
+    snapshot_id = backups.backup(events, args.templates, args.memos)
+    if snapshot_id is None:
+        out.write("unchanged since the latest backup\n")
+    else:
+        out.write(f"{snapshot_id}\n")
+    backups.prune(*retention(load_settings(args.settings)))
+    return 0
+
+
+def cmd_backup_list(args, events, templates, rules, out):
+    from .backup import BackupStore, describe
+
+    backups = BackupStore(args.backups)
+    for snapshot_id in backups.snapshots():
+        manifest = backups.manifest(snapshot_id)
+        out.write(
+            f"{snapshot_id}  {describe(snapshot_id)}  "
+            f"{len(manifest['events'])} months\n"
+        )
+    return 0
+
+
+def cmd_backup_restore(args, events, templates, rules, out):
+    from .backup import BackupStore
+
+    backups = BackupStore(args.backups)
+    snapshot_id = args.id or (backups.snapshots() or [None])[-1]
+    if snapshot_id is None:
+        raise ValueError(f"no backups under {args.backups!r}")
+    restored = backups.restore(snapshot_id, args.events, args.templates, args.memos)
+    out.write(f"restored {len(restored)} days from {snapshot_id}\n")
+    return 0
+
+
+def cmd_backup_prune(args, events, templates, rules, out):
+    from .backup import BackupStore, retention
+
+    keep_last, keep_daily = retention(load_settings(args.settings))
+    if args.keep_last is not None:
+        keep_last = args.keep_last
+    if args.keep_daily is not None:
+        keep_daily = args.keep_daily
+    for snapshot_id in BackupStore(args.backups).prune(keep_last, keep_daily):
+        out.write(f"removed {snapshot_id}\n")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="lenggy", description="Timesheet reports.")
+    parser.add_argument("--events", default=EVENT_FILE, help="event store (JSON)")
+    parser.add_argument("--settings", default=SETTINGS_FILE, help="settings (JSON)")
+    parser.add_argument(
+        "--templates", default=TEMPLATE_FILE, help="recurring shift templates (JSON)"
+    )
+    parser.add_argument(
+        "--memos", default=MEMO_FILE, help="full text of long memos"
+    )
+    parser.add_argument(
+        "--backups", default=BACKUP_DIR, help="backup directory"
+    )
+    parser.add_argument(
+        "--profiles", default=PROFILE_DIR, help="directory of per-employee stores"
+    )
+    parser.add_argument(
+        "--profile", help="use this employee's store instead of --events/--templates"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    total = commands.add_parser("total", help="hours worked in a date range")
+    total.add_argument("date_from", metavar="FROM")
+    total.add_argument("date_to", metavar="TO")
+    total.add_argument("--pay", action="store_true", help="include pay breakdown")
+    total.set_defaults(func=cmd_total)
+
+    month = commands.add_parser("month", help="list the shifts of one month")
+    month.add_argument("month", metavar="YYYY-MM")
+    month.set_defaults(func=cmd_month)
+
+    export = commands.add_parser("export", help="export shifts as CSV or JSON")
+    export.add_argument("--from", dest="date_from")
+    export.add_argument("--to", dest="date_to")
+    export.add_argument("--format", choices=("csv", "json"), default="csv")
+    export.add_argument("-o", "--output", help="write to a file instead of stdout")
+    export.set_defaults(func=cmd_export)
+
+    template = commands.add_parser("template", help="manage recurring shifts")
+    template_commands = template.add_subparsers(dest="template_command", required=True)
+    template_commands.add_parser("list").set_defaults(func=cmd_template_list)
+    add = template_commands.add_parser("add", help="add a weekly recurring shift")
+    add.add_argument("weekdays", help="e.g. mon-fri or sat,sun")
+    add.add_argument("time_in", metavar="IN", help="HH:MM")
+    add.add_argument("time_out", metavar="OUT", help="HH:MM")
+    add.add_argument("--from", dest="date_from", help="first date (default today)")
+    add.add_argument("--until", help="last date (default open-ended)")
+    add.add_argument("--memo", default="")
+    add.set_defaults(func=cmd_template_add)
+    remove = template_commands.add_parser("remove", help="delete a template")
+    remove.add_argument("id")
+    remove.set_defaults(func=cmd_template_remove)
+
+    team = commands.add_parser("team", help="hours and pay for every profile")
+    team.add_argument("period", nargs="+", metavar="PERIOD", help="YYYY-MM or FROM TO")
+    team.add_argument(
+        "--workers", type=int, help="worker processes (0 runs in this process)"
+    )
+    team.set_defaults(func=cmd_team)
+
+    occupancy = commands.add_parser(
+        "occupancy", help="hours worked by time of day over a date range"
+    )
+    occupancy.add_argument("date_from", metavar="FROM")
+    occupancy.add_argument("date_to", metavar="TO")
+    occupancy.add_argument(
+        "--bucket", type=int, default=60, help="histogram bucket in minutes"
+    )
+    occupancy.add_argument("--at", help="how often a time of day (HH:MM) was worked")
+    occupancy.add_argument("--window", help="hours inside a daily HH:MM-HH:MM window")
+    occupancy.set_defaults(func=cmd_occupancy)
+
+    find = commands.add_parser(
+        "find", help="shifts matching dates, weekdays, start times and memo words"
+    )
+    find.add_argument("--from", dest="date_from")
+    find.add_argument("--to", dest="date_to")
+    find.add_argument("--weekday", help="e.g. sat or mon-fri")
+    find.add_argument("--after", help="starting at or after HH:MM")
+    find.add_argument("--before", help="starting before HH:MM")
+    find.add_argument("--memo", help="words the memo must contain")
+    find.add_argument(
+        "--explain", action="store_true", help="show which index answered"
+    )
+    find.set_defaults(func=cmd_find)
+
+    backup = commands.add_parser("backup", help="back up or restore the event store")
+    backup_commands = backup.add_subparsers(dest="backup_command", required=True)
+    backup_commands.add_parser(
+        "create", help="back up what changed since the last backup"
+    ).set_defaults(func=cmd_backup_create)
+    backup_commands.add_parser("list").set_defaults(func=cmd_backup_list)
+    restore = backup_commands.add_parser(
+        "restore", help="overwrite the store with a backup"
+    )
+    restore.add_argument("id", nargs="?", help="backup to restore (default latest)")
+    restore.set_defaults(func=cmd_backup_restore)
+    prune = backup_commands.add_parser("prune", help="apply the retention policy")
+    prune.add_argument("--keep-last", type=int)
+    prune.add_argument("--keep-daily", type=int, help="newest backup of each day")
+    prune.set_defaults(func=cmd_backup_prune)
+
+    profile = commands.add_parser("profile", help="manage employee profiles")
+    profile_commands = profile.add_subparsers(dest="profile_command", required=True)
+    profile_commands.add_parser("list").set_defaults(func=cmd_profile_list)
+    add_profile = profile_commands.add_parser("add", help="create an empty profile")
+    add_profile.add_argument("name")
+    add_profile.set_defaults(func=cmd_profile_add)
+    return parser
+
+
+def main(argv=None, out=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    out = out or sys.stdout
+    try:
+        settings = load_settings(args.settings)
+        if args.profile:
+            args.events = profile_path(args.profile, EVENT_FILE, args.profiles)
+            args.templates = profile_path(args.profile, TEMPLATE_FILE, args.profiles)
+            args.memos = profile_path(args.profile, MEMO_FILE, args.profiles)
+            args.backups = profile_path(args.profile, BACKUP_DIR, args.profiles)
+            settings = profile_settings(settings, args.profile, args.profiles)
+        events = load_events(args.events)
+        templates = load_templates(args.templates)
+        rules = PayRules.from_settings(settings)
+        return args.func(args, events, templates, rules, out)
+    except (OSError, ValueError) as e:
+        parser.exit(2, f"lenggy: error: {e}\n")
@@ -0,0 +1,90 @@
+"""Multi-level undo and redo for edits to an event store.
+
+A step keeps only the dates an edit changed, each with its stored entries
+before and after. Store snapshots share every month an edit did not
+touch, so finding those dates skips the untouched months unread, and the
+entries are shared with the store instead of copied. The few shift
+templates are kept whole, and only in the steps that changed them.
+"""
+
+from collections import deque
+
+from .templates import ShiftTemplate
+
+DEPTH = 50
+
+
+def _template_state(templates):
+    if templates is None:
+        return None
+    return tuple(t.to_dict() for t in templates)
+
+
+class EditHistory:
+    def __init__(self, store, templates=None, depth=DEPTH):
+        self.store = store
+        # Oldest steps fall off once depth is reached.
+        self._undo = deque(maxlen=max(0, depth))
+        self._redo = []
+        self._at = store.snapshot()
+        self._templates = _template_state(templates)
+
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+
+    def record(self, templates=None):
+        # Makes everything written to the store (and the templates) since
+        # the last call one step. Returns False when nothing changed.
+        snapshot = self.store.snapshot()
+        changes = tuple(snapshot.changes(self._at))
+        state = _template_state(templates)
+        template_step = None
+        if state is not None and state != self._templates:
+            template_step = (self._templates, state)
+        self._at = snapshot
+        self._templates = state
+        if not changes and template_step is None:
+            return False
+        self._undo.append((changes, template_step))
+        self._redo.clear()
+        return True
+
+    def undo(self, templates=None):
+        # The dates undone, or None when there is nothing to undo. Edits not
+        # yet recorded are recorded first, so they are what gets undone.
+        self.record(templates)
+        if not self._undo:
+            return None
+        step = self._undo.pop()
+        self._redo.append(step)
+        return self._apply(step, 1, templates)
+
+    def redo(self, templates=None):
+        if self.record(templates) or not self._redo:
+            # A new edit ends the redo chain.
+            return None
+        step = self._redo.pop()
+        self._undo.append(step)
+        return self._apply(step, 2, templates)
+
+    def _apply(self, step, side, templates):
+        # side 1 puts back the entries before the step, side 2 those after.
+        changes, template_step = step
+        if changes:
+            self._at = self.store.update({c[0]: c[side] for c in changes})
+        if template_step is not None and templates is not None:
+            state = template_step[side - 1]
+            # In place: the calendar and the editors hold the same list.
+            templates[:] = [ShiftTemplate.from_dict(t) for t in state or ()]
+            self._templates = _template_state(templates)
+        return [c[0] for c in changes]
+
+
+def history_depth(settings):
+    # Undo steps kept, from the "undo" section of settings.json.
+    return int(settings.get("undo", {}).get("depth", DEPTH))
@@ -0,0 +1,139 @@
+"""Memo autocomplete: a prefix trie over every memo in the event store.
+
+Memos are matched case-insensitively. Each distinct memo scores
+2 ** (day / HALF_LIFE_DAYS) per day it was used, so memos used often rank
+first and a recent use outweighs an old one. Every score grows by the
+same factor as time passes, so the order never needs refreshing. Each
+trie node caches its best few memos, which makes a lookup one walk down
+the typed prefix.
+"""
+
+from datetime import date
+
+from .model import parse_date_ordinal, segments_of
+
+HALF_LIFE_DAYS = 180
+TOP_K = 5
+# Exponents are taken relative to this day to keep the scores small.
+_EPOCH = date(2020, 1, 1).toordinal()
+
+
+def _weight(day):
+    return 2.0 ** ((day - _EPOCH) / HALF_LIFE_DAYS)
+
+
+def _memo_keys(segments):
+    for segment in segments_of(segments or []):
+        # Long memos kept in the archive are not worth suggesting and only
+        # their preview is resident.
+        if "memo_ref" in segment:
+            continue
+        text = " ".join(segment.get("memo", "").split())
+        if text:
+            yield text.lower(), text
+
+
+class _Node:
+    __slots__ = ("children", "key", "top")
+
+    def __init__(self):
+        self.children = {}
+        self.key = None
+        self.top = []
+
+
+class MemoIndex:
+    def __init__(self, k=TOP_K):
+        self.k = k
+        self._root = _Node()
+        # key -> [score, uses, display text, day of the latest use]
+        self._stats = {}
+
+    @classmethod
+    def from_events(cls, events, k=TOP_K):
+        index = cls(k)
+        for date_str, segments in events.items():
+            day = parse_date_ordinal(date_str)
+            if day is not None:
+                for key, text in _memo_keys(segments):
+                    index._count(key, text, day, 1)
+        # Scores are final before the trie is built, so each memo is
+        # inserted once however often it was used.
+        for key in index._stats:
+            index._promote(key)
+        return index
+
+    def suggest(self, prefix, limit=None):
+        node = self._root
+        for char in " ".join(prefix.split()).lower():
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [self._stats[key][2] for key in node.top[:limit]]
+
+    def replace_day(self, date_str, old_segments, new_segments):
+        # Moves the index from one version of a day's entry to the next.
+        day = parse_date_ordinal(date_str)
+        if day is None:
+            return
+        delta = {}
+        for key, text in _memo_keys(old_segments):
+            delta[key] = (delta.get(key, (0, text))[0] - 1, text)
+        for key, text in _memo_keys(new_segments):
+            delta[key] = (delta.get(key, (0, text))[0] + 1, text)
+        for key, (uses, text) in delta.items():
+            if uses > 0:
+                self._count(key, text, day, uses)
+                self._promote(key)
+            elif uses < 0:
+                self._count(key, text, day, uses)
+                self._demote(key)
+
+    def _count(self, key, text, day, uses):
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = [0.0, 0, text, day]
+        stats[0] += uses * _weight(day)
+        stats[1] += uses
+        if uses > 0 and day >= stats[3]:
+            stats[2], stats[3] = text, day
+        if stats[1] <= 0:
+            del self._stats[key]
+
+    def _rank(self, key):
+        return (-self._stats[key][0], key)
+
+    def _promote(self, key):
+        # A score only went up: the key can join or climb each list on its
+        # path, and nothing else moves.
+        node = self._root
+        path = [node]
+        for char in key:
+            node = node.children.setdefault(char, _Node())
+            path.append(node)
+        node.key = key
+        for node in path:
+            if key not in node.top:
+                node.top.append(key)
+            node.top.sort(key=self._rank)
+            del node.top[self.k :]
+
+    def _demote(self, key):
+        # A score went down or the key is gone, so a memo below the cut may
+        # now belong in a list. Lists are rebuilt bottom-up from the
+        # children's lists, which hold every candidate.
+        path = [self._root]
+        for char in key:
+            child = path[-1].children.get(char)
+            if child is None:
+                break
+            path.append(child)
+        if path[-1].key == key and key not in self._stats:
+            path[-1].key = None
+        for node in reversed(path):
+            candidates = set()
+            if node.key is not None:
+                candidates.add(node.key)
+            for child in node.children.values():
+                candidates.update(child.top)
+            node.top = sorted(candidates, key=self._rank)[: self.k]
@@ -0,0 +1,87 @@
+from datetime import date, datetime
+
+DATE_FORMAT = "%Y-%m-%d"
+
+
+def format_time(time_str):
+    try:
+        t = datetime.strptime(time_str, "%H:%M")
+        return t.strftime("%I:%M %p").lstrip("0")
+    except Exception:
+        return ""
+
+
+def work_time_string(segment):
+    tin = format_time(segment.get("time_in", ""))
+    tout = format_time(segment.get("time_out", ""))
+    if tin and tout:
+        return f"{tin} - {tout}"
+    elif tin:
+        return f"{tin}"
+    elif tout:
+        return f"{tout}"
+    else:
+        return ""
+
+
+def parse_minutes(time_str):
+    try:
+        hour, minute = time_str.split(":")
+        hour, minute = int(hour), int(minute)
+    except (AttributeError, ValueError):
+        return None
+    if 0 <= hour < 24 and 0 <= minute < 60:
+        return hour * 60 + minute
+    return None
+
+
+def parse_date_ordinal(date_str):
+    # Same format as strptime("%Y-%m-%d"), several times faster over a
+    # whole history.
+    try:
+        if len(date_str) != 10 or date_str[4] != "-" or date_str[7] != "-":
+            return None
+        return date(int(date_str[:4]), int(date_str[5:7]), int(date_str[8:])).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def segment_minutes(segment):
+    # Worked minutes of one shift, wrapping past midnight when time_out is
+    # earlier than time_in; None when either time is missing or invalid.
+    start = parse_minutes(segment.get("time_in", ""))
+    end = parse_minutes(segment.get("time_out", ""))
+    if start is None or end is None:
+        return None
+    if end < start:
+        end += 1440
+    return end - start
+
+
+def segments_of(entry):
+    # Older files stored a single segment dict per day.
+    if isinstance(entry, dict):
+        return [entry]
+    return entry if isinstance(entry, list) else []
+
+
+def months_of(events):
+    # ("YYYY-MM", {date_str: segments}) pairs; a store snapshot hands out
+    # its own month dicts, shared between versions.
+    if hasattr(events, "by_month"):
+        return events.by_month()
+    months = {}
+    for date_str, segments in events.items():
+        months.setdefault(date_str[:7], {})[date_str] = segments
+    return months.items()
+
+
+def week_start(day):
+    # Ordinal of the Monday on or before day; ordinal 1 was a Monday.
+    return day - (day - 1) % 7
+
+
+def parse_date_range(date_from, date_to):
+    start = datetime.strptime(date_from, DATE_FORMAT).toordinal()
+    end = datetime.strptime(date_to, DATE_FORMAT).toordinal()
+    return start, end
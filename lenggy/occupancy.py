@@ -0,0 +1,78 @@
+"""Time-of-day occupancy: which minutes of the day were worked, and how often.
+
+Shifts are cut at midnight (the part of an overnight shift after 00:00
+belongs to the next day) and merged per day, so each day's occupancy is a
+few disjoint minute intervals. A range query sums those intervals into a
+1440-slot minute-of-day count with a difference array, which answers
+histogram and time-window questions in one pass over the range.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
+
+DAY_MINUTES = 1440
+
+
+class Occupancy:
+    def __init__(self, table):
+        # table is a ShiftTable; its rows are sorted by day and start. Time
+        # of day is wall clock, so its wall_ends are used, not elapsed ends.
+        pieces = []
+        for day, start, end in zip(table.days, table.starts, table.wall_ends):
+            if end > DAY_MINUTES:
+                pieces.append((day, start, DAY_MINUTES))
+                pieces.append((day + 1, 0, min(end - DAY_MINUTES, DAY_MINUTES)))
+            elif end > start:
+                pieces.append((day, start, end))
+        pieces.sort()
+        days, starts, ends = array("l"), array("l"), array("l")
+        for day, start, end in pieces:
+            if days and days[-1] == day and start <= ends[-1]:
+                # Overlapping or touching shifts on one day count once.
+                if end > ends[-1]:
+                    ends[-1] = end
+                continue
+            days.append(day)
+            starts.append(start)
+            ends.append(end)
+        self.days, self.starts, self.ends = days, starts, ends
+
+    def span(self, start_day, end_day):
+        return (
+            bisect_left(self.days, start_day),
+            bisect_right(self.days, end_day),
+        )
+
+    def minute_counts(self, start_day, end_day):
+        # Number of days in [start_day, end_day] worked at each minute of the
+        # day, indexed 0..1439.
+        diff = array("l", [0]) * (DAY_MINUTES + 1)
+        lo, hi = self.span(start_day, end_day)
+        starts, ends = self.starts, self.ends
+        for i in range(lo, hi):
+            diff[starts[i]] += 1
+            diff[ends[i]] -= 1
+        counts = array("l", accumulate(diff))
+        del counts[DAY_MINUTES]
+        return counts
+
+    def histogram(self, start_day, end_day, bucket=60):
+        # Worked minutes per time-of-day bucket over the range; with the
+        # default bucket that is minutes per hour of the day.
+        if bucket <= 0 or DAY_MINUTES % bucket:
+            raise ValueError("bucket must divide a day into whole minutes")
+        counts = self.minute_counts(start_day, end_day)
+        return [sum(counts[i : i + bucket]) for i in range(0, DAY_MINUTES, bucket)]
+
+    def days_at(self, minute, start_day, end_day):
+        # Days in the range worked at this minute of the day.
+        return self.minute_counts(start_day, end_day)[minute % DAY_MINUTES]
+
+    def window_minutes(self, start_day, end_day, window_start, window_end):
+        # Worked minutes falling inside a daily window such as 09:00-17:00;
+        # a window ending at or before its start wraps past midnight.
+        counts = self.minute_counts(start_day, end_day)
+        if window_start < window_end:
+            return sum(counts[window_start:window_end])
+        return sum(counts[window_start:]) + sum(counts[:window_end])
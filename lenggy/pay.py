@@ -0,0 +1,333 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+from .model import (
+    parse_date_ordinal,
+    parse_minutes,
+    segment_minutes,
+    segments_of,
+    week_start,
+)
+from .storage import PREVIEW_LENGTH
+from .templates import iter_occurrences
+from .tz import zone_transitions
+
+
+class ShiftTable:
+    # Every complete shift parsed once into parallel arrays sorted by day,
+    # so range queries are a bisect plus a single pass.
+
+    def __init__(self, events, rules):
+        rows = []
+        for date_str, ev in events.items():
+            day = parse_date_ordinal(date_str)
+            if day is not None:
+                rows.extend(shift_rows(day, segments_of(ev), rules))
+        self._set_rows(rows, rules.zone)
+
+    @classmethod
+    def from_rows(cls, rows, zone=None):
+        table = cls.__new__(cls)
+        table._set_rows(rows, zone)
+        return table
+
+    @classmethod
+    def from_months(cls, months, zone=None):
+        # From (days, starts, ends, rates) columns per month, each already
+        # sorted and the months in date order, so nothing is sorted again.
+        table = cls.__new__(cls)
+        table.days = array("l")
+        table.starts = array("l")
+        table.ends = array("l")
+        table.rates = array("d")
+        for days, starts, ends, rates in months:
+            table.days.extend(days)
+            table.starts.extend(starts)
+            table.ends.extend(ends)
+            table.rates.extend(rates)
+        table._apply_zone(zone)
+        return table
+
+    def _set_rows(self, rows, zone=None):
+        rows.sort()
+        self.days = array("l", [r[0] for r in rows])
+        self.starts = array("l", [r[1] for r in rows])
+        self.ends = array("l", [r[2] for r in rows])
+        self.rates = array("d", [r[3] for r in rows])
+        self._apply_zone(zone)
+
+    def _apply_zone(self, zone):
+        # ends become elapsed-time ends; wall_ends keeps the wall clock ones,
+        # which night windows are matched against.
+        self.wall_ends = self.ends
+        if zone is not None and self.days:
+            self.wall_ends = array("l", self.ends)
+            self._apply_transitions(zone)
+
+    def _apply_transitions(self, zone):
+        # Times are local wall clock. Only shifts on a transition day or the
+        # day before (overnight) are looked at; each one straddling the
+        # change has its end moved so end - start is the elapsed time.
+        days, starts, ends = self.days, self.starts, self.ends
+        for day, minute, delta in zone.between(days[0], days[-1] + 1):
+            lo, hi = self.span(day - 1, day)
+            for i in range(lo, hi):
+                at = (day - days[i]) * 1440 + minute
+                if starts[i] <= at < ends[i]:
+                    ends[i] -= delta
+
+    def __len__(self):
+        return len(self.days)
+
+    def has_day(self, day):
+        i = bisect_left(self.days, day)
+        return i < len(self.days) and self.days[i] == day
+
+    def with_templates(self, templates, rules, start_day, end_day):
+        # A table for [start_day, end_day] with template occurrences filled in
+        # on days that have no explicit entry. Only that range is expanded.
+        rows = []
+        for day, segment in iter_occurrences(templates, start_day, end_day):
+            if not self.has_day(day):
+                rows.extend(shift_rows(day, [segment], rules))
+        if not rows:
+            return self
+        # From wall clock rows again; zone corrections only look at the rows
+        # around the few transition days.
+        lo, hi = self.span(start_day, end_day)
+        rows.extend(
+            zip(
+                self.days[lo:hi],
+                self.starts[lo:hi],
+                self.wall_ends[lo:hi],
+                self.rates[lo:hi],
+            )
+        )
+        return ShiftTable.from_rows(rows, rules.zone)
+
+    def span(self, start_day, end_day):
+        return (
+            bisect_left(self.days, start_day),
+            bisect_right(self.days, end_day),
+        )
+
+    def total_minutes(self, start_day, end_day):
+        lo, hi = self.span(start_day, end_day)
+        return sum(self.ends[lo:hi]) - sum(self.starts[lo:hi])
+
+    def day_minutes(self, start_day, end_day):
+        # Worked minutes per day, indexed from start_day.
+        minutes = array("l", [0]) * (end_day - start_day + 1)
+        lo, hi = self.span(start_day, end_day)
+        days, starts, ends = self.days, self.starts, self.ends
+        for i in range(lo, hi):
+            minutes[days[i] - start_day] += ends[i] - starts[i]
+        return minutes
+
+
+def shift_rows(day, segments, rules):
+    for segment in segments:
+        start = parse_minutes(segment.get("time_in", ""))
+        end = parse_minutes(segment.get("time_out", ""))
+        if start is None or end is None:
+            continue
+        if end < start:
+            end += 1440
+        yield day, start, end, rules.rate_for(segment)
+
+
+def shift_minutes(date_str, segment, rules):
+    # Elapsed minutes of one shift, corrected for the rules' time zone.
+    minutes = segment_minutes(segment)
+    if minutes is None or rules.zone is None:
+        return minutes
+    start = parse_minutes(segment["time_in"])
+    return rules.zone.elapsed(parse_date_ordinal(date_str), start, start + minutes)
+
+
+class PayRules:
+    def __init__(
+        self,
+        base_rate=0.0,
+        shift_rates=None,
+        daily_overtime_hours=8.0,
+        weekly_overtime_hours=40.0,
+        overtime_multiplier=1.5,
+        night_start="22:00",
+        night_end="06:00",
+        night_differential=0.0,
+        holidays=(),
+        holiday_multiplier=2.0,
+        currency="$",
+        timezone="",
+    ):
+        self.base_rate = float(base_rate)
+        self.shift_rates = {k.strip().lower(): float(v) for k, v in (shift_rates or {}).items()}
+        # Longer memos are archived and stored as a preview, which no key
+        # could match.
+        for key in self.shift_rates:
+            if len(key) > PREVIEW_LENGTH:
+                raise ValueError(
+                    f"shift rate memo {key!r} is over {PREVIEW_LENGTH} characters"
+                )
+        self.daily_overtime = int(float(daily_overtime_hours) * 60)
+        self.weekly_overtime = int(float(weekly_overtime_hours) * 60)
+        self.overtime_multiplier = float(overtime_multiplier)
+        self.night_differential = float(night_differential)
+        self.holidays = {d for d in map(parse_date_ordinal, holidays) if d is not None}
+        self.holiday_multiplier = float(holiday_multiplier)
+        self.currency = currency
+        # Durations follow this zone's UTC offset changes; "" keeps plain
+        # wall-clock arithmetic.
+        self.zone = zone_transitions(timezone)
+        # Night windows in minutes from the shift's start-day midnight; a
+        # shift can run into the next day, so windows cover two days.
+        ns = parse_minutes(night_start)
+        ne = parse_minutes(night_end)
+        if ns is None or ne is None or ns == ne:
+            self.night_windows = ()
+        elif ns < ne:
+            self.night_windows = ((ns, ne), (ns + 1440, ne + 1440))
+        else:
+            self.night_windows = ((0, ne), (ns, ne + 1440), (ns + 1440, 2880))
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(timezone=settings.get("timezone", ""), **settings.get("pay", {}))
+
+    @property
+    def has_rates(self):
+        return self.base_rate > 0 or any(self.shift_rates.values())
+
+    def rate_for(self, segment):
+        # Only memos short enough to stay inline pick a rate, so a rate
+        # applies the same before and after a memo moves to the memo file.
+        memo = segment.get("memo", "")
+        if "memo_ref" in segment or len(memo) > PREVIEW_LENGTH:
+            return self.base_rate
+        return self.shift_rates.get(memo.strip().lower(), self.base_rate)
+
+    def night_minutes(self, start, end):
+        total = 0
+        for ws, we in self.night_windows:
+            overlap = min(end, we) - max(start, ws)
+            if overlap > 0:
+                total += overlap
+        return total
+
+
+class PayBreakdown:
+    FIELDS = (
+        "minutes",
+        "overtime_minutes",
+        "night_minutes",
+        "holiday_minutes",
+        "base_pay",
+        "overtime_pay",
+        "night_pay",
+        "holiday_pay",
+    )
+
+    def __init__(self, currency="$"):
+        self.currency = currency
+        for name in self.FIELDS:
+            setattr(self, name, 0)
+
+    def copy(self):
+        other = PayBreakdown(self.currency)
+        for name in self.FIELDS:
+            setattr(other, name, getattr(self, name))
+        return other
+
+    def add(self, other):
+        for name in self.FIELDS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    @property
+    def hours(self):
+        return round(self.minutes / 60.0, 2)
+
+    @property
+    def regular_hours(self):
+        return round((self.minutes - self.overtime_minutes) / 60.0, 2)
+
+    @property
+    def overtime_hours(self):
+        return round(self.overtime_minutes / 60.0, 2)
+
+    @property
+    def night_hours(self):
+        return round(self.night_minutes / 60.0, 2)
+
+    @property
+    def holiday_hours(self):
+        return round(self.holiday_minutes / 60.0, 2)
+
+    @property
+    def total_pay(self):
+        return self.base_pay + self.overtime_pay + self.night_pay + self.holiday_pay
+
+    def money(self, amount):
+        return f"{self.currency}{amount:,.2f}"
+
+
+def iter_pay_breakdown(table, rules, start_day, end_day, chunk_size=2000):
+    # Yields (done, total, PayBreakdown) after roughly every chunk_size
+    # shifts; the final tuple holds the complete result. Weekly overtime
+    # counts the days of the first week that precede start_day.
+    result = PayBreakdown(rules.currency)
+    lo, hi = table.span(week_start(start_day), end_day)
+    days, starts, ends, rates = table.days, table.starts, table.ends, table.rates
+    wall_ends = table.wall_ends
+    total = hi - lo
+    week = None
+    week_regular = 0
+    since_yield = 0
+    i = lo
+    while i < hi:
+        day = days[i]
+        day_minutes = night = 0
+        day_pay = night_pay = 0.0
+        while i < hi and days[i] == day:
+            start, end, rate = starts[i], ends[i], rates[i]
+            minutes = end - start
+            day_minutes += minutes
+            day_pay += minutes * rate / 60.0
+            if rules.night_windows:
+                # On the wall clock, like the night window itself.
+                shift_night = rules.night_minutes(start, wall_ends[i])
+                night += shift_night
+                night_pay += shift_night * rate / 60.0
+            i += 1
+            since_yield += 1
+
+        # Day 1 (0001-01-01) was a Monday, so weeks start on ordinals 7k+1.
+        if (day - 1) // 7 != week:
+            week = (day - 1) // 7
+            week_regular = 0
+        daily_ot = max(0, day_minutes - rules.daily_overtime)
+        regular = day_minutes - daily_ot
+        weekly_ot = max(0, week_regular + regular - rules.weekly_overtime) - max(
+            0, week_regular - rules.weekly_overtime
+        )
+        week_regular += regular
+        if day < start_day:
+            continue
+
+        overtime = daily_ot + weekly_ot
+        # Pay per minute, averaged over the day's shift rates.
+        avg_rate = day_pay / day_minutes if day_minutes else 0.0
+        result.minutes += day_minutes
+        result.overtime_minutes += overtime
+        result.night_minutes += night
+        result.base_pay += day_pay
+        result.overtime_pay += overtime * avg_rate * (rules.overtime_multiplier - 1)
+        result.night_pay += night_pay * rules.night_differential
+        if day in rules.holidays:
+            result.holiday_minutes += day_minutes
+            result.holiday_pay += day_pay * (rules.holiday_multiplier - 1)
+
+        if since_yield >= chunk_size:
+            since_yield = 0
+            yield i - lo, total, result.copy()
+    yield total, total, result
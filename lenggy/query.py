@@ -0,0 +1,247 @@
+"""Indexed shift queries by date range, weekday, start time and memo words.
+
+ShiftIndex keeps four indexes over the stored days: the days in date
+order, the days of each weekday, the days with a shift starting in each
+hour, and the days whose memos contain each word. A query asks every
+index it constrains how many days it would yield, reads only the
+smallest of those candidate sets and checks the remaining conditions on
+those days alone. A memo word matches the start of any word of a memo,
+ignoring case.
+"""
+
+import re
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+
+from .model import DATE_FORMAT, parse_date_ordinal, parse_minutes, segments_of
+from .templates import parse_weekdays, weekday_of
+
+_WORD = re.compile(r"\w+")
+
+
+def memo_words(text):
+    return _WORD.findall(text.lower())
+
+
+def _inline_memo(segment):
+    return segment.get("memo", "")
+
+
+class ShiftQuery:
+    def __init__(
+        self, start=None, end=None, weekdays=None, after=None, before=None, memo=""
+    ):
+        # start/end are inclusive day ordinals. A shift matches the time
+        # window when it starts at or after `after` and before `before`
+        # (minutes); when after >= before the window wraps past midnight.
+        self.start = start
+        self.end = end
+        self.weekdays = None if weekdays is None else frozenset(weekdays)
+        self.after = after
+        self.before = before
+        self.words = memo_words(memo)
+
+    @classmethod
+    def parse(cls, date_from="", date_to="", weekdays="", after="", before="", memo=""):
+        # From user input; empty strings leave a condition out.
+        bounds = []
+        for value in (date_from, date_to):
+            day = parse_date_ordinal(value) if value else None
+            if value and day is None:
+                raise ValueError(f"dates must use {DATE_FORMAT}")
+            bounds.append(day)
+        times = []
+        for value in (after, before):
+            minute = parse_minutes(value) if value else None
+            if value and minute is None:
+                raise ValueError("times must use HH:MM")
+            times.append(minute)
+        return cls(
+            bounds[0],
+            bounds[1],
+            parse_weekdays(weekdays) if weekdays else None,
+            times[0],
+            times[1],
+            memo,
+        )
+
+    @property
+    def timed(self):
+        return self.after is not None or self.before is not None
+
+    def starts_in_window(self, minute):
+        if not self.timed:
+            return True
+        if minute is None:
+            return False
+        after = 0 if self.after is None else self.after
+        before = 24 * 60 if self.before is None else self.before
+        if after < before:
+            return after <= minute < before
+        return minute >= after or minute < before
+
+    def matches_day(self, day):
+        return (
+            (self.start is None or day >= self.start)
+            and (self.end is None or day <= self.end)
+            and (self.weekdays is None or weekday_of(day) in self.weekdays)
+        )
+
+    def matches_segment(self, segment, text=_inline_memo):
+        if not self.starts_in_window(parse_minutes(segment.get("time_in", ""))):
+            return False
+        if not self.words:
+            return True
+        words = memo_words(text(segment))
+        return all(any(w.startswith(q) for w in words) for q in self.words)
+
+
+class ShiftIndex:
+    def __init__(self, text=None):
+        # text(segment) gives a segment's full memo, e.g. MemoArchive.text.
+        self.text = text or _inline_memo
+        self._days = []
+        # day -> (date_str, segments, start hours, memo words)
+        self._entries = {}
+        self._by_weekday = [set() for _ in range(7)]
+        self._by_hour = [set() for _ in range(24)]
+        self._by_word = {}
+        # The keys of _by_word in order, for prefix lookups.
+        self._words = []
+
+    @classmethod
+    def from_events(cls, events, text=None):
+        index = cls(text)
+        for date_str, segments in events.items():
+            index._add(date_str, segments, bulk=True)
+        index._days.sort()
+        index._words = sorted(index._by_word)
+        return index
+
+    def __len__(self):
+        return len(self._entries)
+
+    def replace_day(self, date_str, old_segments, new_segments):
+        # Same contract as MemoIndex.replace_day: one day's entry changed.
+        day = parse_date_ordinal(date_str)
+        if day is None:
+            return
+        if day in self._entries:
+            self._remove(day)
+        if new_segments is not None:
+            self._add(date_str, new_segments)
+
+    def _add(self, date_str, segments, bulk=False):
+        day = parse_date_ordinal(date_str)
+        if day is None:
+            return
+        segments = segments_of(segments)
+        hours = set()
+        words = set()
+        for segment in segments:
+            minute = parse_minutes(segment.get("time_in", ""))
+            if minute is not None:
+                hours.add(minute // 60)
+            words.update(memo_words(self.text(segment)))
+        self._entries[day] = (date_str, segments, hours, words)
+        self._by_weekday[weekday_of(day)].add(day)
+        for hour in hours:
+            self._by_hour[hour].add(day)
+        for word in words:
+            posting = self._by_word.get(word)
+            if posting is None:
+                posting = self._by_word[word] = set()
+                if not bulk:
+                    insort(self._words, word)
+            posting.add(day)
+        if bulk:
+            self._days.append(day)
+        else:
+            insort(self._days, day)
+
+    def _remove(self, day):
+        date_str, segments, hours, words = self._entries.pop(day)
+        self._by_weekday[weekday_of(day)].discard(day)
+        for hour in hours:
+            self._by_hour[hour].discard(day)
+        for word in words:
+            posting = self._by_word[word]
+            posting.discard(day)
+            if not posting:
+                del self._by_word[word]
+                del self._words[bisect_left(self._words, word)]
+        del self._days[bisect_left(self._days, day)]
+
+    def _prefixed(self, prefix):
+        i = bisect_left(self._words, prefix)
+        while i < len(self._words) and self._words[i].startswith(prefix):
+            yield self._by_word[self._words[i]]
+            i += 1
+
+    def plan(self, query):
+        # (index name, estimated days, function returning candidate days)
+        # for the most selective index the query can use. Set sizes are
+        # upper bounds when a condition spans several sets.
+        options = [("scan", len(self._days), lambda: self._days)]
+        if query.start is not None or query.end is not None:
+            lo = 0 if query.start is None else bisect_left(self._days, query.start)
+            hi = len(self._days)
+            if query.end is not None:
+                hi = bisect_right(self._days, query.end)
+            options.append(("date", max(0, hi - lo), lambda: self._days[lo:hi]))
+        if query.weekdays is not None:
+            sets = [self._by_weekday[d] for d in query.weekdays]
+            options.append(("weekday", sum(map(len, sets)), _union(sets)))
+        if query.timed:
+            sets = [
+                self._by_hour[hour]
+                for hour in range(24)
+                if any(map(query.starts_in_window, range(hour * 60, hour * 60 + 60)))
+            ]
+            options.append(("start time", sum(map(len, sets)), _union(sets)))
+        for word in query.words:
+            sets = list(self._prefixed(word))
+            options.append((f"memo '{word}'", sum(map(len, sets)), _union(sets)))
+        return min(options, key=lambda option: option[1])
+
+    def run(self, query, templates=()):
+        # [(date_str, segment)] in date order. Template occurrences count on
+        # days without an explicit entry; open-ended ones stop at today.
+        name, estimate, candidates = self.plan(query)
+        results = []
+        for day in sorted(candidates()):
+            if not query.matches_day(day):
+                continue
+            date_str, segments = self._entries[day][:2]
+            for segment in segments:
+                if query.matches_segment(segment, self.text):
+                    results.append((day, date_str, segment))
+        for template in templates:
+            results.extend(self._occurrences(query, template))
+        results.sort(key=lambda row: row[0])
+        return [row[1:] for row in results]
+
+    def _occurrences(self, query, template):
+        segment = template.segment()
+        if not query.matches_segment(segment):
+            return
+        weekdays = template.weekdays
+        if query.weekdays is not None:
+            weekdays = weekdays & query.weekdays
+        first = max(query.start or 1, template.first_day)
+        last = date.today().toordinal() if query.end is None else query.end
+        for weekday in weekdays:
+            day = first + (weekday - weekday_of(first)) % 7
+            while day <= last:
+                if day not in self._entries and template.occurs_on(day):
+                    yield day, date.fromordinal(day).strftime(DATE_FORMAT), segment
+                day += 7
+
+
+def _union(sets):
+    def candidates():
+        if len(sets) == 1:
+            return sets[0]
+        return set().union(*sets)
+
+    return candidates
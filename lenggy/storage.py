@@ -0,0 +1,218 @@
+import json
+import os
+from collections import OrderedDict
+
+from .templates import ShiftTemplate
+
+EVENT_FILE = "events.json"
+SETTINGS_FILE = "settings.json"
+TEMPLATE_FILE = "templates.json"
+MEMO_FILE = "memos.dat"
+PROFILE_DIR = "profiles"
+BACKUP_DIR = "backups"
+# UI state saved when the app is paused, to restart where it left off.
+RESUME_FILE = "resume.json"
+# Memos longer than this live in the memo file; the event store keeps a
+# preview and the text's location there.
+PREVIEW_LENGTH = 40
+
+
+def load_events(path=EVENT_FILE):
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            data = json.load(f)
+            for k, v in list(data.items()):
+                if isinstance(v, dict):
+                    data[k] = [v]
+            return data
+    return {}
+
+
+def save_events(events, path=EVENT_FILE):
+    # events may be a store snapshot. The file is replaced in one step, so a
+    # save interrupted half way leaves the previous version intact.
+    if not isinstance(events, dict):
+        events = dict(events.items())
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(events, f, indent=2)
+    os.replace(tmp, path)
+
+
+class MemoArchive:
+    # Cold storage for long memo text: an append-only file of UTF-8 strings.
+    # A segment whose memo was moved here keeps
+    # "memo_ref": [offset, length] next to its preview.
+
+    RECENT = 256
+
+    def __init__(self, path=MEMO_FILE):
+        self.path = path
+        self._reader = None
+        self._stamp = None
+        # Locations of texts read or written lately, least recent first, so
+        # an edited day saved with its long memo unchanged points at the old
+        # copy again.
+        self._recent = OrderedDict()
+
+    def _remember(self, memo, ref):
+        self._recent[memo] = ref
+        self._recent.move_to_end(memo)
+        if len(self._recent) > self.RECENT:
+            self._recent.popitem(last=False)
+
+    def _check(self):
+        # A backup restore may have replaced the file: the open reader and
+        # the remembered locations belong to the old one.
+        stamp = file_stamp(self.path)
+        if stamp != self._stamp:
+            self.close()
+            self._recent.clear()
+            self._stamp = stamp
+
+    def stash(self, segment):
+        # The segment as it should be stored: unchanged when its memo is
+        # short or already archived, else with the text appended here.
+        memo = segment.get("memo", "")
+        if len(memo) <= PREVIEW_LENGTH or "memo_ref" in segment:
+            return segment
+        self._check()
+        ref = self._recent.get(memo)
+        if ref is None:
+            data = memo.encode("utf-8")
+            with open(self.path, "ab") as f:
+                ref = [f.seek(0, os.SEEK_END), len(data)]
+                f.write(data)
+            # Only grown by this append; what was read stays valid.
+            self._stamp = file_stamp(self.path)
+        self._remember(memo, ref)
+        return {**segment, "memo": memo[:PREVIEW_LENGTH] + "...", "memo_ref": ref}
+
+    def text(self, segment):
+        ref = segment.get("memo_ref")
+        if ref is None:
+            return segment.get("memo", "")
+        try:
+            self._check()
+            if self._reader is None:
+                self._reader = open(self.path, "rb")
+            self._reader.seek(ref[0])
+            memo = self._reader.read(ref[1]).decode("utf-8")
+        except (OSError, UnicodeDecodeError, TypeError, IndexError):
+            # A missing or damaged memo file still leaves the preview.
+            return segment.get("memo", "")
+        self._remember(memo, ref)
+        return memo
+
+    def full(self, segments):
+        # Copies of segments with their complete memo text, as the editor,
+        # the event list and exports show them.
+        result = []
+        for segment in segments:
+            segment = dict(segment)
+            if "memo_ref" in segment:
+                segment["memo"] = self.text(segment)
+                del segment["memo_ref"]
+            result.append(segment)
+        return result
+
+    def prepare(self, events):
+        # Moves long inline memos (files written before the split) out of
+        # events. Returns True when events changed and should be saved.
+        changed = False
+        for date_str, segments in events.items():
+            stored = [self.stash(segment) for segment in segments]
+            if any(a is not b for a, b in zip(stored, segments)):
+                events[date_str] = stored
+                changed = True
+        return changed
+
+    def close(self):
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+
+def file_stamp(path):
+    # [mtime in ns, size], or None when missing: enough to tell whether a
+    # file was rewritten since the stamp was taken.
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def load_resume(path=RESUME_FILE):
+    # The saved state, or None when there is none or it cannot be read.
+    try:
+        with open(path, "r") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if isinstance(state, dict) else None
+
+
+def save_resume(state, path=RESUME_FILE):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+def load_settings(path=SETTINGS_FILE):
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return json.load(f)
+    return {}
+
+
+def load_templates(path=TEMPLATE_FILE):
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            return [ShiftTemplate.from_dict(t) for t in json.load(f)]
+    return []
+
+
+def save_templates(templates, path=TEMPLATE_FILE):
+    # Replaced in one step like events.json; a backup may be reading it.
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump([t.to_dict() for t in templates], f, indent=2)
+    os.replace(tmp, path)
+
+
+def list_profiles(root=PROFILE_DIR):
+    # One directory per employee under root, each a complete event store.
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name))
+    )
+
+
+def profile_path(name, filename, root=PROFILE_DIR):
+    if not name or name.startswith(".") or os.sep in name or "/" in name:
+        raise ValueError(f"invalid profile name {name!r}")
+    return os.path.join(root, name, filename)
+
+
+def create_profile(name, root=PROFILE_DIR):
+    path = profile_path(name, EVENT_FILE, root)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if not os.path.exists(path):
+        save_events({}, path)
+    return path
+
+
+def profile_settings(settings, name, root=PROFILE_DIR):
+    # A profile's own settings.json overrides single pay keys (its base
+    # rate, say) and the timezone on top of the shared settings.
+    own = load_settings(profile_path(name, SETTINGS_FILE, root))
+    if not own:
+        return settings
+    merged = dict(settings)
+    merged["pay"] = {**settings.get("pay", {}), **own.get("pay", {})}
+    if "timezone" in own:
+        merged["timezone"] = own["timezone"]
+    return merged
@@ -0,0 +1,128 @@
+"""Copy-on-write event store with immutable, structurally shared snapshots.
+
+Entries are grouped by month. A write copies only the month it touches
+plus the small month index, then publishes the new snapshot with a single
+reference assignment. A reader holding a snapshot (a worker summing hours,
+a background save) keeps a consistent view without locks, and untouched
+months are shared between versions rather than copied.
+"""
+
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+
+_EMPTY = MappingProxyType({})
+
+
+class EventSnapshot(Mapping):
+    # Read-only {date_str: segments} view. Segment lists are shared with
+    # later versions and must not be modified in place.
+
+    __slots__ = ("_months", "_len", "version")
+
+    def __init__(self, months, version):
+        self._months = months
+        self._len = sum(len(m) for m in months.values())
+        self.version = version
+
+    def __getitem__(self, date_str):
+        return self._months.get(date_str[:7], _EMPTY)[date_str]
+
+    def __contains__(self, date_str):
+        return isinstance(date_str, str) and date_str in self._months.get(
+            date_str[:7], _EMPTY
+        )
+
+    def __iter__(self):
+        for month in self._months.values():
+            yield from month
+
+    def __len__(self):
+        return self._len
+
+    def items(self):
+        # Walks the month dicts directly instead of a lookup per key.
+        for month in self._months.values():
+            yield from month.items()
+
+    def month(self, year, month):
+        return MappingProxyType(self._months.get(f"{year:04d}-{month:02d}", {}))
+
+    def by_month(self):
+        # ("YYYY-MM", month) pairs; a month unchanged between two versions is
+        # the same object in both.
+        return self._months.items()
+
+    def changes(self, older):
+        # (date_str, old segments, new segments) for every date that differs
+        # from an older snapshot of the same store; None stands for absent.
+        # Months shared between the versions are skipped unread.
+        for key in self._months.keys() | older._months.keys():
+            new = self._months.get(key, _EMPTY)
+            old = older._months.get(key, _EMPTY)
+            if new is old:
+                continue
+            for date_str in new.keys() | old.keys():
+                before, after = old.get(date_str), new.get(date_str)
+                if before is not after:
+                    yield date_str, before, after
+
+    def to_dict(self):
+        return dict(self.items())
+
+
+class EventStore:
+    def __init__(self, events=None, archive=None):
+        # With a MemoArchive, long memos written through the store are moved
+        # to it and snapshots carry only their previews.
+        self.archive = archive
+        months = {}
+        for date_str, segments in (events or {}).items():
+            months.setdefault(date_str[:7], {})[date_str] = segments
+        self._snapshot = EventSnapshot(months, 0)
+        # Serialises writers only; readers never take it.
+        self._write_lock = threading.Lock()
+
+    def snapshot(self):
+        return self._snapshot
+
+    def put(self, date_str, segments):
+        return self.update({date_str: segments})
+
+    def full(self, segments):
+        # Editable copies of stored segments with their complete memos.
+        if self.archive is None:
+            return [dict(segment) for segment in segments]
+        return self.archive.full(segments)
+
+    def discard(self, date_str):
+        return self.update({date_str: None})
+
+    def update(self, changes):
+        # changes maps date_str to new segments, or None to remove the date.
+        # Every change lands in one new version.
+        if self.archive is not None:
+            changes = {
+                date_str: None
+                if segments is None
+                else [self.archive.stash(segment) for segment in segments]
+                for date_str, segments in changes.items()
+            }
+        with self._write_lock:
+            current = self._snapshot
+            months = dict(current._months)
+            copied = set()
+            for date_str, segments in changes.items():
+                key = date_str[:7]
+                if key not in copied:
+                    months[key] = dict(months.get(key, {}))
+                    copied.add(key)
+                if segments is None:
+                    months[key].pop(date_str, None)
+                else:
+                    months[key][date_str] = segments
+            for key in copied:
+                if not months[key]:
+                    del months[key]
+            self._snapshot = EventSnapshot(months, current.version + 1)
+            return self._snapshot
@@ -0,0 +1,81 @@
+"""Team reports: per-employee pay summaries aggregated across profiles.
+
+From the command line, each profile is loaded and evaluated in a worker
+process and only its PayBreakdown travels back, so the parent never
+parses anyone's store. The app runs the serial path: a pool started
+there would re-import the app (and open a window) in every worker, or
+fork a process that holds a GL context.
+"""
+
+import os
+from datetime import date
+
+from .model import DATE_FORMAT, week_start
+from .pay import PayBreakdown, PayRules, ShiftTable, iter_pay_breakdown
+from .storage import (
+    EVENT_FILE,
+    PROFILE_DIR,
+    TEMPLATE_FILE,
+    list_profiles,
+    load_events,
+    load_templates,
+    profile_path,
+    profile_settings,
+)
+
+# Below this many profiles the pool costs more to start than it saves.
+MIN_PARALLEL = 16
+
+
+def profile_breakdown(name, root, settings, start_day, end_day):
+    rules = PayRules.from_settings(profile_settings(settings, name, root))
+    events = load_events(profile_path(name, EVENT_FILE, root))
+    templates = load_templates(profile_path(name, TEMPLATE_FILE, root))
+    # ISO keys sort by date, so the range is cut before any parsing; the
+    # first week is kept whole for weekly overtime.
+    lo = date.fromordinal(week_start(start_day)).strftime(DATE_FORMAT)
+    hi = date.fromordinal(end_day).strftime(DATE_FORMAT)
+    events = {k: v for k, v in events.items() if lo <= k <= hi}
+    table = ShiftTable(events, rules).with_templates(
+        templates, rules, week_start(start_day), end_day
+    )
+    for _, _, result in iter_pay_breakdown(table, rules, start_day, end_day):
+        pass
+    return name, result
+
+
+def _breakdown_star(job):
+    return profile_breakdown(*job)
+
+
+def _parallel(jobs, workers):
+    # The rows from a process pool, or None when there is no working
+    # multiprocessing (Android has no sem_open) or a worker died.
+    try:
+        # Here rather than at the top: importing it costs more than a
+        # small serial run.
+        from concurrent.futures.process import BrokenProcessPool, ProcessPoolExecutor
+    except ImportError:
+        return None
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunk = max(1, len(jobs) // (workers * 4))
+            return list(pool.map(_breakdown_star, jobs, chunksize=chunk))
+    except (BrokenProcessPool, NotImplementedError, OSError):
+        return None
+
+
+def team_summary(start_day, end_day, settings, root=PROFILE_DIR, workers=None):
+    # Returns ([(name, PayBreakdown), ...], total PayBreakdown) for every
+    # profile under root. workers=0 forces a serial run.
+    names = list_profiles(root)
+    jobs = [(name, root, settings, start_day, end_day) for name in names]
+    rows = None
+    if workers != 0 and len(jobs) >= MIN_PARALLEL:
+        rows = _parallel(jobs, workers or os.cpu_count() or 1)
+    if rows is None:
+        rows = [profile_breakdown(*job) for job in jobs]
+    total = PayBreakdown(PayRules.from_settings(settings).currency)
+    for _, result in rows:
+        total.add(result)
+    return rows, total
@@ -0,0 +1,195 @@
+"""Recurring shift templates.
+
+A template stores one weekly rule (weekdays, times, memo, start and
+optional end date). Occurrences are generated on demand for the dates a
+caller asks about, so storage grows with the number of templates rather
+than the number of days they cover. An explicit entry in the event store
+for a date overrides every template on that date.
+"""
+
+import uuid
+from datetime import date
+
+from .model import DATE_FORMAT, parse_date_ordinal, segments_of
+
+WEEKDAY_NAMES = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+
+def weekday_of(day):
+    # Ordinal 1 (0001-01-01) is a Monday.
+    return (day - 1) % 7
+
+
+def parse_weekdays(text):
+    # "mon-fri", "sat,sun" or "0,2,4" -> sorted weekday numbers.
+    days = set()
+    for part in text.lower().replace(" ", "").split(","):
+        if not part:
+            continue
+        bounds = part.split("-")
+        if len(bounds) > 2:
+            raise ValueError(f"invalid weekday range {part!r}")
+        first, last = (_weekday_index(b) for b in (bounds[0], bounds[-1]))
+        day = first
+        while True:
+            days.add(day)
+            if day == last:
+                break
+            day = (day + 1) % 7
+    if not days:
+        raise ValueError("no weekdays given")
+    return sorted(days)
+
+
+def _weekday_index(name):
+    if name.isdigit() and int(name) < 7:
+        return int(name)
+    for index, day_name in enumerate(WEEKDAY_NAMES):
+        if name.startswith(day_name):
+            return index
+    raise ValueError(f"unknown weekday {name!r}")
+
+
+class ShiftTemplate:
+    def __init__(
+        self, weekdays, time_in, time_out, memo="", start="", end="", skip=(), id=None
+    ):
+        self.id = id or uuid.uuid4().hex[:8]
+        self.weekdays = frozenset(int(d) for d in weekdays)
+        self.time_in = time_in
+        self.time_out = time_out
+        self.memo = memo
+        self.start = start
+        self.end = end
+        self.skip = set()
+        self._skip_days = set()
+        for date_str in skip:
+            self.add_skip(date_str)
+        self._start_day = parse_date_ordinal(start) if start else 1
+        if self._start_day is None:
+            raise ValueError(f"invalid start date {start!r}")
+        self._end_day = parse_date_ordinal(end) if end else date.max.toordinal()
+        if self._end_day is None:
+            raise ValueError(f"invalid end date {end!r}")
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "weekdays": sorted(self.weekdays),
+            "time_in": self.time_in,
+            "time_out": self.time_out,
+            "memo": self.memo,
+            "start": self.start,
+            "end": self.end,
+            "skip": sorted(self.skip),
+        }
+
+    @property
+    def first_day(self):
+        return self._start_day
+
+    def set_end(self, date_str):
+        day = parse_date_ordinal(date_str)
+        if day is None:
+            raise ValueError(f"invalid end date {date_str!r}")
+        self.end = date_str
+        self._end_day = day
+
+    def add_skip(self, date_str):
+        day = parse_date_ordinal(date_str)
+        if day is None:
+            raise ValueError(f"invalid skip date {date_str!r}")
+        self.skip.add(date_str)
+        self._skip_days.add(day)
+
+    def segment(self):
+        return {"time_in": self.time_in, "time_out": self.time_out, "memo": self.memo}
+
+    def occurs_on(self, day):
+        return (
+            self._start_day <= day <= self._end_day
+            and weekday_of(day) in self.weekdays
+            and day not in self._skip_days
+        )
+
+    def describe(self):
+        days = ",".join(WEEKDAY_NAMES[d] for d in sorted(self.weekdays))
+        until = f" until {self.end}" if self.end else ""
+        return f"{days} {self.time_in}-{self.time_out} from {self.start}{until}"
+
+
+def iter_occurrences(templates, start_day, end_day):
+    # Lazily yields (day_ordinal, segment) in day order for [start_day, end_day].
+    if not templates:
+        return
+    first = max(start_day, min(t._start_day for t in templates))
+    last = min(end_day, max(t._end_day for t in templates))
+    for day in range(first, last + 1):
+        for template in templates:
+            if template.occurs_on(day):
+                yield day, template.segment()
+
+
+def templates_on(templates, day):
+    return [t for t in templates if t.occurs_on(day)]
+
+
+def release_weekdays(templates, date_str, weekdays):
+    # Makes room for a new recurring shift on weekdays from date_str on.
+    # Templates running then stop there; the weekdays of theirs that the
+    # new shift does not cover carry on in a copy starting on date_str.
+    day = parse_date_ordinal(date_str)
+    if day is None:
+        raise ValueError(f"invalid date {date_str!r}")
+    weekdays = frozenset(weekdays)
+    for template in list(templates):
+        if not template.first_day <= day <= template._end_day:
+            continue
+        if not template.weekdays & weekdays:
+            continue
+        rest = template.weekdays - weekdays
+        if rest:
+            templates.append(
+                ShiftTemplate(
+                    rest,
+                    template.time_in,
+                    template.time_out,
+                    memo=template.memo,
+                    start=date_str,
+                    end=template.end,
+                    skip=[d for d in template.skip if d >= date_str],
+                )
+            )
+        if template.first_day == day:
+            templates.remove(template)
+        else:
+            template.set_end(date.fromordinal(day - 1).strftime(DATE_FORMAT))
+
+
+def resolve_day(events, templates, date_str):
+    # Segments for one date: the explicit entry if any, else the templates.
+    if date_str in events:
+        return segments_of(events[date_str])
+    day = parse_date_ordinal(date_str)
+    if day is None:
+        return []
+    return [t.segment() for t in templates_on(templates, day)]
+
+
+def expand_range(events, templates, start_day, end_day):
+    # {date_str: segments} for the range, explicit entries winning over
+    # template occurrences. Cost is proportional to the range, not history.
+    view = {}
+    for day in range(start_day, end_day + 1):
+        date_str = date.fromordinal(day).strftime(DATE_FORMAT)
+        if date_str in events:
+            view[date_str] = segments_of(events[date_str])
+    for day, segment in iter_occurrences(templates, start_day, end_day):
+        date_str = date.fromordinal(day).strftime(DATE_FORMAT)
+        if date_str not in events:
+            view.setdefault(date_str, []).append(segment)
+    return view
@@ -0,0 +1,99 @@
+"""UTC offset transitions of a time zone, precomputed per year.
+
+Shift times are stored as local wall-clock times. A shift that spans a
+daylight-saving change works an hour more or less than its wall-clock
+length, so tables look up the handful of transitions in their date range
+once and correct only the shifts that straddle one.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+except ImportError:  # Python < 3.9
+    ZoneInfo = None
+
+_DAY_ONE = datetime(1, 1, 1, tzinfo=timezone.utc)
+_cache = {}
+
+
+def zone_transitions(name):
+    # One shared instance per zone name, so the per-year tables are built
+    # once per process.
+    if not name:
+        return None
+    zone = _cache.get(name)
+    if zone is None:
+        zone = _cache[name] = ZoneTransitions(name)
+    return zone
+
+
+class ZoneTransitions:
+    def __init__(self, name):
+        if ZoneInfo is None:
+            raise ValueError("time zones need Python 3.9 or later")
+        try:
+            self.zone = ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError(f"unknown timezone {name!r}")
+        self.name = name
+        self._years = {}
+
+    def year(self, year):
+        # [(day ordinal, local minute, delta minutes), ...] for changes whose
+        # local wall time (before the change) falls in year.
+        table = self._years.get(year)
+        if table is None:
+            table = self._years[year] = self._scan(year)
+        return table
+
+    def between(self, start_day, end_day):
+        first = date.fromordinal(max(start_day, 1)).year
+        last = date.fromordinal(min(end_day, date.max.toordinal())).year
+        return [
+            t
+            for year in range(first, last + 1)
+            for t in self.year(year)
+            if start_day <= t[0] <= end_day
+        ]
+
+    def elapsed(self, day, start, end):
+        # Elapsed minutes of one shift given in wall-clock minutes from the
+        # midnight of day; end may run past 1440.
+        minutes = end - start
+        for t_day, minute, delta in self.between(day, day + 1):
+            at = (t_day - day) * 1440 + minute
+            if start <= at < end:
+                minutes -= delta
+        return minutes
+
+    def _offset(self, minute):
+        # UTC offset in minutes at a UTC instant given in minutes from the
+        # midnight that starts day ordinal 0.
+        instant = _DAY_ONE + timedelta(minutes=minute - 1440)
+        return int(instant.astimezone(self.zone).utcoffset().total_seconds()) // 60
+
+    def _scan(self, year):
+        # Offsets are sampled at every UTC midnight of the year (plus a day
+        # either side); a change between two samples is then bisected down
+        # to the minute.
+        table = []
+        first = date(year, 1, 1).toordinal() - 1
+        last = date(year, 12, 31).toordinal() + 1
+        prev = self._offset(first * 1440)
+        for day in range(first + 1, last + 1):
+            offset = self._offset(day * 1440)
+            if offset == prev:
+                continue
+            lo, hi = (day - 1) * 1440, day * 1440
+            while hi - lo > 1:
+                mid = (lo + hi) // 2
+                if self._offset(mid) == prev:
+                    lo = mid
+                else:
+                    hi = mid
+            local_day, local_minute = divmod(hi + prev, 1440)
+            if date.fromordinal(local_day).year == year:
+                table.append((local_day, local_minute, offset - prev))
+            prev = offset
+        return table
@@ -4,9 +4,14 @@ Window.minimum_width = 720
 Window.minimum_height = 960
 Window.size = (720, 960)
 
-import json
 import os
-from datetime import datetime, date, timedelta
+import struct
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from datetime import datetime, date
 from calendar import monthrange
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
@@ -14,25 +19,140 @@ from kivy.uix.button import Button
 from kivy.uix.label import Label
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.textinput import TextInput
+from kivy.uix.togglebutton import ToggleButton
 from kivy.uix.gridlayout import GridLayout
 from kivy.uix.widget import Widget
 from kivy.metrics import dp, sp
 from kivy.clock import Clock
 from kivy.uix.dropdown import DropDown
-from kivy.uix.spinner import Spinner
 from kivy.uix.modalview import ModalView
 from kivy.uix.behaviors import ButtonBehavior
 from kivy.uix.image import Image
 from kivy.uix.floatlayout import FloatLayout
-from kivy.graphics import Color, RoundedRectangle, Rectangle
+from kivy.graphics import (
+    ClearBuffers,
+    ClearColor,
+    Color,
+    Fbo,
+    Rectangle,
+    RoundedRectangle,
+)
+from kivy.graphics.texture import Texture
+from kivy.core.image import Image as CoreImage
+from kivy.lang import Builder
+from kivy.logger import Logger
+from kivy.utils import escape_markup
+
+from lenggy import (
+    BACKUP_DIR,
+    DATE_FORMAT,
+    EVENT_FILE,
+    MEMO_FILE,
+    CACHE_FILE,
+    EditHistory,
+    EventStore,
+    MemoArchive,
+    MemoIndex,
+    TEMPLATE_FILE,
+    PayRules,
+    Occupancy,
+    RESUME_FILE,
+    ShiftCache,
+    ShiftIndex,
+    ShiftQuery,
+    ShiftTemplate,
+    TOP_K,
+    expand_range,
+    file_stamp,
+    format_time,
+    history_depth,
+    iter_pay_breakdown,
+    list_profiles,
+    load_events,
+    load_resume,
+    load_settings,
+    load_templates,
+    parse_date_ordinal,
+    parse_date_range,
+    parse_minutes,
+    parse_weekdays,
+    profile_path,
+    profile_settings,
+    release_weekdays,
+    resolve_day,
+    save_events,
+    save_resume,
+    save_templates,
+    segments_of,
+    shift_minutes,
+    templates_on,
+    week_start,
+    work_time_string,
+)
+from lenggy.backup import BackupStore, retention
+
+
+_shared_dropdowns = {}
+
+
+def shared_dropdown(values):
+    # One option list per distinct value set, reattached to whichever
+    # spinner opens it.
+    dropdown = _shared_dropdowns.get(values)
+    if dropdown is None:
+        dropdown = DropDown()
+        dropdown.owner = None
+        for value in values:
+            option = Button(
+                text=value,
+                size_hint_y=None,
+                height=dp(40),
+                font_size=sp(14),
+                background_normal="",
+                background_down="",
+                background_color=PRIMARY_COLOR,
+                color=[1, 1, 1, 1],
+            )
+            option.bind(on_release=lambda btn: dropdown.select(btn.text))
+            dropdown.add_widget(option)
+        dropdown.bind(
+            on_select=lambda inst, value: setattr(inst.owner, "text", value),
+            on_dismiss=lambda inst: setattr(inst, "owner", None),
+        )
+        _shared_dropdowns[values] = dropdown
+    return dropdown
 
 
-class StyledSpinner(Spinner):
-    def __init__(self, **kwargs):
+class LazySpinner(Button):
+    def __init__(self, values=(), **kwargs):
         super().__init__(**kwargs)
+        self.values = tuple(values)
         self.background_normal = ""
         self.background_down = ""
 
+    def on_release(self):
+        dropdown = shared_dropdown(self.values)
+        if dropdown.attach_to is None:
+            self._open(dropdown)
+        elif dropdown.attach_to is self:
+            dropdown.dismiss()
+        else:
+            # dismiss() detaches on a later frame, which would also undo an
+            # open() made before then, so this spinner opens the frame after.
+            dropdown.bind(on_dismiss=self._reopen)
+            dropdown.dismiss()
+
+    def _reopen(self, dropdown):
+        dropdown.unbind(on_dismiss=self._reopen)
+        Clock.schedule_once(lambda dt: self._open(dropdown))
+
+    def _open(self, dropdown):
+        # Another spinner may have taken the list in the meantime.
+        if self.get_parent_window() is None or dropdown.attach_to is not None:
+            return
+        dropdown.owner = self
+        dropdown.open(self)
+
 
 PRIMARY_COLOR = [0.36, 0.19, 0.55, 1]
 SECONDARY_COLOR = [0.56, 0.27, 0.68, 1]
@@ -42,7 +162,8 @@ EVENT_COLOR = [0.75, 0.796, 1, 1]
 CARD_COLOR = [1, 1, 1, 1]
 HEADER_TEXT_COLOR = [0.23, 0.16, 0.32, 1]
 CAL_CELL_COLOR = [0.96, 0.93, 0.99, 1]
-EVENT_FILE = "events.json"
+BACKGROUND_SOURCE = "assets/purple.jpg"
+ICON_SOURCES = ("assets/notes.png", "assets/time.png", "assets/delete.png")
 
 BASE_FONT_SIZE = sp(22)
 SMALL_FONT_SIZE = sp(16)
@@ -53,26 +174,167 @@ MODAL_TITLE_SIZE = sp(26)
 LABEL_FONT_SIZE = sp(20)
 MEMO_FONT_SIZE = sp(18)
 
-
-def format_time(time_str):
-    try:
-        t = datetime.strptime(time_str, "%H:%M")
-        return t.strftime("%I:%M %p").lstrip("0")
-    except Exception:
-        return ""
-
-
-def work_time_string(segment):
-    tin = format_time(segment.get("time_in", ""))
-    tout = format_time(segment.get("time_out", ""))
-    if tin and tout:
-        return f"{tin} - {tout}"
-    elif tin:
-        return f"{tin}"
-    elif tout:
-        return f"{tout}"
-    else:
-        return ""
+HOUR_VALUES = tuple(f"{i:02d}" for i in range(24))
+MINUTE_VALUES = tuple(f"{i:02d}" for i in range(0, 60, 15))
+DAY_VALUES = tuple(f"{i:02d}" for i in range(1, 32))
+MONTH_VALUES = tuple(f"{i:02d}" for i in range(1, 13))
+YEAR_VALUES = tuple(str(i) for i in range(2020, 2030))
+
+# Seconds of widget construction allowed per frame for progressive views.
+FRAME_BUDGET = 0.008
+# Older saved UI state is ignored and the app starts from scratch.
+RESUME_MAX_AGE = 7 * 24 * 3600
+
+
+def _size_bucket(size):
+    # Variants are kept per power-of-two bucket of the drawn size.
+    side = max(int(size[0]), int(size[1]), 256)
+    return 1 << (side - 1).bit_length()
+
+
+class TextureCache:
+    ICON_CELL = 128
+
+    def __init__(self):
+        self._bases = {}
+        self._variants = {}
+        self._atlas = None
+        self._icons = {}
+
+    def _render(self, texture, size):
+        fbo = Fbo(size=size)
+        with fbo:
+            ClearColor(0, 0, 0, 0)
+            ClearBuffers()
+            Rectangle(texture=texture, pos=(0, 0), size=size)
+        fbo.draw()
+        return fbo.pixels
+
+    def _upload(self, pixels, size, rebuild=None):
+        tex = Texture.create(size=size, colorfmt="rgba")
+        tex.blit_buffer(pixels, colorfmt="rgba", bufferfmt="ubyte")
+        if rebuild is not None:
+            # GL context loss drops texture memory. rebuild() renders the
+            # pixels again from the source images, so none are kept in RAM.
+            tex.add_reload_observer(
+                lambda t: t.blit_buffer(rebuild(), colorfmt="rgba", bufferfmt="ubyte")
+            )
+        return tex
+
+    def _scaled(self, texture, size):
+        # Pixels of texture at size. Halves repeatedly so every step averages
+        # 2x2 texels, like a mip chain; the steps are dropped once drawn.
+        size = (max(1, int(size[0])), max(1, int(size[1])))
+        w, h = texture.size
+        while w > 2 * size[0] and h > 2 * size[1]:
+            w, h = w // 2, h // 2
+            texture = self._upload(self._render(texture, (w, h)), (w, h))
+        return self._render(texture, size), size
+
+    def _from_source(self, source, *sizes):
+        # Pixels scaled from the decoded source through sizes in turn, the
+        # steps that built the texture; nothing but the result is kept.
+        texture = CoreImage(source, nocache=True).texture
+        for size in sizes[:-1]:
+            texture = self._upload(*self._scaled(texture, size))
+        return self._scaled(texture, sizes[-1])[0]
+
+    def _fit(self, texture_size, bucket):
+        w, h = texture_size
+        scale = min(1.0, float(bucket) / max(w, h))
+        return (int(w * scale), int(h * scale))
+
+    def _base(self, source):
+        base = self._bases.get(source)
+        if base is None:
+            # The full-resolution decode is only held long enough to build a
+            # base no larger than the window needs.
+            full = CoreImage(source, nocache=True).texture
+            bucket = _size_bucket(Window.size)
+            pixels, size = self._scaled(full, self._fit(full.size, bucket))
+            rebuild = partial(self._from_source, source, size)
+            base = self._upload(pixels, size, rebuild)
+            self._bases[source] = base
+        return base
+
+    def background(self, source, size):
+        bucket = _size_bucket(size)
+        key = (source, bucket)
+        tex = self._variants.get(key)
+        if tex is None:
+            base = self._base(source)
+            if bucket >= max(base.size):
+                tex = base
+            else:
+                pixels, size = self._scaled(base, self._fit(base.size, bucket))
+                rebuild = partial(self._from_source, source, base.size, size)
+                tex = self._upload(pixels, size, rebuild)
+            self._variants[key] = tex
+        return tex
+
+    def _atlas_pixels(self):
+        cell = self.ICON_CELL
+        fbo = Fbo(size=(cell * len(ICON_SOURCES), cell))
+        with fbo:
+            ClearColor(0, 0, 0, 0)
+            ClearBuffers()
+            for i, source in enumerate(ICON_SOURCES):
+                icon = CoreImage(source, nocache=True).texture
+                scale = float(cell) / max(icon.size)
+                w, h = int(icon.width * scale), int(icon.height * scale)
+                if scale < 1:
+                    icon = self._upload(*self._scaled(icon, (w, h)))
+                Rectangle(
+                    texture=icon,
+                    pos=(i * cell + (cell - w) // 2, (cell - h) // 2),
+                    size=(w, h),
+                )
+        fbo.draw()
+        return fbo.pixels, fbo.size
+
+    def _build_atlas(self):
+        cell = self.ICON_CELL
+        pixels, size = self._atlas_pixels()
+        self._atlas = self._upload(pixels, size, lambda: self._atlas_pixels()[0])
+        for i, source in enumerate(ICON_SOURCES):
+            self._icons[source] = self._atlas.get_region(i * cell, 0, cell, cell)
+
+    def icon(self, source):
+        if self._atlas is None:
+            self._build_atlas()
+        return self._icons[source]
+
+
+TEXTURES = TextureCache()
+
+
+class ProgressiveBuild:
+    # Runs a sequence of small build steps spread over frames, yielding back
+    # to Clock once the per-frame budget is spent so input keeps flowing.
+    def __init__(self, steps, budget=FRAME_BUDGET):
+        self._steps = iter(steps)
+        self.budget = budget
+        self.done = False
+        self._event = Clock.schedule_once(self._run, 0)
+
+    def _run(self, dt):
+        deadline = time.perf_counter() + self.budget
+        for step in self._steps:
+            step()
+            if time.perf_counter() >= deadline:
+                self._event = Clock.schedule_once(self._run, 0)
+                return
+        self.done = True
+
+    def finish(self):
+        self._event.cancel()
+        for step in self._steps:
+            step()
+        self.done = True
+
+    def cancel(self):
+        self._event.cancel()
+        self._steps = iter(())
 
 
 class RoundedIconButton(ButtonBehavior, BoxLayout):
@@ -84,7 +346,7 @@ class RoundedIconButton(ButtonBehavior, BoxLayout):
         self.bg_color = bg_color
         self.radius = radius
         self.icon = Image(
-            source=icon_path,
+            texture=TEXTURES.icon(icon_path),
             size_hint=(1, 1),
             allow_stretch=True,
             keep_ratio=True,
@@ -122,7 +384,9 @@ class AnimatedButton(Button):
 
 
 class CalendarDayCell(BoxLayout):
-    def __init__(self, day, date_str, is_today, has_event, events, on_press, **kwargs):
+    def __init__(
+        self, day, date_str, is_today, has_event, events, on_press, lazy=False, **kwargs
+    ):
         super().__init__(
             orientation="vertical",
             spacing=dp(2),
@@ -135,7 +399,22 @@ class CalendarDayCell(BoxLayout):
         self.date_str = date_str
         self.bind(on_touch_down=self._on_touch_down)
         self._draw_bg(is_today, has_event)
-        self._add_content(day, date_str, is_today, has_event, events)
+        # A lazy cell is only its coloured background until fill() runs; it
+        # already takes touches.
+        self._pending = (day, date_str, is_today, has_event, events)
+        if not lazy:
+            self.fill()
+
+    def fill(self):
+        if self._pending is None:
+            return
+        self._add_content(*self._pending)
+        self._pending = None
+        # Rasterise the labels here so their cost is counted against the
+        # build step instead of landing in the next draw.
+        for child in self.children:
+            if isinstance(child, Label):
+                child.texture_update()
 
     def _on_touch_down(self, instance, touch):
         if self.collide_point(*touch.pos):
@@ -232,12 +511,26 @@ class CalendarDayCell(BoxLayout):
 
 
 class CalendarWidget(BoxLayout):
-    def __init__(self, events, on_day_press, **kwargs):
+    def __init__(
+        self,
+        events,
+        on_day_press,
+        on_month_press=None,
+        templates=(),
+        progressive=True,
+        year=None,
+        month=None,
+        **kwargs,
+    ):
         super().__init__(orientation="vertical", spacing=dp(5), **kwargs)
         self.events = events
+        self.templates = templates
         self.on_day_press = on_day_press
-        self.current_year = datetime.today().year
-        self.current_month = datetime.today().month
+        self.on_month_press = on_month_press
+        self.progressive = progressive
+        self._build = None
+        self.current_year = year or datetime.today().year
+        self.current_month = month or datetime.today().month
         self._build_ui()
 
     def _build_ui(self):
@@ -283,7 +576,9 @@ class CalendarWidget(BoxLayout):
             halign="center",
             valign="middle",
         )
-        self.month_lbl.bind(size=self._update_month_label)
+        self.month_lbl.bind(
+            size=self._update_month_label, on_touch_down=self._on_month_touch
+        )
         nav_layout.add_widget(prev_btn)
         nav_layout.add_widget(self.month_lbl)
         nav_layout.add_widget(next_btn)
@@ -308,12 +603,20 @@ class CalendarWidget(BoxLayout):
         self.scroll.add_widget(self.grid_container)
         self.add_widget(self.scroll)
 
+    def _on_month_touch(self, instance, touch):
+        if self.on_month_press and instance.collide_point(*touch.pos):
+            self.on_month_press(self.current_year)
+            return True
+
     def _update_month_label(self, instance, value):
         self.month_lbl.text_size = (self.month_lbl.width, None)
         self.month_lbl.halign = "center"
         self.month_lbl.valign = "middle"
 
     def update_calendar(self, year, month):
+        if self._build is not None:
+            self._build.cancel()
+            self._build = None
         self.month_lbl.text = f"[b]{date(year, month, 1).strftime('%B %Y')}[/b]"
         self.grid_container.clear_widgets()
         first_weekday, num_days = monthrange(year, month)
@@ -324,26 +627,56 @@ class CalendarWidget(BoxLayout):
 
         blanks = first_weekday
         today_str = date.today().strftime("%Y-%m-%d")
+        # Only this month's recurring occurrences are expanded.
+        month_events = expand_range(
+            self.events,
+            self.templates,
+            date(year, month, 1).toordinal(),
+            date(year, month, num_days).toordinal(),
+        )
         for _ in range(blanks):
             grid.add_widget(Widget(size_hint_y=None, height=dp(94)))
+        cells = []
         for day in range(1, num_days + 1):
             this_date = date(year, month, day)
             date_str = this_date.strftime("%Y-%m-%d")
-            has_event = date_str in self.events
+            has_event = date_str in month_events
             cell = CalendarDayCell(
                 day,
                 date_str,
                 date_str == today_str,
                 has_event,
-                self.events,
+                month_events,
                 self.on_day_press,
+                lazy=self.progressive,
             )
             grid.add_widget(cell)
+            cells.append(cell)
         total_cells = blanks + num_days
         for _ in range((7 - total_cells % 7) % 7):
             grid.add_widget(Widget(size_hint_y=None, height=dp(94)))
         self.grid_container.add_widget(grid)
         self.grid_container.height = grid.height
+        if self.progressive:
+            visible = self._visible_rows(grid.height, num_rows)
+            order = sorted(
+                range(num_days), key=lambda i: (blanks + i) // 7 not in visible
+            )
+            self._build = ProgressiveBuild([cells[i].fill for i in order])
+
+    def _visible_rows(self, content_height, num_rows):
+        # Rows inside the scroll viewport are filled before the rest.
+        view = self.scroll.height
+        if content_height <= view or num_rows == 0:
+            return range(num_rows)
+        row = content_height / num_rows
+        top = (1 - self.scroll.scroll_y) * (content_height - view)
+        return range(int(top // row), int((top + view) // row) + 1)
+
+    def finish_build(self):
+        if self._build is not None:
+            self._build.finish()
+            self._build = None
 
     def _goto_prev_month(self, inst):
         if self.current_month == 1:
@@ -362,6 +695,353 @@ class CalendarWidget(BoxLayout):
         self.update_calendar(self.current_year, self.current_month)
 
 
+class YearHeatmap(Widget):
+    # Whole year drawn from one small texture: one texel block per day,
+    # weeks as columns and Monday on top.
+    CELL = 4
+    GAP = 1
+    FULL_DAY_MINUTES = 10 * 60
+
+    def __init__(self, on_day_press, **kwargs):
+        super().__init__(**kwargs)
+        self.on_day_press = on_day_press
+        self.year = None
+        self.first_day = 0
+        self.cols = 53
+        with self.canvas:
+            Color(1, 1, 1, 1)
+            self.rect = Rectangle(pos=self.pos, size=self.size)
+        self.bind(pos=self._update_rect, size=self._update_rect)
+
+    def set_year(self, year, minutes):
+        self.year = year
+        jan1 = date(year, 1, 1)
+        self.first_day = jan1.toordinal() - jan1.weekday()
+        num_days = len(minutes)
+        self.cols = (jan1.weekday() + num_days + 6) // 7
+        step = self.CELL + self.GAP
+        width, height = self.cols * step, 7 * step
+        pixels = bytearray(width * height * 4)
+        empty = [int(c * 255) for c in CAL_CELL_COLOR]
+        low = [int(c * 255) for c in EVENT_COLOR]
+        high = [int(c * 255) for c in PRIMARY_COLOR]
+        for index in range(num_days):
+            slot = jan1.weekday() + index
+            col, row = slot // 7, 6 - slot % 7
+            if minutes[index] > 0:
+                t = min(1.0, minutes[index] / float(self.FULL_DAY_MINUTES))
+                rgba = bytes(int(a + (b - a) * t) for a, b in zip(low, high))
+            else:
+                rgba = bytes(empty)
+            line = rgba * self.CELL
+            for y in range(row * step, row * step + self.CELL):
+                offset = (y * width + col * step) * 4
+                pixels[offset : offset + len(line)] = line
+        texture = Texture.create(size=(width, height), colorfmt="rgba")
+        texture.mag_filter = "nearest"
+        texture.min_filter = "nearest"
+        texture.blit_buffer(bytes(pixels), colorfmt="rgba", bufferfmt="ubyte")
+        self.rect.texture = texture
+        self._update_rect()
+
+    def _update_rect(self, *args):
+        # Keep cells square: fit the grid's aspect ratio inside the widget.
+        aspect = self.cols / 7.0
+        width = min(self.width, self.height * aspect)
+        height = width / aspect
+        self.rect.size = (width, height)
+        self.rect.pos = (
+            self.x + (self.width - width) / 2,
+            self.y + (self.height - height) / 2,
+        )
+
+    def on_touch_down(self, touch):
+        rx, ry = self.rect.pos
+        rw, rh = self.rect.size
+        if self.year is None or not (rx <= touch.x < rx + rw and ry <= touch.y < ry + rh):
+            return super().on_touch_down(touch)
+        col = int((touch.x - rx) / rw * self.cols)
+        row = int((ry + rh - touch.y) / rh * 7)
+        day = date.fromordinal(self.first_day + col * 7 + row)
+        if day.year == self.year:
+            self.on_day_press(day.strftime("%Y-%m-%d"))
+        return True
+
+
+class OccupancyChart(Widget):
+    # Worked minutes per time-of-day bucket as vertical bars, midnight on
+    # the left; a touched bar is highlighted and reported.
+    GAP = 0.15
+
+    def __init__(self, on_bucket_press, **kwargs):
+        super().__init__(**kwargs)
+        self.on_bucket_press = on_bucket_press
+        self.values = []
+        self.selected = None
+        self.bind(pos=self._redraw, size=self._redraw)
+
+    def set_values(self, values, selected=None):
+        self.values = list(values)
+        self.selected = selected
+        self._redraw()
+
+    def _redraw(self, *args):
+        self.canvas.clear()
+        if not self.values:
+            return
+        peak = max(self.values) or 1
+        slot = self.width / len(self.values)
+        with self.canvas:
+            Color(*CAL_CELL_COLOR)
+            Rectangle(pos=self.pos, size=self.size)
+            for index, value in enumerate(self.values):
+                if not value:
+                    continue
+                Color(*(PRIMARY_COLOR if index == self.selected else EVENT_COLOR))
+                Rectangle(
+                    pos=(self.x + (index + self.GAP / 2) * slot, self.y),
+                    size=(slot * (1 - self.GAP), self.height * value / peak),
+                )
+
+    def on_touch_down(self, touch):
+        if not self.values or not self.collide_point(*touch.pos):
+            return super().on_touch_down(touch)
+        count = len(self.values)
+        index = min(int((touch.x - self.x) / self.width * count), count - 1)
+        self.selected = index
+        self._redraw()
+        self.on_bucket_press(index)
+        return True
+
+
+# Printable month sheets are rendered at A4, 150 dpi, in pixels rather than
+# dp/sp so they look the same from every device.
+SHEET_SIZE = (1240, 1754)
+SHEET_DIR = "sheets"
+
+
+def _sheet_label(parent, font_size, color, halign="center", bold=False):
+    label = Label(
+        font_size=font_size,
+        color=color,
+        halign=halign,
+        valign="middle",
+        bold=bold,
+        shorten=True,
+        shorten_from="right",
+    )
+    parent.add_widget(label)
+    return label
+
+
+def _place(label, x, y, width, height):
+    label.pos = (x, y)
+    label.size = (width, height)
+    label.text_size = (width, height)
+
+
+class SheetDayCell(Widget):
+    # A calendar cell for month sheets, styled like CalendarDayCell but
+    # refilled in place for every month instead of rebuilt.
+    def __init__(self, pos, size, **kwargs):
+        super().__init__(pos=pos, size=size, **kwargs)
+        x, y = pos
+        width, height = size
+        with self.canvas.before:
+            self.bg_color = Color(0, 0, 0, 0)
+            RoundedRectangle(pos=pos, size=size, radius=[14])
+        self.day_lbl = _sheet_label(self, 28, HEADER_TEXT_COLOR, bold=True)
+        self.work_lbl = _sheet_label(self, 15, [0.22, 0.17, 0.32, 1])
+        self.memo_lbl = _sheet_label(self, 17, [0.27, 0.21, 0.36, 1])
+        _place(self.day_lbl, x, y + height - 44, width, 34)
+        _place(self.work_lbl, x + 6, y + 30, width - 12, height - 76)
+        _place(self.memo_lbl, x + 6, y + 6, width - 12, 24)
+
+    def show(self, day, segments):
+        if day is None:
+            self.bg_color.rgba = (0, 0, 0, 0)
+            self.day_lbl.text = self.work_lbl.text = self.memo_lbl.text = ""
+            return
+        self.bg_color.rgba = EVENT_COLOR if segments else CAL_CELL_COLOR
+        self.day_lbl.text = str(day)
+        self.work_lbl.text = "\n".join(
+            line for line in (work_time_string(s) for s in segments) if line
+        )
+        memo = segments[0].get("memo", "").strip() if segments else ""
+        self.memo_lbl.text = memo
+
+
+class MonthSheet(Widget):
+    # One month as a printable page: the calendar grid, then every worked
+    # day with its shifts. The widgets, labels and the framebuffer are made
+    # once; rendering another month only changes texts and colours.
+    MARGIN = 60
+    GAP = 8
+    CELL_HEIGHT = 112
+    ROW_HEIGHT = 24
+
+    def __init__(self, **kwargs):
+        super().__init__(size=SHEET_SIZE, **kwargs)
+        width, height = SHEET_SIZE
+        left = self.MARGIN
+        inner = width - 2 * self.MARGIN
+        with self.canvas.before:
+            Color(1, 1, 1, 1)
+            Rectangle(pos=(0, 0), size=SHEET_SIZE)
+        top = height - self.MARGIN
+        self.title_lbl = _sheet_label(self, 48, PRIMARY_COLOR, "left", bold=True)
+        self.total_lbl = _sheet_label(self, 28, HEADER_TEXT_COLOR, "right")
+        _place(self.title_lbl, left, top - 70, inner, 70)
+        _place(self.total_lbl, left, top - 70, inner, 70)
+        top -= 80
+
+        col_width = (inner - 6 * self.GAP) / 7.0
+        for index, name in enumerate(["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]):
+            label = _sheet_label(self, 22, HEADER_TEXT_COLOR, bold=True)
+            label.text = name
+            _place(label, left + index * (col_width + self.GAP), top - 40, col_width, 40)
+        top -= 40 + self.GAP
+
+        self.cells = []
+        for row in range(6):
+            y = top - (row + 1) * self.CELL_HEIGHT - row * self.GAP
+            for col in range(7):
+                x = left + col * (col_width + self.GAP)
+                cell = SheetDayCell((x, y), (col_width, self.CELL_HEIGHT))
+                self.add_widget(cell)
+                self.cells.append(cell)
+        top -= 6 * self.CELL_HEIGHT + 5 * self.GAP + 24
+
+        # date | shifts | hours | memo
+        columns = (
+            (0, 150, "left"),
+            (150, 470, "left"),
+            (620, 120, "right"),
+            (770, inner - 770, "left"),
+        )
+        self.rows = []
+        for index in range(31):
+            y = top - (index + 1) * self.ROW_HEIGHT
+            row = []
+            for offset, col_width, halign in columns:
+                label = _sheet_label(self, 19, HEADER_TEXT_COLOR, halign)
+                _place(label, left + offset, y, col_width, self.ROW_HEIGHT)
+                row.append(label)
+            self.rows.append(row)
+
+        self.fbo = Fbo(size=SHEET_SIZE)
+        with self.fbo:
+            ClearColor(1, 1, 1, 1)
+            ClearBuffers()
+        self.fbo.add(self.canvas)
+
+    def show(self, year, month, month_events, day_minutes, subtitle=""):
+        # day_minutes holds the month's worked minutes per day from a
+        # ShiftTable, so totals match the hours calculator.
+        first_weekday, num_days = monthrange(year, month)
+        self.title_lbl.text = date(year, month, 1).strftime("%B %Y")
+        total = 0
+        listed = 0
+        for index, cell in enumerate(self.cells):
+            day = index - first_weekday + 1
+            if not 1 <= day <= num_days:
+                cell.show(None, ())
+                continue
+            date_str = f"{year:04d}-{month:02d}-{day:02d}"
+            segments = segments_of(month_events.get(date_str))
+            cell.show(day, segments)
+            if not segments:
+                continue
+            minutes = day_minutes[day - 1]
+            total += minutes
+            memos = [s.get("memo", "").strip() for s in segments]
+            texts = (
+                date(year, month, day).strftime("%a %d"),
+                ", ".join(line for line in map(work_time_string, segments) if line),
+                f"{minutes / 60.0:.2f} h",
+                "; ".join(memo for memo in memos if memo),
+            )
+            for label, text in zip(self.rows[listed], texts):
+                label.text = text
+            listed += 1
+        for row in self.rows[listed:]:
+            for label in row:
+                label.text = ""
+        summary = f"{total / 60.0:.2f} hours"
+        self.total_lbl.text = f"{subtitle}  ·  {summary}" if subtitle else summary
+        # Labels rasterise and kv canvas rules apply on the next frame
+        # normally; the sheet is drawn before that.
+        for widget in self.walk(restrict=True):
+            if isinstance(widget, Label):
+                widget.texture_update()
+        Builder.sync()
+
+    def pixels(self):
+        self.fbo.draw()
+        return self.fbo.pixels
+
+
+def _write_png(path, pixels, size):
+    # GL rows run bottom-up. zlib releases the GIL, so this runs on a worker
+    # while the next sheet is drawn.
+    width, height = size
+    stride = width * 4
+    raw = b"".join(
+        b"\x00" + pixels[row * stride : (row + 1) * stride]
+        for row in range(height - 1, -1, -1)
+    )
+
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", header))
+        f.write(chunk(b"IDAT", zlib.compress(raw, 6)))
+        f.write(chunk(b"IEND", b""))
+
+
+def iter_month_sheets(
+    events, templates, table, months, out_dir=SHEET_DIR, subtitle=""
+):
+    # Renders each (year, month) to out_dir/YYYY-MM.png, yielding the path
+    # once its file is written so a caller can spread the work over frames.
+    # table is a ShiftTable with template occurrences covering the months.
+    # Drawing must happen on the GL thread; each PNG is written while the
+    # next month is drawn, and a failed write raises OSError from next().
+    os.makedirs(out_dir, exist_ok=True)
+    sheet = MonthSheet()
+    pending = None
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="sheets") as writer:
+        for year, month in months:
+            num_days = monthrange(year, month)[1]
+            first = date(year, month, 1).toordinal()
+            last = date(year, month, num_days).toordinal()
+            month_events = expand_range(events, templates, first, last)
+            minutes = table.day_minutes(first, last)
+            sheet.show(year, month, month_events, minutes, subtitle)
+            path = os.path.join(out_dir, f"{year:04d}-{month:02d}.png")
+            future = writer.submit(_write_png, path, sheet.pixels(), SHEET_SIZE)
+            if pending is not None:
+                pending[1].result()
+                yield pending[0]
+            pending = (path, future)
+        if pending is not None:
+            pending[1].result()
+            yield pending[0]
+
+
+def months_between(start, end):
+    # (year, month) pairs covering the ordinal range start..end.
+    first, last = date.fromordinal(start), date.fromordinal(end)
+    index = first.year * 12 + first.month - 1
+    while index <= last.year * 12 + last.month - 1:
+        yield index // 12, index % 12 + 1
+        index += 1
+
+
 class TimePicker(BoxLayout):
     def __init__(self, initial_time="", **kwargs):
         super().__init__(orientation="vertical", spacing=dp(6), **kwargs)
@@ -391,17 +1071,17 @@ class TimePicker(BoxLayout):
 
         # Spinners row
         spinners_row = BoxLayout(orientation="horizontal", spacing=dp(6))
-        self.hour_spinner = StyledSpinner(
+        self.hour_spinner = LazySpinner(
             text=hour,
-            values=[f"{i:02d}" for i in range(24)],
+            values=HOUR_VALUES,
             size_hint_x=0.45,
             font_size=sp(14),
             background_color=PRIMARY_COLOR,
             color=[1, 1, 1, 1],
         )
-        self.minute_spinner = StyledSpinner(
+        self.minute_spinner = LazySpinner(
             text=minute,
-            values=[f"{i:02d}" for i in range(0, 60, 15)],
+            values=MINUTE_VALUES,
             size_hint_x=0.45,
             font_size=sp(14),
             background_color=PRIMARY_COLOR,
@@ -416,6 +1096,14 @@ class TimePicker(BoxLayout):
     def get_time(self):
         return f"{self.hour_spinner.text}:{self.minute_spinner.text}"
 
+    def set_time(self, time_str):
+        if time_str and ":" in time_str:
+            hour, minute = time_str.split(":")
+        else:
+            hour, minute = "09", "00"
+        self.hour_spinner.text = hour
+        self.minute_spinner.text = minute
+
 
 class DatePicker(BoxLayout):
     def __init__(self, initial_date="", **kwargs):
@@ -454,25 +1142,25 @@ class DatePicker(BoxLayout):
 
         # Spinners row
         spinners_row = BoxLayout(orientation="horizontal", spacing=dp(8))
-        self.day_spinner = StyledSpinner(
+        self.day_spinner = LazySpinner(
             text=day,
-            values=[f"{i:02d}" for i in range(1, 32)],
+            values=DAY_VALUES,
             size_hint_x=0.33,
             font_size=sp(14),
             background_color=PRIMARY_COLOR,
             color=[1, 1, 1, 1],
         )
-        self.month_spinner = StyledSpinner(
+        self.month_spinner = LazySpinner(
             text=month,
-            values=[f"{i:02d}" for i in range(1, 13)],
+            values=MONTH_VALUES,
             size_hint_x=0.33,
             font_size=sp(14),
             background_color=PRIMARY_COLOR,
             color=[1, 1, 1, 1],
         )
-        self.year_spinner = StyledSpinner(
+        self.year_spinner = LazySpinner(
             text=year,
-            values=[str(i) for i in range(2020, 2030)],
+            values=YEAR_VALUES,
             size_hint_x=0.34,
             font_size=sp(14),
             background_color=PRIMARY_COLOR,
@@ -491,7 +1179,11 @@ class DatePicker(BoxLayout):
 def modal_background(parent, radius=22):
     with parent.canvas:
         # Background image
-        img = Rectangle(source="assets/purple.jpg", pos=parent.pos, size=parent.size)
+        img = Rectangle(
+            texture=TEXTURES.background(BACKGROUND_SOURCE, parent.size),
+            pos=parent.pos,
+            size=parent.size,
+        )
         # Light overlay to show background image
         Color(0.92, 0.88, 0.98, 0.3)
         overlay = RoundedRectangle(
@@ -512,23 +1204,56 @@ def modal_background(parent, radius=22):
         ],
         size=lambda inst, val: [
             setattr(img, "size", inst.size),
+            setattr(img, "texture", TEXTURES.background(BACKGROUND_SOURCE, inst.size)),
             setattr(overlay, "size", inst.size),
             setattr(border, "size", (inst.width - dp(2), inst.height - dp(2))),
         ],
     )
 
 
+_hours_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="hours")
+# One writer thread, so saves reach the disk in the order they were made.
+_save_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="save")
+# Reads the full event store behind a resumed UI.
+_load_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="load")
+
+
+class HoursJob:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+
 class DateRangeHoursPopup(ModalView):
-    def __init__(self, compute_callback, **kwargs):
+    def __init__(self, compute_callback, occupancy_callback, sheets_callback, **kwargs):
         super().__init__(**kwargs)
-        self.size_hint = (0.7, 0.35)
+        self.size_hint = (0.7, 0.45)
         self.pos_hint = {"center_x": 0.5, "center_y": 0.6}
         self.auto_dismiss = True
         self.background = ""
         self.background_color = (0, 0, 0, 0)
         self.overlay_color = [0, 0, 0, 0]
-        self.compute_callback = compute_callback
+        self._jobs = []
+        self._sheets = None
         self._build_content()
+        for picker in (self.from_input, self.to_input):
+            for spinner in (picker.day_spinner, picker.month_spinner, picker.year_spinner):
+                spinner.bind(text=self._on_range_changed)
+        self.load(compute_callback, occupancy_callback, sheets_callback)
+
+    def load(self, compute_callback, occupancy_callback, sheets_callback):
+        self.cancel_jobs()
+        # compute_callback(date_from, date_to) returns an iterator of
+        # (done, total, PayBreakdown) tuples; the last one is the result.
+        # sheets_callback(date_from, date_to) returns (count, iterator of
+        # written PNG paths).
+        self.compute_callback = compute_callback
+        self.occupancy_callback = occupancy_callback
+        self.sheets_callback = sheets_callback
+        self.result_label.text = ""
 
     def _build_content(self):
         root = FloatLayout()
@@ -587,18 +1312,42 @@ class DateRangeHoursPopup(ModalView):
             font_size=sp(18),
             color=[1, 1, 1, 1],
             bold=True,
-            size_hint_y=None,
-            height=dp(40),
             background_normal="",
             background_down="",
         )
         compute_btn.bind(on_press=self.on_compute)
-        layout.add_widget(compute_btn)
+        chart_btn = Button(
+            text="By Time of Day",
+            background_color=SECONDARY_COLOR,
+            font_size=sp(18),
+            color=[1, 1, 1, 1],
+            bold=True,
+            background_normal="",
+            background_down="",
+        )
+        chart_btn.bind(on_press=self.on_chart)
+        sheets_btn = Button(
+            text="Month Sheets",
+            background_color=SECONDARY_COLOR,
+            font_size=sp(18),
+            color=[1, 1, 1, 1],
+            bold=True,
+            background_normal="",
+            background_down="",
+        )
+        sheets_btn.bind(on_press=self.on_sheets)
+        button_row = BoxLayout(
+            orientation="horizontal", spacing=dp(8), size_hint_y=None, height=dp(40)
+        )
+        button_row.add_widget(compute_btn)
+        button_row.add_widget(chart_btn)
+        button_row.add_widget(sheets_btn)
+        layout.add_widget(button_row)
 
         self.result_container = BoxLayout(
             orientation="vertical",
             size_hint_y=None,
-            height=dp(60),
+            height=dp(120),
             padding=[dp(12), dp(8), dp(12), dp(8)],
         )
         with self.result_container.canvas.before:
@@ -635,16 +1384,152 @@ class DateRangeHoursPopup(ModalView):
         date_from = self.from_input.get_date()
         date_to = self.to_input.get_date()
         try:
-            hours = self.compute_callback(date_from, date_to)
-            self.result_label.text = f"Total: [b]{hours}[/b] hours"
+            if date_to < date_from:
+                raise ValueError("End date is before start date.")
+            chunks = self.compute_callback(date_from, date_to)
+        except ValueError as e:
+            self._show_error(str(e).capitalize())
+            return
+        job = HoursJob(chunks)
+        self._jobs.append(job)
+        self.result_label.text = "Calculating..."
+        _hours_executor.submit(self._run_job, job)
+
+    def on_chart(self, instance):
+        date_from = self.from_input.get_date()
+        date_to = self.to_input.get_date()
+        try:
+            if date_to < date_from:
+                raise ValueError("End date is before start date.")
+            self.occupancy_callback(date_from, date_to)
+        except ValueError as e:
+            self._show_error(str(e).capitalize())
+
+    def on_sheets(self, instance):
+        date_from = self.from_input.get_date()
+        date_to = self.to_input.get_date()
+        try:
+            if date_to < date_from:
+                raise ValueError("End date is before start date.")
+            total, paths = self.sheets_callback(date_from, date_to)
+        except ValueError as e:
+            self._show_error(str(e).capitalize())
+            return
+        self.cancel_jobs()
+        # [remaining paths, total, written so far, last path]
+        self._sheets = [paths, total, 0, None]
+        self.result_label.text = f"Rendering sheets... 0/{total}"
+        Clock.schedule_once(self._next_sheet, 0)
+
+    def _next_sheet(self, dt):
+        # One month per frame; drawing needs the GL thread.
+        state = self._sheets
+        if state is None:
+            return
+        try:
+            path = next(state[0], None)
+        except OSError as e:
+            Logger.exception("Sheets: export failed")
+            self._sheets = None
+            self._show_error(f"Error writing sheets: {e}")
+            return
+        if path is None:
+            self._sheets = None
+            folder = escape_markup(os.path.abspath(os.path.dirname(state[3])))
+            self.result_label.text = (
+                f"Saved [b]{state[1]}[/b] month sheets\n"
+                f"[size={int(sp(14))}]{folder}[/size]"
+            )
+            return
+        state[2] += 1
+        state[3] = path
+        self.result_label.text = f"Rendering sheets... {state[2]}/{state[1]}"
+        Clock.schedule_once(self._next_sheet, 0)
+
+    def _run_job(self, job):
+        # Runs on a worker thread; every UI update goes through Clock.
+        if job.cancelled.is_set():
+            return
+        try:
+            for done, total, result in job.chunks:
+                if job.cancelled.is_set():
+                    return
+                Clock.schedule_once(partial(self._on_progress, job, done, total, result))
         except Exception as e:
+            Logger.exception("Hours: computation failed")
+            Clock.schedule_once(partial(self._on_failed, job, e))
+            return
+        Clock.schedule_once(partial(self._on_finished, job, result))
+
+    def _is_current(self, job):
+        return not job.cancelled.is_set() and self._jobs and self._jobs[-1] is job
+
+    def _on_progress(self, job, done, total, result, dt):
+        if self._is_current(job) and done < total:
+            percent = int(done * 100 / total)
             self.result_label.text = (
-                "[color=ff0000]Invalid input or error computing hours.[/color]"
+                f"Calculating... {percent}%  ({result.hours} hours so far)"
+            )
+
+    def _on_finished(self, job, result, dt):
+        if self._is_current(job):
+            self.result_label.text = self._breakdown_text(result)
+        self._forget(job)
+
+    def _breakdown_text(self, result):
+        lines = [f"Total: [b]{result.hours}[/b] hours"]
+        if result.overtime_minutes or result.night_minutes or result.holiday_minutes:
+            lines.append(
+                f"[size={int(sp(14))}]Regular {result.regular_hours}  |  "
+                f"Overtime {result.overtime_hours}  |  Night {result.night_hours}  |  "
+                f"Holiday {result.holiday_hours}[/size]"
+            )
+        if result.total_pay:
+            lines.append(f"Pay: [b]{result.money(result.total_pay)}[/b]")
+            lines.append(
+                f"[size={int(sp(14))}]Base {result.money(result.base_pay)}  +  "
+                f"OT {result.money(result.overtime_pay)}  +  "
+                f"Night {result.money(result.night_pay)}  +  "
+                f"Holiday {result.money(result.holiday_pay)}[/size]"
             )
+        return "\n".join(lines)
+
+    def _on_failed(self, job, error, dt):
+        if self._is_current(job):
+            self._show_error(f"Error computing hours: {error}")
+        self._forget(job)
+
+    def _forget(self, job):
+        if job in self._jobs:
+            self._jobs.remove(job)
+
+    def _show_error(self, message):
+        self.result_label.text = f"[color=ff0000]{escape_markup(message)}[/color]"
+
+    def _on_range_changed(self, instance, value):
+        if self._jobs:
+            self.cancel_jobs()
+            self.result_label.text = ""
+
+    def cancel_jobs(self):
+        for job in self._jobs:
+            job.cancel()
+        self._jobs = []
+        if self._sheets is not None:
+            # Closing the generator waits for the files already submitted.
+            self._sheets[0].close()
+            self._sheets = None
+
+    def on_dismiss(self):
+        self.cancel_jobs()
+
+
+REPEAT_MODES = (("Off", None), ("Weekly", "same"), ("Weekdays", "mon-fri"))
+TEAM_COLUMNS = (("Profile", "left"), ("Hours", "right"), ("Overtime", "right"), ("Pay", "right"))
 
 
 class AddEditModal(ModalView):
-    def __init__(self, date_key, events, save_callback, **kwargs):
+    def __init__(self, date_key, store, templates, memos, save_callback, **kwargs):
         super().__init__(**kwargs)
         self.size_hint = (0.85, 0.5)
         self.pos_hint = {"center_x": 0.5, "center_y": 0.6}
@@ -652,20 +1537,31 @@ class AddEditModal(ModalView):
         self.background = ""
         self.background_color = (0, 0, 0, 0)
         self.overlay_color = [0, 0, 0, 0]
+        self.segments = []
+        self._setup_content()
+        self.load(date_key, store, templates, memos, save_callback)
+
+    def load(self, date_key, store, templates, memos, save_callback):
         self.date_key = date_key
-        self.events = events
+        self.store = store
+        self.memos = memos
+        events = store.snapshot()
+        self.templates = templates
         self.save_callback = save_callback
+        self.day = parse_date_ordinal(date_key)
 
-        self.segments = []
-        existing = events.get(date_key, [])
-        if isinstance(existing, dict):
-            self.segments = [existing]
-        elif isinstance(existing, list):
-            self.segments = [seg.copy() for seg in existing]
-        else:
-            self.segments = []
+        # Days without an explicit entry show their recurring shifts.
+        self.segments = store.full(resolve_day(events, templates, date_key))
+        self.repeat_index = 0
+        self.repeat_btn.text = f"Repeat: {REPEAT_MODES[0][0]}"
 
-        self._setup_content()
+        self.title_label.text = f"[b]{date_key}[/b]"
+        self._refresh_segments_ui()
+        if date_key in events or templates_on(templates, self.day):
+            if not self.delete_btn.parent:
+                self.btn_layout.add_widget(self.delete_btn)
+        elif self.delete_btn.parent:
+            self.btn_layout.remove_widget(self.delete_btn)
 
     def _setup_content(self):
         root = FloatLayout()
@@ -680,8 +1576,8 @@ class AddEditModal(ModalView):
         )
         layout.bind(minimum_height=layout.setter("height"))
 
-        title_label = Label(
-            text=f"[b]{self.date_key}[/b]",
+        self.title_label = title_label = Label(
+            text="",
             font_size=sp(22),
             color=PRIMARY_COLOR,
             size_hint_y=None,
@@ -697,13 +1593,13 @@ class AddEditModal(ModalView):
         layout.add_widget(title_label)
 
         self.segment_boxes = []
+        self._spare_boxes = []
         self.segments_container = BoxLayout(
             orientation="vertical",
             spacing=dp(8),
             size_hint_y=None,
             padding=[dp(8), dp(8), dp(8), dp(8)],
         )
-        self._refresh_segments_ui()
         layout.add_widget(self.segments_container)
 
         add_btn = Button(
@@ -714,13 +1610,27 @@ class AddEditModal(ModalView):
             bold=True,
             background_normal="",
             background_down="",
-            size_hint_y=None,
-            height=dp(40),
         )
         add_btn.bind(on_press=self.add_blank_segment)
-        layout.add_widget(add_btn)
-
-        btn_layout = BoxLayout(size_hint_y=None, height=dp(50), spacing=dp(12))
+        self.repeat_btn = Button(
+            text="",
+            background_color=SECONDARY_COLOR,
+            font_size=sp(16),
+            color=[1, 1, 1, 1],
+            bold=True,
+            background_normal="",
+            background_down="",
+            size_hint_x=0.4,
+        )
+        self.repeat_btn.bind(on_press=self._cycle_repeat)
+        add_row = BoxLayout(size_hint_y=None, height=dp(40), spacing=dp(12))
+        add_row.add_widget(add_btn)
+        add_row.add_widget(self.repeat_btn)
+        layout.add_widget(add_row)
+
+        self.btn_layout = btn_layout = BoxLayout(
+            size_hint_y=None, height=dp(50), spacing=dp(12)
+        )
         save_btn = Button(
             text="Save",
             background_color=PRIMARY_COLOR,
@@ -744,61 +1654,86 @@ class AddEditModal(ModalView):
         btn_layout.add_widget(save_btn)
         btn_layout.add_widget(cancel_btn)
 
-        if self.date_key in self.events:
-            delete_btn = Button(
-                text="Delete",
-                background_color=[1, 0.2, 0.2, 1],
-                font_size=sp(16),
-                color=[1, 1, 1, 1],
-                bold=True,
-                background_normal="",
-                background_down="",
-            )
-            delete_btn.bind(on_press=self.on_delete)
-            btn_layout.add_widget(delete_btn)
+        self.delete_btn = Button(
+            text="Delete",
+            background_color=[1, 0.2, 0.2, 1],
+            font_size=sp(16),
+            color=[1, 1, 1, 1],
+            bold=True,
+            background_normal="",
+            background_down="",
+        )
+        self.delete_btn.bind(on_press=self.on_delete)
 
         layout.add_widget(btn_layout)
         root.add_widget(layout)
         self.add_widget(root)
 
+        # Memo suggestions share one dropdown, attached to whichever memo
+        # field is being typed in.
+        self.memo_dropdown = DropDown()
+        self.memo_dropdown.owner = None
+        self.memo_options = []
+        for _ in range(TOP_K):
+            option = Button(
+                size_hint_y=None,
+                height=dp(40),
+                font_size=sp(14),
+                background_normal="",
+                background_down="",
+                background_color=PRIMARY_COLOR,
+                color=[1, 1, 1, 1],
+            )
+            option.bind(on_release=lambda btn: self.memo_dropdown.select(btn.text))
+            self.memo_options.append(option)
+        self.memo_dropdown.bind(on_select=self._on_memo_select)
+
     def _refresh_segments_ui(self):
-        self.segments_container.clear_widgets()
-        self.segment_boxes = []
+        # Existing rows are refilled; only missing rows are built.
+        while len(self.segment_boxes) > len(self.segments):
+            self._release_segment_box(self.segment_boxes[-1])
         for idx, segment in enumerate(self.segments):
-            s_box = self._make_segment_box(idx, segment)
-            self.segments_container.add_widget(s_box)
-            self.segment_boxes.append(s_box)
+            if idx < len(self.segment_boxes):
+                s_box = self.segment_boxes[idx]
+            else:
+                s_box = self._take_segment_box()
+            self._fill_segment_box(s_box, segment)
+        self._update_segment_rows()
+
+    def _update_segment_rows(self):
+        removable = len(self.segments) > 1
+        for s_box in self.segment_boxes:
+            s_box.remove_btn.background_color = (
+                [1, 0.7, 0.7, 1] if removable else [0.96, 0.93, 0.99, 1]
+            )
+            s_box.remove_btn.disabled = not removable
         self.segments_container.height = dp(50) * max(len(self.segments), 1)
 
-    def _make_segment_box(self, idx, segment):
+    def _make_segment_box(self):
         box = BoxLayout(
             orientation="horizontal", spacing=dp(8), size_hint_y=None, height=dp(52)
         )
 
-        in_input = TimePicker(initial_time=segment.get("time_in", ""), size_hint_x=0.22)
-        out_input = TimePicker(
-            initial_time=segment.get("time_out", ""), size_hint_x=0.22
-        )
+        in_input = TimePicker(size_hint_x=0.22)
+        out_input = TimePicker(size_hint_x=0.22)
         memo_input = TextInput(
-            text=segment.get("memo", ""),
             hint_text="Memo",
             multiline=False,
             size_hint_x=0.45,
             font_size=sp(14),
         )
+        memo_input.bind(text=self._suggest_memos)
         remove_btn = Button(
             text="X",
             size_hint_x=0.11,
             font_size=sp(16),
-            background_color=(
-                [1, 0.7, 0.7, 1] if len(self.segments) > 1 else [0.96, 0.93, 0.99, 1]
-            ),
             color=[0.7, 0.1, 0.1, 1],
             background_normal="",
             background_down="",
-            disabled=len(self.segments) <= 1,
         )
-        remove_btn.bind(on_press=lambda inst, i=idx: self.remove_segment(i))
+        remove_btn.bind(
+            on_press=lambda inst, b=box: self.remove_segment(self.segment_boxes.index(b))
+        )
 
         box.add_widget(in_input)
         box.add_widget(out_input)
@@ -807,51 +1742,161 @@ class AddEditModal(ModalView):
         box.in_input = in_input
         box.out_input = out_input
         box.memo_input = memo_input
+        box.remove_btn = remove_btn
         return box
 
+    def _suggest_memos(self, memo_input, text):
+        # Only typing suggests; text filled in by load() or a pick does not.
+        if not memo_input.focus:
+            return
+        dropdown = self.memo_dropdown
+        suggestions = [m for m in self.memos.suggest(text) if m != text.strip()]
+        if not text.strip() or not suggestions:
+            dropdown.dismiss()
+            return
+        dropdown.clear_widgets()
+        for option, memo in zip(self.memo_options, suggestions):
+            option.text = memo
+            dropdown.add_widget(option)
+        if dropdown.attach_to is not memo_input:
+            dropdown.dismiss()
+            dropdown.owner = memo_input
+            dropdown.open(memo_input)
+
+    def _on_memo_select(self, dropdown, memo):
+        memo_input = dropdown.owner
+        if memo_input is not None:
+            memo_input.focus = False
+            memo_input.text = memo
+        dropdown.owner = None
+
+    def on_dismiss(self):
+        self.memo_dropdown.dismiss()
+
+    def _fill_segment_box(self, box, segment):
+        box.in_input.set_time(segment.get("time_in", ""))
+        box.out_input.set_time(segment.get("time_out", ""))
+        box.memo_input.text = segment.get("memo", "")
+
+    def _take_segment_box(self):
+        s_box = self._spare_boxes.pop() if self._spare_boxes else self._make_segment_box()
+        self.segments_container.add_widget(s_box)
+        self.segment_boxes.append(s_box)
+        return s_box
+
+    def _release_segment_box(self, s_box):
+        # Removed rows are parked for the next add instead of being rebuilt.
+        self.segments_container.remove_widget(s_box)
+        self.segment_boxes.remove(s_box)
+        self._spare_boxes.append(s_box)
+
     def add_blank_segment(self, instance):
-        self.segments.append({"time_in": "", "time_out": "", "memo": ""})
-        self._refresh_segments_ui()
+        segment = {"time_in": "", "time_out": "", "memo": ""}
+        self.segments.append(segment)
+        self._fill_segment_box(self._take_segment_box(), segment)
+        self._update_segment_rows()
 
     def remove_segment(self, idx):
         if len(self.segments) > 1:
             self.segments.pop(idx)
-            self._refresh_segments_ui()
+            self._release_segment_box(self.segment_boxes[idx])
+            self._update_segment_rows()
+
+    def _cycle_repeat(self, instance):
+        self.repeat_index = (self.repeat_index + 1) % len(REPEAT_MODES)
+        self.repeat_btn.text = f"Repeat: {REPEAT_MODES[self.repeat_index][0]}"
+
+    def _skip_templates(self):
+        for template in templates_on(self.templates, self.day):
+            template.add_skip(self.date_key)
+
+    def _repeat_from_here(self, weekdays, segments):
+        # The new shifts start today and take over their weekdays from any
+        # recurring shift running today; its other weekdays carry on.
+        release_weekdays(self.templates, self.date_key, weekdays)
+        for segment in segments:
+            self.templates.append(
+                ShiftTemplate(
+                    weekdays,
+                    segment["time_in"],
+                    segment["time_out"],
+                    memo=segment["memo"],
+                    start=self.date_key,
+                )
+            )
+        self.store.discard(self.date_key)
 
-    def on_save(self, instance):
-        new_segments = []
+    def _entered_segments(self, keep_blank=False):
+        segments = []
         for s_box in self.segment_boxes:
             t_in = s_box.in_input.get_time()
             t_out = s_box.out_input.get_time()
             memo = s_box.memo_input.text.strip()
-            if not t_in and not t_out and not memo:
-                continue
-            new_segments.append({"time_in": t_in, "time_out": t_out, "memo": memo})
-        if new_segments:
-            self.events[self.date_key] = new_segments
-        elif self.date_key in self.events:
-            del self.events[self.date_key]
+            if keep_blank or t_in or t_out or memo:
+                segments.append({"time_in": t_in, "time_out": t_out, "memo": memo})
+        return segments
+
+    def draft(self):
+        # The form as it stands, saved or not.
+        return {
+            "date": self.date_key,
+            "segments": self._entered_segments(keep_blank=True),
+            "repeat": self.repeat_index,
+        }
+
+    def restore_draft(self, draft):
+        # Called after load() for the draft's date.
+        if draft.get("segments"):
+            self.segments = [dict(s) for s in draft["segments"]]
+        self.repeat_index = int(draft.get("repeat", 0)) % len(REPEAT_MODES)
+        self.repeat_btn.text = f"Repeat: {REPEAT_MODES[self.repeat_index][0]}"
+        self._refresh_segments_ui()
+
+    def on_save(self, instance):
+        new_segments = self._entered_segments()
+        repeat = REPEAT_MODES[self.repeat_index][1]
+        if repeat and new_segments:
+            if repeat == "same":
+                weekdays = [date.fromordinal(self.day).weekday()]
+            else:
+                weekdays = parse_weekdays(repeat)
+            self._repeat_from_here(weekdays, new_segments)
+        elif new_segments:
+            # A templated day saved as it was stays templated.
+            if self.date_key in self.store.snapshot() or new_segments != [
+                t.segment() for t in templates_on(self.templates, self.day)
+            ]:
+                self.store.put(self.date_key, new_segments)
+        else:
+            self.store.discard(self.date_key)
+            self._skip_templates()
         self.save_callback()
         self.dismiss()
 
     def on_delete(self, instance):
-        if self.date_key in self.events:
-            del self.events[self.date_key]
-            self.save_callback()
+        self.store.discard(self.date_key)
+        self._skip_templates()
+        self.save_callback()
         self.dismiss()
 
 
-class AllEventsPopup(ModalView):
-    def __init__(self, events, **kwargs):
+class EventListPopup(ModalView):
+    # Day cards for {date_str: segments} in a scrolling list, with a Close
+    # button. Subclasses add their controls and call show_events.
+    TITLE = "Events"
+    EMPTY_TEXT = "No events."
+
+    def __init__(self, **kwargs):
         super().__init__(**kwargs)
         self.size_hint = (0.99, 0.99)
         self.auto_dismiss = True
         self.background = ""
         self.background_color = (0, 0, 0, 0)
         self.overlay_color = [0, 0, 0, 0]
-        self._setup_content(events)
+        self._build = None
+        self._setup_content()
 
-    def _setup_content(self, events):
+    def _setup_content(self):
         root = FloatLayout()
         modal_background(root, radius=14)
 
@@ -864,7 +1909,7 @@ class AllEventsPopup(ModalView):
         )
 
         title_label = Label(
-            text="[b]Events For This Month[/b]",
+            text=f"[b]{self.TITLE}[/b]",
             font_size=sp(20),
             color=PRIMARY_COLOR,
             bold=True,
@@ -879,12 +1924,44 @@ class AllEventsPopup(ModalView):
             size=lambda inst, val: setattr(inst, "text_size", (inst.width, inst.height))
         )
         layout.add_widget(title_label)
+        self.layout = layout
+        self.title_label = title_label
 
-        scroll = ScrollView()
-        box = BoxLayout(
+        self.scroll = ScrollView()
+        self.cards_box = BoxLayout(
             orientation="vertical", spacing=dp(12), size_hint_y=None, padding=(dp(8), dp(8))
         )
-        box.bind(minimum_height=box.setter("height"))
+        self.cards_box.bind(minimum_height=self.cards_box.setter("height"))
+        self.scroll.add_widget(self.cards_box)
+        layout.add_widget(self.scroll)
+        self.button_row = BoxLayout(
+            orientation="horizontal", spacing=dp(8), size_hint_y=None, height=dp(44)
+        )
+        close_btn = Button(
+            text="Close",
+            background_color=SECONDARY_COLOR,
+            color=[1, 1, 1, 1],
+            font_size=sp(16),
+            bold=True,
+            background_normal="",
+            background_down="",
+            on_press=self.dismiss,
+        )
+        self.button_row.add_widget(close_btn)
+        layout.add_widget(self.button_row)
+        root.add_widget(layout)
+        self.add_widget(root)
+
+    def clear(self):
+        if self._build is not None:
+            self._build.cancel()
+            self._build = None
+        self.cards_box.clear_widgets()
+        self.scroll.scroll_y = 1
+
+    def show_events(self, events):
+        self.clear()
+        box = self.cards_box
 
         card_height = dp(90)
         card_font = sp(16)
@@ -898,7 +1975,7 @@ class AllEventsPopup(ModalView):
                 padding=dp(8),
             )
             lbl = Label(
-                text="No events logged for this month.",
+                text=self.EMPTY_TEXT,
                 font_size=card_font,
                 color=HEADER_TEXT_COLOR,
                 halign="left",
@@ -918,128 +1995,697 @@ class AllEventsPopup(ModalView):
                     return datetime(1900, 1, 1)
 
             sorted_dates = sorted(events.keys(), key=date_key_fn)
+            steps = []
             for date_str in sorted_dates:
                 segments = events[date_str]
                 if isinstance(segments, dict):
                     segments = [segments]
-                card = BoxLayout(
-                    orientation="vertical",
-                    size_hint_y=None,
-                    height=max(card_height, dp(36) * len(segments) + dp(40)),
-                    padding=dp(16),
-                    spacing=dp(6),
-                )
-                with card.canvas.before:
-                    Color(0.62, 0.49, 0.93, 1)
-                    card.bg_rect = RoundedRectangle(
-                        pos=card.pos, size=card.size, radius=[dp(20)]
-                    )
-                    Color(0, 0, 0, 0.10)
-                    card.shadow_rect = RoundedRectangle(
-                        pos=(card.x + dp(2), card.y - dp(2)),
-                        size=(card.width, card.height),
-                        radius=[dp(20)],
-                    )
+                card = self._make_card(segments, card_height)
+                box.add_widget(card)
+                steps.append(partial(self._fill_card, card, date_str, segments))
+            # Cards go in as sized, empty placeholders so the list scrolls at
+            # once; their labels follow top-down within the frame budget.
+            self._build = ProgressiveBuild(steps)
+
+    def _make_card(self, segments, card_height):
+        card = BoxLayout(
+            orientation="vertical",
+            size_hint_y=None,
+            height=max(card_height, dp(36) * len(segments) + dp(40)),
+            padding=dp(16),
+            spacing=dp(6),
+        )
+        with card.canvas.before:
+            Color(0.62, 0.49, 0.93, 1)
+            card.bg_rect = RoundedRectangle(pos=card.pos, size=card.size, radius=[dp(20)])
+            Color(0, 0, 0, 0.10)
+            card.shadow_rect = RoundedRectangle(
+                pos=(card.x + dp(2), card.y - dp(2)),
+                size=(card.width, card.height),
+                radius=[dp(20)],
+            )
 
-                def update_card_rects(inst, val):
-                    inst.bg_rect.pos = inst.pos
-                    inst.bg_rect.size = inst.size
-                    inst.shadow_rect.pos = (inst.x + dp(2), inst.y - dp(2))
-                    inst.shadow_rect.size = (inst.width, inst.height)
+        def update_card_rects(inst, val):
+            inst.bg_rect.pos = inst.pos
+            inst.bg_rect.size = inst.size
+            inst.shadow_rect.pos = (inst.x + dp(2), inst.y - dp(2))
+            inst.shadow_rect.size = (inst.width, inst.height)
 
-                card.bind(pos=update_card_rects, size=update_card_rects)
+        card.bind(pos=update_card_rects, size=update_card_rects)
+        return card
 
-                date_lbl = Label(
-                    text=f"[b]Date:[/b] {date_str}",
+    def _fill_card(self, card, date_str, segments):
+        date_lbl = Label(
+            text=f"[b]Date:[/b] {date_str}",
+            markup=True,
+            font_size=sp(16),
+            color=HEADER_TEXT_COLOR,
+            size_hint_y=None,
+            height=dp(24),
+            halign="left",
+            valign="middle",
+        )
+        date_lbl.bind(
+            size=lambda inst, val: setattr(inst, "text_size", (inst.width, inst.height))
+        )
+        card.add_widget(date_lbl)
+        for idx, segment in enumerate(segments):
+            work = work_time_string(segment)
+            shift_lbl = Label(
+                text=(
+                    f"[b]Shift {idx+1}:[/b] {work}"
+                    if work
+                    else f"[b]Shift {idx+1}:[/b] -"
+                ),
+                markup=True,
+                font_size=sp(15),
+                color=HEADER_TEXT_COLOR,
+                size_hint_y=None,
+                height=dp(20),
+                halign="left",
+                valign="middle",
+            )
+            shift_lbl.bind(
+                size=lambda inst, val: setattr(
+                    inst, "text_size", (inst.width, inst.height)
+                )
+            )
+            card.add_widget(shift_lbl)
+            memo = segment.get("memo", "")
+            if memo:
+                memo_lbl = Label(
+                    text=f"[b]Memo:[/b] {memo}",
                     markup=True,
-                    font_size=sp(16),
+                    font_size=sp(14),
                     color=HEADER_TEXT_COLOR,
                     size_hint_y=None,
-                    height=dp(24),
+                    height=dp(20),
                     halign="left",
                     valign="middle",
                 )
-                date_lbl.bind(
+                memo_lbl.bind(
                     size=lambda inst, val: setattr(
                         inst, "text_size", (inst.width, inst.height)
                     )
                 )
-                card.add_widget(date_lbl)
-                for idx, segment in enumerate(segments):
-                    work = work_time_string(segment)
-                    shift_lbl = Label(
-                        text=(
-                            f"[b]Shift {idx+1}:[/b] {work}"
-                            if work
-                            else f"[b]Shift {idx+1}:[/b] -"
-                        ),
-                        markup=True,
-                        font_size=sp(15),
-                        color=HEADER_TEXT_COLOR,
-                        size_hint_y=None,
-                        height=dp(20),
-                        halign="left",
-                        valign="middle",
-                    )
-                    shift_lbl.bind(
-                        size=lambda inst, val: setattr(
-                            inst, "text_size", (inst.width, inst.height)
-                        )
-                    )
-                    card.add_widget(shift_lbl)
-                    memo = segment.get("memo", "")
-                    if memo:
-                        memo_lbl = Label(
-                            text=f"[b]Memo:[/b] {memo}",
-                            markup=True,
-                            font_size=sp(14),
-                            color=HEADER_TEXT_COLOR,
-                            size_hint_y=None,
-                            height=dp(20),
-                            halign="left",
-                            valign="middle",
-                        )
-                        memo_lbl.bind(
-                            size=lambda inst, val: setattr(
-                                inst, "text_size", (inst.width, inst.height)
-                            )
-                        )
-                        card.add_widget(memo_lbl)
-                box.add_widget(card)
+                card.add_widget(memo_lbl)
 
-        scroll.add_widget(box)
-        layout.add_widget(scroll)
-        close_btn = Button(
-            text="Close",
-            size_hint_y=None,
-            height=dp(44),
-            background_color=SECONDARY_COLOR,
+    def on_dismiss(self):
+        if self._build is not None:
+            self._build.cancel()
+            self._build = None
+
+
+class AllEventsPopup(EventListPopup):
+    TITLE = "Events For This Month"
+    EMPTY_TEXT = "No events logged for this month."
+
+    def __init__(self, events, on_filter=None, **kwargs):
+        super().__init__(**kwargs)
+        self.load(events, on_filter)
+
+    def _setup_content(self):
+        super()._setup_content()
+        self.filter_btn = Button(
+            text="Filter Shifts",
+            background_color=PRIMARY_COLOR,
             color=[1, 1, 1, 1],
             font_size=sp(16),
             bold=True,
             background_normal="",
             background_down="",
-            on_press=self.dismiss,
+            on_press=self._on_filter,
         )
-        layout.add_widget(close_btn)
-        root.add_widget(layout)
-        self.add_widget(root)
 
+    def _on_filter(self, instance):
+        self.dismiss()
+        self.on_filter()
+
+    def load(self, events, on_filter=None):
+        # on_filter opens the shift filter; without one the button is hidden.
+        self.on_filter = on_filter
+        if on_filter is None and self.filter_btn.parent is not None:
+            self.button_row.remove_widget(self.filter_btn)
+        elif on_filter is not None and self.filter_btn.parent is None:
+            self.button_row.add_widget(self.filter_btn, index=1)
+        self.show_events(events)
+
+
+class ShiftQueryPopup(EventListPopup):
+    # The event list with a filter form above it. Each search runs the
+    # query through query_callback(ShiftQuery), which returns the matching
+    # shifts as {date_str: segments}; rules (PayRules) give their hours.
+    TITLE = "Filter Shifts"
+    EMPTY_TEXT = "No shifts match these filters."
+
+    def __init__(self, query_callback, rules, **kwargs):
+        super().__init__(**kwargs)
+        self.load(query_callback, rules)
 
-class EventsApp(App):
-    def build(self):
-        self.icon = 'assets/app_icon.png'
-        Window.clearcolor = (1, 1, 1, 1)
-        self.events = self._load_events()
-        self.root_layout = BoxLayout(
-            orientation="vertical",
-            spacing=dp(5),
-            padding=[dp(16), dp(12), dp(16), dp(12)],
-        )
-        with self.root_layout.canvas.before:
-            self.bg_image = Rectangle(
-                source="assets/purple.jpg",
-                pos=self.root_layout.pos,
+    def _setup_content(self):
+        super()._setup_content()
+        form = BoxLayout(orientation="vertical", spacing=dp(6), size_hint_y=None)
+        form.bind(minimum_height=form.setter("height"))
+
+        def field(hint):
+            return TextInput(
+                hint_text=hint,
+                multiline=False,
+                font_size=sp(16),
+                size_hint_y=None,
+                height=dp(40),
+                write_tab=False,
+            )
+
+        def row(*widgets):
+            box = BoxLayout(spacing=dp(6), size_hint_y=None, height=dp(40))
+            for widget in widgets:
+                box.add_widget(widget)
+            form.add_widget(box)
+
+        self.from_input = field("From YYYY-MM-DD")
+        self.to_input = field("To YYYY-MM-DD")
+        row(self.from_input, self.to_input)
+        self.weekday_buttons = [
+            ToggleButton(
+                text=name,
+                font_size=sp(15),
+                background_normal="",
+                background_down="",
+                background_color=CAL_CELL_COLOR,
+                color=HEADER_TEXT_COLOR,
+            )
+            for name in ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+        ]
+        for button in self.weekday_buttons:
+            button.bind(state=self._on_weekday_state)
+        row(*self.weekday_buttons)
+        self.after_input = field("Starts at or after HH:MM")
+        self.before_input = field("Starts before HH:MM")
+        row(self.after_input, self.before_input)
+        self.memo_input = field("Memo words")
+        self.memo_input.bind(on_text_validate=self.on_search)
+        search_btn = Button(
+            text="Search",
+            size_hint_x=0.35,
+            background_color=PRIMARY_COLOR,
+            color=[1, 1, 1, 1],
+            font_size=sp(16),
+            bold=True,
+            background_normal="",
+            background_down="",
+            on_press=self.on_search,
+        )
+        row(self.memo_input, search_btn)
+        self.summary_label = Label(
+            text="",
+            markup=True,
+            font_size=sp(15),
+            color=PRIMARY_COLOR,
+            size_hint_y=None,
+            height=dp(24),
+        )
+        form.add_widget(self.summary_label)
+        # Between the title and the results.
+        self.layout.add_widget(form, index=len(self.layout.children) - 1)
+
+    def _on_weekday_state(self, button, state):
+        button.background_color = PRIMARY_COLOR if state == "down" else CAL_CELL_COLOR
+        button.color = [1, 1, 1, 1] if state == "down" else HEADER_TEXT_COLOR
+
+    def load(self, query_callback, rules):
+        # Results are cleared until the next search.
+        self.query_callback = query_callback
+        self.rules = rules
+        self.clear()
+        self.summary_label.text = ""
+
+    def on_search(self, instance):
+        weekdays = ",".join(
+            str(i) for i, b in enumerate(self.weekday_buttons) if b.state == "down"
+        )
+        try:
+            query = ShiftQuery.parse(
+                self.from_input.text.strip(),
+                self.to_input.text.strip(),
+                weekdays,
+                self.after_input.text.strip(),
+                self.before_input.text.strip(),
+                self.memo_input.text,
+            )
+        except ValueError as e:
+            message = str(e)
+            message = escape_markup(message[:1].upper() + message[1:])
+            self.summary_label.text = f"[color=ff0000]{message}[/color]"
+            return
+        results = self.query_callback(query)
+        count = sum(map(len, results.values()))
+        # Zone corrected, like the hours calculator and `lenggy find`.
+        minutes = sum(
+            shift_minutes(date_str, segment, self.rules) or 0
+            for date_str, segments in results.items()
+            for segment in segments
+        )
+        self.summary_label.text = (
+            f"[b]{count}[/b] shifts on {len(results)} days, "
+            f"[b]{minutes / 60.0:.2f}[/b] hours"
+        )
+        self.show_events(results)
+
+
+class YearHeatmapPopup(ModalView):
+    def __init__(self, year, minutes_for_year, on_day_press, **kwargs):
+        super().__init__(**kwargs)
+        self.size_hint = (0.95, 0.5)
+        self.pos_hint = {"center_x": 0.5, "center_y": 0.6}
+        self.auto_dismiss = True
+        self.background = ""
+        self.background_color = (0, 0, 0, 0)
+        self.overlay_color = [0, 0, 0, 0]
+        self._setup_content()
+        self.load(year, minutes_for_year, on_day_press)
+
+    def load(self, year, minutes_for_year, on_day_press):
+        self.minutes_for_year = minutes_for_year
+        self.on_day_press = on_day_press
+        self.show_year(year)
+
+    def _setup_content(self):
+        root = FloatLayout()
+        modal_background(root, radius=20)
+
+        layout = BoxLayout(
+            orientation="vertical",
+            spacing=dp(8),
+            padding=[dp(16), dp(12), dp(16), dp(16)],
+            size_hint=(1, 1),
+            pos_hint={"x": 0, "y": 0},
+        )
+
+        nav = BoxLayout(orientation="horizontal", size_hint_y=None, height=dp(44))
+        prev_btn = Button(
+            text="<",
+            background_color=SECONDARY_COLOR,
+            color=[1, 1, 1, 1],
+            size_hint_x=None,
+            width=dp(44),
+            font_size=sp(20),
+            bold=True,
+            background_normal="",
+            background_down="",
+        )
+        next_btn = Button(
+            text=">",
+            background_color=SECONDARY_COLOR,
+            color=[1, 1, 1, 1],
+            size_hint_x=None,
+            width=dp(44),
+            font_size=sp(20),
+            bold=True,
+            background_normal="",
+            background_down="",
+        )
+        prev_btn.bind(on_press=lambda inst: self.show_year(self.heatmap.year - 1))
+        next_btn.bind(on_press=lambda inst: self.show_year(self.heatmap.year + 1))
+        self.year_lbl = Label(
+            text="", markup=True, font_size=sp(22), color=PRIMARY_COLOR
+        )
+        nav.add_widget(prev_btn)
+        nav.add_widget(self.year_lbl)
+        nav.add_widget(next_btn)
+        layout.add_widget(nav)
+
+        self.heatmap = YearHeatmap(on_day_press=self._on_day_press)
+        layout.add_widget(self.heatmap)
+
+        self.summary_lbl = Label(
+            text="",
+            markup=True,
+            font_size=sp(16),
+            color=HEADER_TEXT_COLOR,
+            size_hint_y=None,
+            height=dp(28),
+        )
+        layout.add_widget(self.summary_lbl)
+
+        close_btn = Button(
+            text="Close",
+            size_hint_y=None,
+            height=dp(44),
+            background_color=SECONDARY_COLOR,
+            color=[1, 1, 1, 1],
+            font_size=sp(16),
+            bold=True,
+            background_normal="",
+            background_down="",
+            on_press=self.dismiss,
+        )
+        layout.add_widget(close_btn)
+        root.add_widget(layout)
+        self.add_widget(root)
+
+    def show_year(self, year):
+        minutes = self.minutes_for_year(year)
+        self.heatmap.set_year(year, minutes)
+        self.year_lbl.text = f"[b]{year}[/b]"
+        worked_days = sum(1 for m in minutes if m)
+        self.summary_lbl.text = (
+            f"[b]{round(sum(minutes) / 60.0, 2)}[/b] hours over {worked_days} days"
+        )
+
+    def _on_day_press(self, date_key):
+        self.dismiss()
+        self.on_day_press(date_key)
+
+
+class OccupancyPopup(ModalView):
+    BUCKET = 60
+
+    def __init__(self, start, end, occupancy_callback, **kwargs):
+        super().__init__(**kwargs)
+        self.size_hint = (0.95, 0.6)
+        self.pos_hint = {"center_x": 0.5, "center_y": 0.55}
+        self.auto_dismiss = True
+        self.background = ""
+        self.background_color = (0, 0, 0, 0)
+        self.overlay_color = [0, 0, 0, 0]
+        self.occupancy = None
+        self._setup_content()
+        for picker in (self.window_from, self.window_to):
+            for spinner in (picker.hour_spinner, picker.minute_spinner):
+                spinner.bind(text=lambda inst, value: self._update_window())
+        self.load(start, end, occupancy_callback)
+
+    def load(self, start, end, occupancy_callback):
+        # occupancy_callback(start, end) returns an Occupancy covering the
+        # range, including shifts running in from the day before.
+        self.start, self.end = start, end
+        self.occupancy = occupancy_callback(start, end)
+        self.buckets = self.occupancy.histogram(start, end, self.BUCKET)
+        self.counts = self.occupancy.minute_counts(start, end)
+        first = date.fromordinal(start).strftime(DATE_FORMAT)
+        last = date.fromordinal(end).strftime(DATE_FORMAT)
+        self.title_lbl.text = f"[b]Time of Day[/b]  {first} to {last}"
+        busiest = max(range(len(self.buckets)), key=self.buckets.__getitem__)
+        self.chart.set_values(self.buckets, busiest if self.buckets[busiest] else None)
+        self._show_bucket(busiest)
+        self._update_window()
+
+    def _setup_content(self):
+        root = FloatLayout()
+        modal_background(root, radius=20)
+
+        layout = BoxLayout(
+            orientation="vertical",
+            spacing=dp(8),
+            padding=[dp(16), dp(12), dp(16), dp(16)],
+            size_hint=(1, 1),
+            pos_hint={"x": 0, "y": 0},
+        )
+        self.title_lbl = Label(
+            text="",
+            markup=True,
+            font_size=sp(20),
+            color=PRIMARY_COLOR,
+            size_hint_y=None,
+            height=dp(32),
+        )
+        layout.add_widget(self.title_lbl)
+
+        self.chart = OccupancyChart(on_bucket_press=self._show_bucket)
+        layout.add_widget(self.chart)
+        ticks = BoxLayout(orientation="horizontal", size_hint_y=None, height=dp(18))
+        for hour in range(0, 24, 6):
+            tick = Label(
+                text=f"{hour:02d}:00",
+                font_size=sp(12),
+                color=HEADER_TEXT_COLOR,
+                halign="left",
+                valign="middle",
+            )
+            tick.bind(
+                size=lambda inst, val: setattr(inst, "text_size", (inst.width, inst.height))
+            )
+            ticks.add_widget(tick)
+        layout.add_widget(ticks)
+
+        self.bucket_lbl = Label(
+            text="",
+            markup=True,
+            font_size=sp(16),
+            color=HEADER_TEXT_COLOR,
+            size_hint_y=None,
+            height=dp(28),
+        )
+        layout.add_widget(self.bucket_lbl)
+
+        window_row = BoxLayout(
+            orientation="horizontal", spacing=dp(8), size_hint_y=None, height=dp(56)
+        )
+        self.window_from = TimePicker("09:00", size_hint_x=0.3)
+        self.window_to = TimePicker("17:00", size_hint_x=0.3)
+        self.window_lbl = Label(
+            text="",
+            markup=True,
+            font_size=sp(15),
+            color=PRIMARY_COLOR,
+            size_hint_x=0.4,
+            halign="center",
+            valign="middle",
+        )
+        self.window_lbl.bind(
+            size=lambda inst, val: setattr(inst, "text_size", (inst.width, inst.height))
+        )
+        window_row.add_widget(self.window_from)
+        window_row.add_widget(self.window_to)
+        window_row.add_widget(self.window_lbl)
+        layout.add_widget(window_row)
+
+        close_btn = Button(
+            text="Close",
+            size_hint_y=None,
+            height=dp(44),
+            background_color=SECONDARY_COLOR,
+            color=[1, 1, 1, 1],
+            font_size=sp(16),
+            bold=True,
+            background_normal="",
+            background_down="",
+            on_press=self.dismiss,
+        )
+        layout.add_widget(close_btn)
+        root.add_widget(layout)
+        self.add_widget(root)
+
+    def _show_bucket(self, index):
+        first = index * self.BUCKET
+        last = first + self.BUCKET
+        days = max(self.counts[first:last])
+        num_days = self.end - self.start + 1
+        self.bucket_lbl.text = (
+            f"[b]{first // 60:02d}:{first % 60:02d}-{last // 60 % 24:02d}:{last % 60:02d}[/b]"
+            f"  {round(self.buckets[index] / 60.0, 2)} hours, "
+            f"worked on {days} of {num_days} days"
+        )
+
+    def _update_window(self):
+        if self.occupancy is None:
+            return
+        window_start = parse_minutes(self.window_from.get_time())
+        window_end = parse_minutes(self.window_to.get_time())
+        minutes = self.occupancy.window_minutes(
+            self.start, self.end, window_start, window_end
+        )
+        self.window_lbl.text = f"Inside window:\n[b]{round(minutes / 60.0, 2)}[/b] hours"
+
+
+class TeamReportPopup(ModalView):
+    def __init__(self, year, month, compute_callback, **kwargs):
+        super().__init__(**kwargs)
+        self.size_hint = (0.95, 0.8)
+        self.auto_dismiss = True
+        self.background = ""
+        self.background_color = (0, 0, 0, 0)
+        self.overlay_color = [0, 0, 0, 0]
+        self._job = None
+        self._build = None
+        self._setup_content()
+        self.load(year, month, compute_callback)
+
+    def load(self, year, month, compute_callback):
+        self.compute_callback = compute_callback
+        self.show_month(year, month)
+
+    def _setup_content(self):
+        root = FloatLayout()
+        modal_background(root, radius=20)
+
+        layout = BoxLayout(
+            orientation="vertical",
+            spacing=dp(8),
+            padding=[dp(16), dp(12), dp(16), dp(16)],
+            size_hint=(1, 1),
+            pos_hint={"x": 0, "y": 0},
+        )
+        self.title_lbl = Label(
+            text="",
+            markup=True,
+            font_size=sp(22),
+            color=PRIMARY_COLOR,
+            size_hint_y=None,
+            height=dp(36),
+        )
+        layout.add_widget(self.title_lbl)
+
+        header = GridLayout(
+            cols=4, size_hint_y=None, height=dp(30), padding=(0, 0, dp(8), 0)
+        )
+        for text, halign in TEAM_COLUMNS:
+            header.add_widget(self._cell(f"[b]{text}[/b]", halign))
+        layout.add_widget(header)
+
+        scroll = ScrollView()
+        self.rows_box = GridLayout(
+            cols=4,
+            size_hint_y=None,
+            row_default_height=dp(30),
+            row_force_default=True,
+            padding=(0, 0, dp(8), 0),
+        )
+        self.rows_box.bind(minimum_height=self.rows_box.setter("height"))
+        scroll.add_widget(self.rows_box)
+        layout.add_widget(scroll)
+
+        self.total_lbl = Label(
+            text="",
+            markup=True,
+            font_size=sp(16),
+            color=HEADER_TEXT_COLOR,
+            size_hint_y=None,
+            height=dp(28),
+        )
+        layout.add_widget(self.total_lbl)
+
+        close_btn = Button(
+            text="Close",
+            size_hint_y=None,
+            height=dp(44),
+            background_color=SECONDARY_COLOR,
+            color=[1, 1, 1, 1],
+            font_size=sp(16),
+            bold=True,
+            background_normal="",
+            background_down="",
+            on_press=self.dismiss,
+        )
+        layout.add_widget(close_btn)
+        root.add_widget(layout)
+        self.add_widget(root)
+
+    def _cell(self, text, halign):
+        lbl = Label(
+            text=text,
+            markup=True,
+            font_size=sp(15),
+            color=HEADER_TEXT_COLOR,
+            halign=halign,
+            valign="middle",
+        )
+        lbl.bind(
+            size=lambda inst, val: setattr(inst, "text_size", (inst.width, inst.height))
+        )
+        return lbl
+
+    def show_month(self, year, month):
+        if self._build is not None:
+            self._build.cancel()
+            self._build = None
+        self.rows_box.clear_widgets()
+        self.title_lbl.text = f"[b]Team {date(year, month, 1).strftime('%B %Y')}[/b]"
+        self.total_lbl.text = "Calculating..."
+        start = date(year, month, 1).toordinal()
+        end = date(year, month, monthrange(year, month)[1]).toordinal()
+        job = self._job = object()
+        _hours_executor.submit(self._run_job, job, start, end)
+
+    def _run_job(self, job, start, end):
+        # Worker thread; the callback fans the profiles out to processes.
+        try:
+            rows, total = self.compute_callback(start, end)
+        except Exception as e:
+            Logger.exception("Team: report failed")
+            Clock.schedule_once(partial(self._on_failed, job, e))
+            return
+        Clock.schedule_once(partial(self._on_finished, job, rows, total))
+
+    def _on_finished(self, job, rows, total, dt):
+        if job is not self._job:
+            return
+        self._job = None
+        self.total_lbl.text = (
+            f"[b]Team:[/b] {total.hours} hours  |  OT {total.overtime_hours}  |  "
+            f"{total.money(total.total_pay)}"
+        )
+        self._build = ProgressiveBuild(
+            [partial(self._add_row, name, result) for name, result in rows]
+        )
+
+    def _add_row(self, name, result):
+        values = (
+            escape_markup(name),
+            f"{result.hours:.2f}",
+            f"{result.overtime_hours:.2f}",
+            result.money(result.total_pay),
+        )
+        for text, (_, halign) in zip(values, TEAM_COLUMNS):
+            self.rows_box.add_widget(self._cell(text, halign))
+
+    def _on_failed(self, job, error, dt):
+        if job is self._job:
+            self._job = None
+            self.total_lbl.text = (
+                f"[color=ff0000]{escape_markup(f'Error computing report: {error}')}[/color]"
+            )
+
+    def on_dismiss(self):
+        self._job = None
+        if self._build is not None:
+            self._build.cancel()
+            self._build = None
+
+
+def _discard_resume():
+    try:
+        os.remove(RESUME_FILE)
+    except OSError:
+        pass
+
+
+class EventsApp(App):
+    def build(self):
+        self.icon = 'assets/app_icon.png'
+        Window.clearcolor = (1, 1, 1, 1)
+        self.settings = load_settings()
+        # With a profiles/ directory every employee has their own store and
+        # the app starts on the first one.
+        self.profiles = list_profiles()
+        self.profile = self.profiles[0] if self.profiles else None
+        self._resume = None
+        state = self._read_resume()
+        if state is None:
+            self._load_store()
+        else:
+            self._resume_store(state)
+        self._modal_pool = {}
+        self.root_layout = BoxLayout(
+            orientation="vertical",
+            spacing=dp(5),
+            padding=[dp(16), dp(12), dp(16), dp(12)],
+        )
+        with self.root_layout.canvas.before:
+            self.bg_image = Rectangle(
+                texture=TEXTURES.background(BACKGROUND_SOURCE, Window.size),
+                pos=self.root_layout.pos,
                 size=self.root_layout.size,
             )
         self.root_layout.bind(
@@ -1047,34 +2693,283 @@ class EventsApp(App):
             size=lambda inst, val: setattr(self.bg_image, "size", inst.size),
         )
         self._add_header()
-        self._add_calendar()
+        if self.profiles:
+            self._add_profile_bar()
+        self._add_calendar(state)
         self._add_summary_and_view()
+        if state is not None and state.get("draft"):
+            Clock.schedule_once(partial(self._restore_draft, state["draft"]))
         return self.root_layout
 
-    def _load_events(self):
-        if os.path.exists(EVENT_FILE):
-            with open(EVENT_FILE, "r") as f:
-                data = json.load(f)
-                for k, v in list(data.items()):
-                    if isinstance(v, dict):
-                        data[k] = [v]
-                return data
-        return {}
+    def _store_paths(self):
+        if self.profile is None:
+            return EVENT_FILE, TEMPLATE_FILE, MEMO_FILE, BACKUP_DIR
+        return (
+            profile_path(self.profile, EVENT_FILE),
+            profile_path(self.profile, TEMPLATE_FILE),
+            profile_path(self.profile, MEMO_FILE),
+            profile_path(self.profile, BACKUP_DIR),
+        )
+
+    def _open_profile(self):
+        # Everything but the events: the memo file, templates and pay rules.
+        events_path, templates_path, memos_path, backup_dir = self._store_paths()
+        self._resume = None
+        if getattr(self, "archive", None) is not None:
+            self.archive.close()
+        # Full text of long memos stays on disk until a view asks for it.
+        self.archive = MemoArchive(memos_path)
+        # Each save also backs up the months it changed, on the save thread.
+        self.backups = None
+        if self.settings.get("backup", {}).get("enabled", True):
+            self.backups = BackupStore(backup_dir)
+        self.templates = load_templates(templates_path)
+        settings = self.settings
+        if self.profile is not None:
+            settings = profile_settings(settings, self.profile)
+        self.pay_rules = PayRules.from_settings(settings)
+        # Parsed shift rows kept beside the events, one entry per month.
+        events_path = self._store_paths()[0]
+        self.shift_cache = ShiftCache(
+            os.path.join(os.path.dirname(events_path), CACHE_FILE), self.pay_rules
+        )
+
+    def _load_store(self):
+        self._open_profile()
+        events_path = self._store_paths()[0]
+        events = load_events(events_path)
+        if self.archive.prepare(events):
+            save_events(events, events_path)
+        self._install_events(events)
+        self.shift_cache.prime(self.store.snapshot(), file_stamp(events_path))
+
+    def _install_events(self, events):
+        self.store = EventStore(events, self.archive)
+        self.history = EditHistory(
+            self.store, self.templates, history_depth(self.settings)
+        )
+        snapshot = self.store.snapshot()
+        self.memos = MemoIndex.from_events(snapshot)
+        self._memos_at = snapshot
+        self._shift_index = None
+        self._shift_table = None
+
+    @property
+    def events(self):
+        # The latest published snapshot; never modified after publication.
+        # While a resumed session still runs on its partial store, anything
+        # reading the events waits for the full one.
+        if self._resume is not None:
+            self._finish_resume()
+        return self.store.snapshot()
+
+    def _resume_state(self):
+        # What the next start needs to look the same at once: the shown
+        # month, its entries (plus today's and the edited day's) and the
+        # open day editor's contents.
+        year, month = self.calendar.current_year, self.calendar.current_month
+        events = self.store.snapshot()
+        entries = dict(events.month(year, month))
+        draft = None
+        modal = self._modal_pool.get(AddEditModal)
+        if modal is not None and modal._window is not None:
+            draft = modal.draft()
+        for date_str in (datetime.today().strftime(DATE_FORMAT), draft and draft["date"]):
+            if date_str and date_str in events:
+                entries[date_str] = events[date_str]
+        return {
+            "profile": self.profile,
+            "year": year,
+            "month": month,
+            "events": entries,
+            "draft": draft,
+            "saved": time.time(),
+        }
+
+    def _write_resume(self, state):
+        # On the save thread, after every queued events write, so the stamps
+        # describe the files the state was taken from.
+        events_path, templates_path = self._store_paths()[:2]
+        state["stamps"] = [file_stamp(events_path), file_stamp(templates_path)]
+        try:
+            save_resume(state)
+        except OSError:
+            Logger.exception("Resume: writing %s failed", RESUME_FILE)
+
+    def _read_resume(self):
+        # The saved state if it still matches the files on disk. It is used
+        # once: a start that crashes does not keep coming back to it.
+        state = load_resume()
+        if state is None:
+            return None
+        try:
+            os.remove(RESUME_FILE)
+        except OSError:
+            pass
+        try:
+            if time.time() - state["saved"] > RESUME_MAX_AGE:
+                return None
+            profile = state["profile"]
+            if profile != self.profile and profile not in self.profiles:
+                return None
+            self.profile = profile
+            paths = self._store_paths()[:2]
+            if state["stamps"] != [file_stamp(path) for path in paths]:
+                return None
+            date(state["year"], state["month"], 1)
+            if not isinstance(state["events"], dict):
+                return None
+        except (KeyError, TypeError, ValueError):
+            return None
+        return state
+
+    def _resume_store(self, state):
+        # The UI starts on the saved month's entries alone while the whole
+        # store loads on a worker.
+        self._open_profile()
+        self._install_events(state["events"])
+        future = _load_executor.submit(load_events, self._store_paths()[0])
+        self._resume = (self.store.snapshot(), future)
+        future.add_done_callback(
+            lambda f: Clock.schedule_once(partial(self._on_resume_loaded, f))
+        )
+
+    def _on_resume_loaded(self, future, dt):
+        if self._resume is not None and self._resume[1] is future:
+            self._finish_resume()
+
+    def _finish_resume(self):
+        # Swaps in the full store, replaying any edits made on the partial
+        # one, and refreshes what was drawn from it.
+        partial_at, future = self._resume
+        self._resume = None
+        try:
+            events = future.result()
+        except (OSError, ValueError):
+            Logger.exception("Resume: loading events failed")
+            events = {}
+        partial_events = self.store.snapshot()
+        edits = {d: new for d, old, new in partial_events.changes(partial_at)}
+        prepared = self.archive.prepare(events)
+        self._install_events(events)
+        if not prepared:
+            self.shift_cache.prime(
+                self.store.snapshot(), file_stamp(self._store_paths()[0])
+            )
+        if edits:
+            self.store.update(edits)
+        snapshot = self.store.snapshot()
+        self._update_history_buttons()
+        self.summary_label.text = self.get_summary_text()
+        calendar = self.calendar
+        calendar.events = snapshot
+        year, month = calendar.current_year, calendar.current_month
+        if dict(snapshot.month(year, month)) != dict(partial_events.month(year, month)):
+            calendar.update_calendar(year, month)
+        modal = self._modal_pool.get(AddEditModal)
+        if modal is not None:
+            # An open day editor writes to the new store from now on.
+            modal.store = self.store
+            modal.memos = self.memos
+
+    def _restore_draft(self, draft, dt):
+        self.open_popup_for_date(draft["date"])
+        self._modal_pool[AddEditModal].restore_draft(draft)
+
+    def on_pause(self):
+        if self._resume is not None:
+            self._finish_resume()
+        _save_executor.submit(self._write_resume, self._resume_state())
+        return True
+
+    def on_resume(self):
+        # The process survived the pause; the saved state is not needed.
+        _save_executor.submit(_discard_resume)
 
     def _add_header(self):
-        header = Label(
-            text="Lenggy's App",
-            font_size=TITLE_FONT_SIZE,
-            size_hint_y=None,
-            height=dp(60),
-            color=PRIMARY_COLOR,
-            bold=True,
-            markup=True,
+        header = BoxLayout(orientation="horizontal", size_hint_y=None, height=dp(60))
+        self.undo_btn = self._history_button("Undo", self.undo)
+        self.redo_btn = self._history_button("Redo", self.redo)
+        header.add_widget(self.undo_btn)
+        header.add_widget(
+            Label(
+                text="Lenggy's App",
+                font_size=TITLE_FONT_SIZE,
+                color=PRIMARY_COLOR,
+                bold=True,
+                markup=True,
+            )
         )
+        header.add_widget(self.redo_btn)
         self.root_layout.add_widget(header)
+        self._update_history_buttons()
+
+    def _history_button(self, text, callback):
+        button = Button(
+            text=text,
+            size_hint=(None, None),
+            size=(dp(80), dp(40)),
+            pos_hint={"center_y": 0.5},
+            font_size=LABEL_FONT_SIZE,
+            bold=True,
+            background_color=SECONDARY_COLOR,
+            color=[1, 1, 1, 1],
+            background_normal="",
+            background_down="",
+        )
+        button.bind(on_press=lambda inst: callback())
+        return button
+
+    def _update_history_buttons(self):
+        self.undo_btn.disabled = not self.history.can_undo
+        self.redo_btn.disabled = not self.history.can_redo
 
-    def _add_calendar(self):
-        self.calendar = CalendarWidget(self.events, self.open_popup_for_date)
+    def undo(self):
+        # Saved like any edit; the history already knows about the change.
+        if self.history.undo(self.templates) is not None:
+            self.save_events()
+
+    def redo(self):
+        if self.history.redo(self.templates) is not None:
+            self.save_events()
+
+    def _add_profile_bar(self):
+        bar = BoxLayout(
+            orientation="horizontal", size_hint_y=None, height=dp(44), spacing=dp(10)
+        )
+        self.profile_switcher = switcher = LazySpinner(
+            values=self.profiles,
+            text=self.profile,
+            font_size=LABEL_FONT_SIZE,
+            background_color=SECONDARY_COLOR,
+            color=[1, 1, 1, 1],
+        )
+        switcher.bind(text=lambda inst, value: self.switch_profile(value))
+        team_btn = Button(
+            text="Team",
+            size_hint_x=None,
+            width=dp(100),
+            font_size=LABEL_FONT_SIZE,
+            bold=True,
+            background_color=PRIMARY_COLOR,
+            color=[1, 1, 1, 1],
+            background_normal="",
+            background_down="",
+        )
+        team_btn.bind(on_press=self.open_team_report)
+        bar.add_widget(switcher)
+        bar.add_widget(team_btn)
+        self.root_layout.add_widget(bar)
+
+    def _add_calendar(self, state=None):
+        self.calendar = CalendarWidget(
+            self.store.snapshot(),
+            self.open_popup_for_date,
+            on_month_press=self.open_year_view,
+            templates=self.templates,
+            year=state and state["year"],
+            month=state and state["month"],
+        )
         self.calendar.size_hint_y = 0.78
         self.root_layout.add_widget(self.calendar)
 
@@ -1136,11 +3031,10 @@ class EventsApp(App):
 
     def get_summary_text(self):
         today = datetime.today().strftime("%Y-%m-%d")
-        event_segments = self.events.get(today)
+        # Today is in a resumed session's partial store too.
+        event_segments = resolve_day(self.store.snapshot(), self.templates, today)
         if not event_segments:
             return "[b]Date:[/b] Today\n[i]No event logged.[/i]"
-        if isinstance(event_segments, dict):
-            event_segments = [event_segments]
         summary_lines = [f"[b]Date:[/b] Today"]
         for idx, segment in enumerate(event_segments):
             shift_label = f"Shift {idx+1}"
@@ -1153,59 +3047,243 @@ class EventsApp(App):
                 summary_lines.append(f"[b]Memo:[/b] {memo}")
         return "\n".join(summary_lines)
 
-    def open_popup_for_date(self, date_key):
-        modal = AddEditModal(date_key, self.events, self.save_events)
+    def _open_pooled(self, modal_cls, *args):
+        # Each modal type is built once and rebound to fresh data on later opens.
+        start = time.perf_counter()
+        modal = self._modal_pool.get(modal_cls)
+        if modal is None:
+            modal = self._modal_pool[modal_cls] = modal_cls(*args)
+        else:
+            # ModalView.open() binds center/size on every call and never
+            # unbinds them, so a reused modal would collect one pair per open.
+            modal.funbind("center", modal._align_center)
+            modal.funbind("size", modal._align_center)
+            modal.load(*args)
         modal.open()
+        Logger.debug(
+            "Modal: %s opened in %.1f ms",
+            modal_cls.__name__,
+            (time.perf_counter() - start) * 1000,
+        )
+        return modal
+
+    def open_popup_for_date(self, date_key):
+        self._open_pooled(
+            AddEditModal,
+            date_key,
+            self.store,
+            self.templates,
+            self.memos,
+            self.save_events,
+        )
+
+    def year_day_minutes(self, year):
+        start = date(year, 1, 1).toordinal()
+        end = date(year, 12, 31).toordinal()
+        return self.range_table(start, end).day_minutes(start, end)
+
+    def open_year_view(self, year):
+        self._open_pooled(
+            YearHeatmapPopup, year, self.year_day_minutes, self.open_popup_for_date
+        )
 
     def open_all_events(self, instance):
         year = self.calendar.current_year
         month = self.calendar.current_month
-        filtered = {}
-        for date_str, ev in self.events.items():
-            dt = datetime.strptime(date_str, "%Y-%m-%d")
-            if dt.year == year and dt.month == month:
-                filtered[date_str] = ev
-        modal = AllEventsPopup(filtered)
-        modal.open()
+        filtered = expand_range(
+            self.events,
+            self.templates,
+            date(year, month, 1).toordinal(),
+            date(year, month, monthrange(year, month)[1]).toordinal(),
+        )
+        full = {k: self.store.full(v) for k, v in filtered.items()}
+        self._open_pooled(AllEventsPopup, full, self.open_shift_query)
+
+    def open_shift_query(self):
+        self._open_pooled(ShiftQueryPopup, self.query_shifts, self.pay_rules)
+
+    def query_shifts(self, query):
+        # The index is built on first use and then kept current from the
+        # snapshot diffs, like the memo index.
+        events = self.events
+        if self._shift_index is None:
+            self._shift_index = ShiftIndex.from_events(events, self.archive.text)
+        else:
+            for change in events.changes(self._shift_index_at):
+                self._shift_index.replace_day(*change)
+        self._shift_index_at = events
+        name, estimate, _ = self._shift_index.plan(query)
+        Logger.debug("Query: %s index, %d candidate days", name, estimate)
+        matches = {}
+        for date_str, segment in self._shift_index.run(query, self.templates):
+            matches.setdefault(date_str, []).append(segment)
+        return {k: self.store.full(v) for k, v in matches.items()}
+
+    def switch_profile(self, name):
+        if name == self.profile:
+            return
+        self.profile = name
+        self.profile_switcher.text = name
+        self._load_store()
+        self.summary_label.text = self.get_summary_text()
+        self.calendar.events = self.events
+        self.calendar.templates = self.templates
+        self._update_history_buttons()
+        self.calendar.update_calendar(
+            self.calendar.current_year, self.calendar.current_month
+        )
+
+    def open_team_report(self, instance):
+        self._open_pooled(
+            TeamReportPopup,
+            self.calendar.current_year,
+            self.calendar.current_month,
+            self.team_summary,
+        )
+
+    def team_summary(self, start, end):
+        # Always serial: pool workers would re-import this module and each
+        # open a window (spawn), or fork a process holding the GL context.
+        from lenggy.team import team_summary
+
+        return team_summary(start, end, self.settings, workers=0)
 
     def save_events(self):
-        with open(EVENT_FILE, "w") as f:
-            json.dump(self.events, f, indent=2)
+        events_path, templates_path, memos_path, _ = self._store_paths()
+        # Only the months this save touched are compared.
+        for change in self.events.changes(self._memos_at):
+            self.memos.replace_day(*change)
+        self._memos_at = self.events
+        self.history.record(self.templates)
+        self._update_history_buttons()
+        # The snapshot stays valid while later edits publish new versions,
+        # so the slow JSON write happens off the UI thread. Templates are
+        # edited in place, so the job gets copies, written in the same job
+        # so a backup pairs them with these events.
+        _save_executor.submit(
+            self._write_events,
+            self.events,
+            [ShiftTemplate.from_dict(t.to_dict()) for t in self.templates],
+            (events_path, templates_path, memos_path),
+            self.backups,
+            self.shift_cache,
+        )
+        self._shift_table = None
         self.summary_label.text = self.get_summary_text()
         self.calendar.events = self.events
         self.calendar.update_calendar(
             self.calendar.current_year, self.calendar.current_month
         )
 
+    def _write_events(self, snapshot, templates, paths, backups, cache):
+        try:
+            save_templates(templates, paths[1])
+        except OSError:
+            Logger.exception("Save: writing %s failed", paths[1])
+        try:
+            save_events(snapshot, paths[0])
+        except OSError:
+            Logger.exception("Save: writing %s failed", paths[0])
+            return
+        self._write_shift_cache(cache, snapshot, file_stamp(paths[0]))
+        if backups is None:
+            return
+        try:
+            # Pruning reads every manifest, so it runs on the first backup
+            # of each day rather than after every save.
+            snapshot_id = backups.backup(snapshot, *paths[1:])
+            if snapshot_id and backups.pruned_on != date.today().toordinal():
+                backups.prune(*retention(self.settings))
+        except (OSError, ValueError):
+            Logger.exception("Save: backup to %s failed", backups.root)
+
+    def _write_shift_cache(self, cache, snapshot, stamp):
+        try:
+            cache.save(snapshot, stamp)
+        except OSError:
+            Logger.exception("Save: writing %s failed", cache.path)
+
+    def shift_table(self):
+        if self._shift_table is None:
+            events = self.events
+            cache = self.shift_cache
+            self._shift_table = cache.table(events)
+            Logger.debug("Cache: %d months parsed", cache.recomputed)
+            # Months parsed on a cold start are kept for the next one when
+            # the events are still as read from disk; saves write it anyway.
+            if cache.recomputed and cache.disk is not None and cache.disk[0] is events:
+                _save_executor.submit(self._write_shift_cache, cache, *cache.disk)
+        return self._shift_table
+
+    def range_table(self, start, end):
+        # Explicit shifts plus recurring occurrences expanded for this range
+        # only, starting on the Monday of the first week for weekly overtime.
+        return self.shift_table().with_templates(
+            self.templates, self.pay_rules, week_start(start), end
+        )
+
     def compute_total_work_hours(self, date_from, date_to):
-        start = datetime.strptime(date_from, "%Y-%m-%d").date()
-        end = datetime.strptime(date_to, "%Y-%m-%d").date()
-        total = timedelta()
-        for date_str, ev in self.events.items():
-            try:
-                d = datetime.strptime(date_str, "%Y-%m-%d").date()
-            except Exception:
-                continue
-            if start <= d <= end:
-                segments = ev if isinstance(ev, list) else [ev]
-                for segment in segments:
-                    tin = segment.get("time_in", "")
-                    tout = segment.get("time_out", "")
-                    if tin and tout:
-                        try:
-                            t_in = datetime.strptime(tin, "%H:%M")
-                            t_out = datetime.strptime(tout, "%H:%M")
-                            if t_out < t_in:
-                                t_out += timedelta(days=1)
-                            total += t_out - t_in
-                        except Exception:
-                            continue
-        total_hours = total.total_seconds() / 3600.0
-        return round(total_hours, 2)
+        start, end = parse_date_range(date_from, date_to)
+        return round(self.range_table(start, end).total_minutes(start, end) / 60.0, 2)
+
+    def iter_pay_breakdown(self, date_from, date_to):
+        # The range is parsed and the table built on the calling thread; the
+        # returned iterator only reads the immutable table.
+        start, end = parse_date_range(date_from, date_to)
+        return iter_pay_breakdown(
+            self.range_table(start, end), self.pay_rules, start, end
+        )
+
+    def occupancy(self, start, end):
+        # From the day before, so a shift running past midnight into the
+        # first day counts there.
+        return Occupancy(
+            self.shift_table().with_templates(
+                self.templates, self.pay_rules, start - 1, end
+            )
+        )
+
+    def open_occupancy(self, date_from, date_to):
+        start, end = parse_date_range(date_from, date_to)
+        self._open_pooled(OccupancyPopup, start, end, self.occupancy)
+
+    def month_sheets(self, date_from, date_to):
+        start, end = parse_date_range(date_from, date_to)
+        months = list(months_between(start, end))
+        out_dir = SHEET_DIR
+        if self.profile is not None:
+            out_dir = os.path.join(SHEET_DIR, self.profile)
+        # Sheets show whole months, so the table covers them all.
+        last_year, last_month = months[-1]
+        last = date(last_year, last_month, monthrange(last_year, last_month)[1])
+        table = self.range_table(date(*months[0], 1).toordinal(), last.toordinal())
+        paths = iter_month_sheets(
+            self.events,
+            self.templates,
+            table,
+            months,
+            out_dir,
+            self.profile or "",
+        )
+        return len(months), paths
 
     def open_compute_hours_popup(self):
-        popup = DateRangeHoursPopup(self.compute_total_work_hours)
-        popup.open()
+        self._open_pooled(
+            DateRangeHoursPopup,
+            self.iter_pay_breakdown,
+            self.open_occupancy,
+            self.month_sheets,
+        )
+
+    def on_stop(self):
+        popup = self._modal_pool.get(DateRangeHoursPopup)
+        if popup is not None:
+            popup.cancel_jobs()
+        _hours_executor.shutdown(wait=False, cancel_futures=True)
+        # A deliberate exit starts cold next time.
+        _save_executor.submit(_discard_resume)
+        # Pending saves are flushed before the process exits.
+        _save_executor.shutdown(wait=True)
 
 
 if __name__ == "__main__":
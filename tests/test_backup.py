@@ -0,0 +1,157 @@
+import json
+import os
+from datetime import date
+
+from lenggy import EventStore
+from lenggy.backup import BackupStore
+
+
+def _events():
+    return {
+        "2026-09-30": [{"time_in": "08:00", "time_out": "16:00", "memo": ""}],
+        "2026-10-01": [{"time_in": "09:00", "time_out": "17:00", "memo": "a"}],
+        "2026-10-02": [{"time_in": "22:00", "time_out": "06:00", "memo": "b"}],
+    }
+
+
+def _chunks(backups):
+    return {
+        name
+        for folder in os.listdir(backups.chunk_dir)
+        for name in os.listdir(os.path.join(backups.chunk_dir, folder))
+    }
+
+
+def test_backup_writes_only_changed_months(tmp_path):
+    store = EventStore(_events())
+    backups = BackupStore(str(tmp_path / "backups"))
+    first = backups.backup(store.snapshot())
+    assert first is not None
+    before = _chunks(backups)
+    assert len(before) == 2
+    # Nothing changed: no new snapshot.
+    assert backups.backup(store.snapshot()) is None
+    store.put("2026-10-03", [{"time_in": "10:00", "time_out": "12:00", "memo": ""}])
+    second = backups.backup(store.snapshot())
+    assert second is not None
+    after = _chunks(backups)
+    # September is shared; only October got a new chunk.
+    assert len(after - before) == 1
+    manifests = [backups.manifest(i)["events"] for i in (first, second)]
+    assert manifests[0]["2026-09"] == manifests[1]["2026-09"]
+
+
+def test_restore_round_trips_files(tmp_path):
+    events_path = str(tmp_path / "events.json")
+    templates_path = str(tmp_path / "templates.json")
+    memos_path = str(tmp_path / "memos.dat")
+    with open(templates_path, "w") as f:
+        f.write("[]")
+    with open(memos_path, "wb") as f:
+        f.write(b"long memo text")
+    backups = BackupStore(str(tmp_path / "backups"))
+    snapshot_id = backups.backup(_events(), templates_path, memos_path)
+    for path in (templates_path, memos_path):
+        os.remove(path)
+    restored = backups.restore(snapshot_id, events_path, templates_path, memos_path)
+    assert restored == _events()
+    with open(events_path) as f:
+        assert json.load(f) == _events()
+    with open(memos_path, "rb") as f:
+        assert f.read() == b"long memo text"
+    with open(templates_path) as f:
+        assert f.read() == "[]"
+
+
+def _fake_snapshot(backups, snapshot_id):
+    os.makedirs(backups.manifest_dir, exist_ok=True)
+    with open(backups._manifest_path(snapshot_id), "w") as f:
+        json.dump({"events": {}, "templates": None}, f)
+
+
+def test_snapshots_order_numeric_suffixes(tmp_path):
+    backups = BackupStore(str(tmp_path / "backups"))
+    ids = ["20261019-132501"] + [f"20261019-132501-{n}" for n in range(1, 12)]
+    for snapshot_id in ids:
+        _fake_snapshot(backups, snapshot_id)
+    assert backups.snapshots() == ids
+
+
+def test_prune_keeps_newest_and_one_per_day(tmp_path):
+    backups = BackupStore(str(tmp_path / "backups"))
+    os.makedirs(backups.chunk_dir)
+    ids = [
+        "20261017-090000",
+        "20261017-180000",
+        "20261018-120000",
+        "20261019-080000",
+        "20261019-080000-2",
+        "20261019-080000-10",
+    ]
+    for snapshot_id in ids:
+        _fake_snapshot(backups, snapshot_id)
+    removed = backups.prune(keep_last=1, keep_daily=2)
+    assert backups.snapshots() == ["20261018-120000", "20261019-080000-10"]
+    assert sorted(removed) == sorted(set(ids) - set(backups.snapshots()))
+
+
+def test_prune_collects_unreferenced_chunks(tmp_path):
+    store = EventStore(_events())
+    backups = BackupStore(str(tmp_path / "backups"))
+    backups.backup(store.snapshot())
+    store.discard("2026-10-01")
+    store.put("2026-10-05", [{"time_in": "10:00", "time_out": "12:00", "memo": ""}])
+    latest = backups.backup(store.snapshot())
+    backups.prune(keep_last=1, keep_daily=0)
+    assert backups.snapshots() == [latest]
+    assert _chunks(backups) == {
+        digest + ".gz" for digest in backups.manifest(latest)["events"].values()
+    }
+    assert backups.load(latest)[0] == dict(store.snapshot().items())
+
+
+def test_memo_blocks_start_at_the_previous_end(tmp_path, monkeypatch):
+    monkeypatch.setattr("lenggy.backup.MEMO_BLOCK", 100)
+    memos_path = str(tmp_path / "memos.dat")
+    with open(memos_path, "wb") as f:
+        f.write(b"a" * 150)
+    root = str(tmp_path / "backups")
+    backups = BackupStore(root)
+    first = backups.backup(_events(), None, memos_path)
+    assert backups.manifest(first)["memo_ends"] == [100, 150]
+    with open(memos_path, "ab") as f:
+        f.write(b"b" * 30)
+    before = _chunks(backups)
+    second = backups.backup(_events(), None, memos_path)
+    # Only the appended bytes are stored; the partial block is kept.
+    assert backups.manifest(second)["memo_ends"] == [100, 150, 180]
+    assert len(_chunks(backups) - before) == 1
+    # A new process checks the latest blocks and keeps them.
+    with open(memos_path, "ab") as f:
+        f.write(b"c" * 10)
+    third = BackupStore(root).backup(_events(), None, memos_path)
+    assert backups.manifest(third)["memo_ends"] == [100, 150, 180, 190]
+    assert backups.load(third)[2] == b"a" * 150 + b"b" * 30 + b"c" * 10
+
+
+def test_changed_memo_file_is_stored_again(tmp_path, monkeypatch):
+    monkeypatch.setattr("lenggy.backup.MEMO_BLOCK", 100)
+    memos_path = str(tmp_path / "memos.dat")
+    with open(memos_path, "wb") as f:
+        f.write(b"a" * 150)
+    root = str(tmp_path / "backups")
+    BackupStore(root).backup(_events(), None, memos_path)
+    with open(memos_path, "wb") as f:
+        f.write(b"a" * 120 + b"x" * 60)
+    latest = BackupStore(root).backup(_events(), None, memos_path)
+    backups = BackupStore(root)
+    assert backups.manifest(latest)["memo_ends"] == [100, 180]
+    assert backups.load(latest)[2] == b"a" * 120 + b"x" * 60
+
+
+def test_prune_records_the_day(tmp_path):
+    backups = BackupStore(str(tmp_path / "backups"))
+    assert backups.pruned_on is None
+    backups.backup(_events())
+    backups.prune()
+    assert backups.pruned_on == date.today().toordinal()
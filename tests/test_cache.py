@@ -0,0 +1,64 @@
+from lenggy import EventStore, PayRules, ShiftCache, ShiftTable
+
+RULES = PayRules(base_rate=12, shift_rates={"night": 15})
+STAMP = [1700000000000000000, 420]
+
+
+def _events():
+    events = {}
+    for month in (1, 2, 3):
+        for day in (3, 10, 17):
+            events[f"2025-{month:02d}-{day:02d}"] = [
+                {"time_in": "22:00", "time_out": "06:00", "memo": "night"},
+                {"time_in": "09:00", "time_out": "12:00", "memo": ""},
+            ]
+    return events
+
+
+def _columns(table):
+    return [list(table.days), list(table.starts), list(table.ends), list(table.rates)]
+
+
+def _saved(tmp_path, events):
+    path = str(tmp_path / "shift_cache.json")
+    cache = ShiftCache(path, RULES)
+    assert _columns(cache.table(events)) == _columns(ShiftTable(events, RULES))
+    assert cache.recomputed == 3
+    cache.save(events, STAMP)
+    return path
+
+
+def test_same_events_file_is_trusted(tmp_path):
+    events = _events()
+    cache = ShiftCache(_saved(tmp_path, events), RULES)
+    cache.prime(events, STAMP)
+    assert _columns(cache.table(events)) == _columns(ShiftTable(events, RULES))
+    assert cache.recomputed == 0
+
+
+def test_changed_month_is_recomputed(tmp_path):
+    events = _events()
+    path = _saved(tmp_path, events)
+    events["2025-02-10"] = [{"time_in": "07:00", "time_out": "15:00", "memo": ""}]
+    # Another stamp: every month is hashed and only February differs.
+    cache = ShiftCache(path, RULES)
+    cache.prime(events, [STAMP[0] + 1, STAMP[1]])
+    assert _columns(cache.table(events)) == _columns(ShiftTable(events, RULES))
+    assert cache.recomputed == 1
+    # Snapshots share untouched months, which are then not hashed again.
+    store = EventStore(events)
+    cache.table(store.snapshot())
+    store.discard("2025-03-17")
+    table = cache.table(store.snapshot())
+    assert cache.recomputed == 1
+    assert _columns(table) == _columns(ShiftTable(store.snapshot(), RULES))
+
+
+def test_other_rates_discard_the_file(tmp_path):
+    events = _events()
+    path = _saved(tmp_path, events)
+    rules = PayRules(base_rate=13, shift_rates={"night": 15})
+    cache = ShiftCache(path, rules)
+    cache.prime(events, STAMP)
+    assert _columns(cache.table(events)) == _columns(ShiftTable(events, rules))
+    assert cache.recomputed == 3
@@ -0,0 +1,65 @@
+from lenggy import EditHistory, EventStore, ShiftTemplate
+
+
+def _shift(time_in, time_out):
+    return [{"time_in": time_in, "time_out": time_out, "memo": ""}]
+
+
+def test_undo_and_redo_steps():
+    store = EventStore({"2025-03-03": _shift("09:00", "17:00")})
+    history = EditHistory(store)
+    assert not history.can_undo
+    store.put("2025-03-03", _shift("10:00", "18:00"))
+    store.put("2025-04-01", _shift("08:00", "12:00"))
+    assert history.record()
+    assert not history.record()
+    store.discard("2025-03-03")
+    assert history.undo() == ["2025-03-03"]
+    assert store.snapshot()["2025-03-03"] == _shift("10:00", "18:00")
+    assert sorted(history.undo()) == ["2025-03-03", "2025-04-01"]
+    assert dict(store.snapshot()) == {"2025-03-03": _shift("09:00", "17:00")}
+    assert history.undo() is None
+    history.redo()
+    assert "2025-04-01" in store.snapshot()
+    assert history.can_redo
+
+
+def test_new_edit_ends_redo_chain():
+    store = EventStore()
+    history = EditHistory(store)
+    store.put("2025-03-03", _shift("09:00", "17:00"))
+    history.undo()
+    assert history.can_redo
+    store.put("2025-03-04", _shift("09:00", "17:00"))
+    assert history.redo() is None
+    assert not history.can_redo
+    assert "2025-03-03" not in store.snapshot()
+    assert history.undo() == ["2025-03-04"]
+
+
+def test_depth_drops_oldest_steps():
+    store = EventStore()
+    history = EditHistory(store, depth=3)
+    for day in range(1, 6):
+        store.put(f"2025-03-{day:02d}", _shift("09:00", "17:00"))
+        history.record()
+    undone = []
+    while history.can_undo:
+        undone += history.undo()
+    assert undone == ["2025-03-05", "2025-03-04", "2025-03-03"]
+    assert sorted(store.snapshot()) == ["2025-03-01", "2025-03-02"]
+
+
+def test_template_steps_restore_in_place():
+    templates = [ShiftTemplate([0], "08:00", "16:00", start="2025-01-06", id="a")]
+    store = EventStore()
+    history = EditHistory(store, templates)
+    templates[0].set_end("2025-02-28")
+    templates.append(ShiftTemplate([1], "09:00", "17:00", start="2025-03-04", id="b"))
+    assert history.undo(templates) == []
+    assert [t.to_dict() for t in templates] == [
+        ShiftTemplate([0], "08:00", "16:00", start="2025-01-06", id="a").to_dict()
+    ]
+    history.redo(templates)
+    assert [t.id for t in templates] == ["a", "b"]
+    assert templates[0].end == "2025-02-28"
@@ -0,0 +1,62 @@
+from datetime import date
+
+import pytest
+
+from lenggy import DAY_MINUTES, Occupancy, PayRules, ShiftTable
+from lenggy.cli import main
+
+START = date(2025, 3, 3).toordinal()
+
+
+def _occupancy():
+    events = {
+        "2025-03-03": [
+            {"time_in": "09:00", "time_out": "12:00", "memo": ""},
+            {"time_in": "11:00", "time_out": "13:00", "memo": ""},
+        ],
+        "2025-03-04": [{"time_in": "22:00", "time_out": "02:00", "memo": ""}],
+    }
+    return Occupancy(ShiftTable(events, PayRules()))
+
+
+def test_minute_counts_covers_the_day():
+    counts = _occupancy().minute_counts(START, START + 2)
+    assert counts.typecode == "l"
+    assert len(counts) == DAY_MINUTES
+    # Overlapping shifts on one day count once; the overnight shift's
+    # hours after midnight belong to the next day.
+    assert counts[9 * 60] == counts[12 * 60 + 30] == 1
+    assert counts[13 * 60] == 0
+    assert counts[23 * 60] == counts[60] == 1
+    assert len(_occupancy().minute_counts(START + 10, START + 20)) == DAY_MINUTES
+
+
+def test_histogram_and_window():
+    occupancy = _occupancy()
+    hours = occupancy.histogram(START, START + 2)
+    assert len(hours) == 24
+    assert hours[9:13] == [60, 60, 60, 60]
+    assert hours[0:2] == hours[22:24] == [60, 60]
+    assert sum(hours) == (4 + 4) * 60
+    assert occupancy.window_minutes(START, START + 2, 21 * 60, 60) == 3 * 60
+    assert occupancy.days_at(60, START, START) == 0
+
+
+def test_wall_clock_on_transition_days():
+    rules = PayRules(timezone="Europe/London")
+    for date_str in ("2025-03-30", "2025-10-26"):
+        events = {date_str: [{"time_in": "00:00", "time_out": "03:00", "memo": ""}]}
+        day = date.fromisoformat(date_str).toordinal()
+        counts = Occupancy(ShiftTable(events, rules)).minute_counts(day, day)
+        assert sum(counts) == 180
+        assert counts[150] == 1
+        assert counts[180] == 0
+
+
+def test_cli_rejects_an_empty_range(tmp_path, capsys):
+    missing = str(tmp_path / "none.json")
+    argv = ["--events", missing, "--templates", missing, "--settings", missing]
+    with pytest.raises(SystemExit) as exit:
+        main(argv + ["occupancy", "2025-03-02", "2025-03-01", "--at", "09:00"])
+    assert exit.value.code == 2
+    assert "TO is before FROM" in capsys.readouterr().err
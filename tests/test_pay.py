@@ -0,0 +1,103 @@
+import json
+import os
+from datetime import date
+
+import pytest
+
+from lenggy import (
+    MemoArchive,
+    PayRules,
+    ShiftTable,
+    iter_pay_breakdown,
+    shift_minutes,
+)
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _breakdown(events, rules, first, last=None):
+    table = ShiftTable(events, rules)
+    start = date.fromisoformat(first).toordinal()
+    end = date.fromisoformat(last or first).toordinal()
+    *_, (done, total, result) = iter_pay_breakdown(table, rules, start, end)
+    assert done == total
+    return result
+
+
+def _shift(time_in, time_out, memo=""):
+    return [{"time_in": time_in, "time_out": time_out, "memo": memo}]
+
+
+def test_day_minutes_has_one_slot_per_day():
+    events = {
+        "2025-03-03": _shift("09:00", "17:00"),
+        "2025-03-05": _shift("22:00", "02:00"),
+    }
+    table = ShiftTable(events, PayRules())
+    start = date(2025, 3, 1).toordinal()
+    minutes = table.day_minutes(start, start + 6)
+    assert minutes.typecode == "l"
+    assert list(minutes) == [0, 0, 480, 0, 240, 0, 0]
+    assert len(table.day_minutes(start, start)) == 1
+
+
+def test_daily_and_weekly_overtime():
+    rules = PayRules(base_rate=10, overtime_multiplier=1.5)
+    result = _breakdown({"2025-03-03": _shift("08:00", "18:00")}, rules, "2025-03-03")
+    assert result.hours == 10
+    assert result.overtime_hours == 2
+    assert result.base_pay == 100
+    assert result.overtime_pay == 10
+    # Monday to Saturday, 8 hours each: the sixth day is weekly overtime.
+    events = {f"2025-03-{d:02d}": _shift("08:00", "16:00") for d in range(3, 9)}
+    result = _breakdown(events, rules, "2025-03-03", "2025-03-09")
+    assert result.hours == 48
+    assert result.overtime_hours == 8
+    # Days of the week before the range still count toward weekly overtime.
+    result = _breakdown(events, rules, "2025-03-08")
+    assert result.hours == 8
+    assert result.overtime_hours == 8
+
+
+def test_night_differential_on_wall_clock():
+    rules = PayRules(base_rate=20, night_differential=0.25, timezone="Europe/London")
+    # Clocks go back at 02:00 on 2025-10-26: nine hours worked, eight of
+    # them inside the 22:00-06:00 window.
+    result = _breakdown({"2025-10-25": _shift("22:00", "06:00")}, rules, "2025-10-25")
+    assert result.hours == 9
+    assert result.night_hours == 8
+    assert result.night_pay == 8 * 20 * 0.25
+
+
+def test_no_rates_by_default():
+    with open(os.path.join(REPO, "settings.json")) as f:
+        rules = PayRules.from_settings(json.load(f))
+    assert not rules.has_rates
+    result = _breakdown({"2025-03-03": _shift("20:00", "08:00")}, rules, "2025-03-03")
+    assert result.hours == 12
+    assert result.total_pay == 0
+
+
+def test_shift_minutes_follow_the_zone():
+    rules = PayRules(timezone="Europe/London")
+    segment = _shift("00:00", "03:00")[0]
+    assert shift_minutes("2025-03-30", segment, rules) == 120
+    assert shift_minutes("2025-10-26", segment, rules) == 240
+    assert shift_minutes("2025-10-26", segment, PayRules()) == 180
+    assert shift_minutes("2025-10-26", _shift("", "03:00")[0], rules) is None
+
+
+def test_rates_only_key_inline_memos(tmp_path):
+    long_memo = "covering the night desk for the north ward team"
+    with pytest.raises(ValueError):
+        PayRules(shift_rates={long_memo: 30})
+    rules = PayRules(base_rate=10, shift_rates={"Night": 15})
+    archive = MemoArchive(str(tmp_path / "memos.dat"))
+    events = {
+        "2025-03-03": [archive.stash(s) for s in _shift("09:00", "10:00", "night ")],
+        "2025-03-04": [archive.stash(s) for s in _shift("09:00", "10:00", long_memo)],
+        # A long memo still inline, as in files written before archiving.
+        "2025-03-05": _shift("09:00", "10:00", "night" + " " * 40),
+    }
+    assert "memo_ref" in events["2025-03-04"][0]
+    assert list(ShiftTable(events, rules).rates) == [15, 10, 10]
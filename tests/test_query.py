@@ -0,0 +1,77 @@
+import random
+from datetime import date
+
+from lenggy import ShiftIndex, ShiftQuery
+from lenggy.model import DATE_FORMAT, parse_minutes
+
+
+def _events(count=400, seed=7):
+    rng = random.Random(seed)
+    memos = ["night cover", "day", "Training north", "", "nightly audit"]
+    first = date(2025, 1, 1).toordinal()
+    events = {}
+    for day in rng.sample(range(first, first + 2 * count), count):
+        segments = []
+        for _ in range(rng.randint(1, 2)):
+            start = rng.randrange(0, 24 * 60, 30)
+            segments.append(
+                {
+                    "time_in": f"{start // 60:02d}:{start % 60:02d}",
+                    "time_out": "23:59",
+                    "memo": rng.choice(memos),
+                }
+            )
+        events[date.fromordinal(day).strftime(DATE_FORMAT)] = segments
+    return events
+
+
+def _scan(events, query):
+    results = []
+    for date_str in sorted(events):
+        day = date.fromisoformat(date_str).toordinal()
+        if query.matches_day(day):
+            for segment in events[date_str]:
+                if query.matches_segment(segment):
+                    results.append((date_str, segment))
+    return results
+
+
+def test_plan_picks_smallest_index():
+    index = ShiftIndex.from_events(_events())
+    name, estimate, candidates = index.plan(ShiftQuery.parse(memo="train"))
+    assert name == "memo 'train'"
+    assert estimate == len(set(candidates())) < len(index)
+    start = date(2025, 2, 1).toordinal()
+    name, estimate, _ = index.plan(ShiftQuery(start, start + 3, memo="night"))
+    assert name == "date"
+    assert estimate <= 4
+
+
+def test_window_wraps_past_midnight():
+    query = ShiftQuery.parse(after="22:00", before="02:00")
+    assert query.starts_in_window(parse_minutes("23:30"))
+    assert query.starts_in_window(parse_minutes("01:59"))
+    assert not query.starts_in_window(parse_minutes("02:00"))
+    assert not query.starts_in_window(parse_minutes("21:59"))
+    events = {
+        "2025-03-01": [{"time_in": "23:00", "time_out": "07:00", "memo": ""}],
+        "2025-03-02": [{"time_in": "12:00", "time_out": "20:00", "memo": ""}],
+        "2025-03-03": [{"time_in": "00:30", "time_out": "08:00", "memo": ""}],
+    }
+    results = ShiftIndex.from_events(events).run(query)
+    assert [date_str for date_str, _ in results] == ["2025-03-01", "2025-03-03"]
+
+
+def test_results_match_full_scan():
+    events = _events()
+    index = ShiftIndex.from_events(events)
+    queries = [
+        ShiftQuery.parse(),
+        ShiftQuery.parse("2025-02-01", "2025-06-30", "mon-fri"),
+        ShiftQuery.parse(weekdays="sat,sun", after="20:00", before="04:00"),
+        ShiftQuery.parse(after="06:00", before="09:00", memo="night"),
+        ShiftQuery.parse("2025-03-01", memo="NIGHT AUD"),
+        ShiftQuery.parse(memo="nomatch"),
+    ]
+    for query in queries:
+        assert index.run(query) == _scan(events, query)
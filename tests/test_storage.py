@@ -0,0 +1,29 @@
+import os
+
+from lenggy import MemoArchive
+
+
+def test_memo_archive_rereads_a_replaced_file(tmp_path):
+    path = str(tmp_path / "memos.dat")
+    archive = MemoArchive(path)
+    segment = archive.stash({"memo": "a" * 50})
+    assert archive.text(segment) == "a" * 50
+    # What a backup restore does: a new file in place of the old one.
+    with open(path + ".tmp", "wb") as f:
+        f.write(b"b" * 80)
+    os.replace(path + ".tmp", path)
+    assert archive.text(segment) == "b" * 50
+    # The old location of "a" * 50 is forgotten, so it is stored again.
+    assert archive.stash({"memo": "a" * 50})["memo_ref"] == [80, 50]
+
+
+def test_memo_archive_forgets_least_recent_first(tmp_path):
+    archive = MemoArchive(str(tmp_path / "memos.dat"))
+    archive.RECENT = 2
+    first = archive.stash({"memo": "1" * 50})
+    archive.stash({"memo": "2" * 50})
+    archive.text(first)
+    archive.stash({"memo": "3" * 50})
+    assert list(archive._recent) == ["1" * 50, "3" * 50]
+    # Still known: saved again, it points at the same copy.
+    assert archive.stash({"memo": "1" * 50})["memo_ref"] == first["memo_ref"]
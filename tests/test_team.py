@@ -0,0 +1,54 @@
+import concurrent.futures.process as process
+from datetime import date
+
+from lenggy import create_profile, save_events
+from lenggy.team import MIN_PARALLEL, team_summary
+
+SETTINGS = {"pay": {"base_rate": 10}}
+START = date(2025, 3, 1).toordinal()
+END = date(2025, 3, 31).toordinal()
+
+
+def _profiles(tmp_path):
+    root = str(tmp_path / "profiles")
+    for n in range(MIN_PARALLEL):
+        events = {
+            f"2025-03-{day:02d}": [{"time_in": "09:00", "time_out": "17:00", "memo": ""}]
+            for day in range(1, n + 2)
+        }
+        save_events(events, create_profile(f"p{n:02d}", root))
+    return root
+
+
+def _summary(rows, total):
+    return [(name, result.minutes) for name, result in rows], total.total_pay
+
+
+def test_pool_matches_serial(tmp_path):
+    root = _profiles(tmp_path)
+    serial = _summary(*team_summary(START, END, SETTINGS, root, workers=0))
+    assert serial[0][3] == ("p03", 4 * 480)
+    assert _summary(*team_summary(START, END, SETTINGS, root, workers=2)) == serial
+
+
+def test_broken_pool_runs_serially(tmp_path, monkeypatch):
+    started = []
+
+    class Broken:
+        def __init__(self, max_workers):
+            started.append(max_workers)
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def map(self, fn, jobs, chunksize=1):
+            raise process.BrokenProcessPool("a worker died")
+
+    root = _profiles(tmp_path)
+    serial = _summary(*team_summary(START, END, SETTINGS, root, workers=0))
+    monkeypatch.setattr(process, "ProcessPoolExecutor", Broken)
+    assert _summary(*team_summary(START, END, SETTINGS, root, workers=2)) == serial
+    assert started == [2]
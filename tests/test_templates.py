@@ -0,0 +1,69 @@
+from datetime import date
+
+import pytest
+
+from lenggy import ShiftTemplate, release_weekdays, templates_on
+
+
+def _weekdays_on(templates, day):
+    return sorted(d for t in templates_on(templates, day) for d in t.weekdays)
+
+
+def test_release_keeps_other_weekdays():
+    # Weekly from Tuesday 2026-10-20 inside a Mon-Fri template.
+    templates = [ShiftTemplate(range(5), "08:00", "16:00", start="2026-01-05")]
+    release_weekdays(templates, "2026-10-20", [1])
+    old, rest = templates
+    assert old.end == "2026-10-19"
+    assert rest.weekdays == {0, 2, 3, 4}
+    assert rest.start == "2026-10-20"
+    monday = date(2026, 10, 26).toordinal()
+    assert [_weekdays_on(templates, monday + i) for i in range(5)] == [
+        [0, 2, 3, 4],
+        [],
+        [0, 2, 3, 4],
+        [0, 2, 3, 4],
+        [0, 2, 3, 4],
+    ]
+    # Before the split nothing changes.
+    assert _weekdays_on(templates, date(2026, 10, 13).toordinal()) == [0, 1, 2, 3, 4]
+
+
+def test_release_carries_end_and_later_skips():
+    templates = [
+        ShiftTemplate(
+            range(5),
+            "08:00",
+            "16:00",
+            start="2026-01-05",
+            end="2026-12-31",
+            skip=["2026-02-02", "2026-11-02"],
+        )
+    ]
+    release_weekdays(templates, "2026-10-20", [1])
+    rest = templates[1]
+    assert rest.end == "2026-12-31"
+    assert rest.skip == {"2026-11-02"}
+
+
+def test_release_leaves_templates_without_shared_weekdays():
+    weekend = ShiftTemplate([5, 6], "10:00", "14:00", start="2026-01-03")
+    templates = [weekend]
+    release_weekdays(templates, "2026-10-20", [1])
+    assert templates == [weekend]
+    assert weekend.end == ""
+
+
+def test_release_removes_template_starting_that_day():
+    templates = [ShiftTemplate([1], "08:00", "16:00", start="2026-10-20")]
+    release_weekdays(templates, "2026-10-20", [1])
+    assert templates == []
+
+
+def test_invalid_dates_are_rejected():
+    with pytest.raises(ValueError):
+        ShiftTemplate([0], "08:00", "16:00", start="2026-13-01")
+    with pytest.raises(ValueError):
+        ShiftTemplate([0], "08:00", "16:00", start="2026-01-05", end="soon")
+    # An empty start still means no first day.
+    assert ShiftTemplate([0], "08:00", "16:00").first_day == 1
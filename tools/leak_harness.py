@@ -0,0 +1,243 @@
+"""Headless leak regression harness for repeated navigation.
+
+Drives the real EventsApp through thousands of month switches, modal
+open/close cycles and saves against a synthetic event store. It compares
+live widget counts, tracemalloc snapshots and gc object counts between a
+warmed-up baseline and the end of the run.
+
+    SDL_VIDEODRIVER=offscreen python tools/leak_harness.py --iterations 2000
+
+Exits with status 1 when growth passes a threshold, and prints the
+allocation sites and object types that grew the most. Tracing makes each
+iteration several times slower; --frames 1 trades call-site detail for
+speed.
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from datetime import date, timedelta
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_workdir(days):
+    # The app reads and writes events.json in the working directory, so it
+    # runs in a scratch copy with the real assets linked in.
+    workdir = tempfile.mkdtemp(prefix="lenggy-leak-")
+    os.symlink(os.path.join(REPO, "assets"), os.path.join(workdir, "assets"))
+    rng = random.Random(7)
+    events = {}
+    start = date.today() - timedelta(days=days)
+    for i in range(days):
+        if rng.random() < 0.7:
+            events[(start + timedelta(days=i)).isoformat()] = [
+                {
+                    "time_in": f"{rng.randint(5, 10):02d}:00",
+                    "time_out": f"{rng.randint(14, 20):02d}:30",
+                    "memo": rng.choice(["Work", "Work 2", "Ag market ak", ""]),
+                }
+            ]
+    import json
+
+    with open(os.path.join(workdir, "events.json"), "w") as f:
+        json.dump(events, f)
+    return workdir
+
+
+def live_widgets(widget_cls):
+    # type() rather than isinstance(): dead weak proxies raise on attribute
+    # access but still report their own proxy type.
+    return sum(1 for obj in gc.get_objects() if issubclass(type(obj), widget_cls))
+
+
+def site(traceback):
+    # Innermost frame, plus the closest frame in the app itself when the
+    # allocation happened inside Kivy or the standard library.
+    inner = traceback[-1]
+    text = f"{inner.filename}:{inner.lineno}"
+    for frame in reversed(traceback):
+        if frame.filename.startswith(REPO) and "/tools/" not in frame.filename:
+            if frame is not inner:
+                text += f" (from {os.path.relpath(frame.filename, REPO)}:{frame.lineno})"
+            break
+    return text
+
+
+def type_counts():
+    return Counter(type(obj).__name__ for obj in gc.get_objects())
+
+
+class Driver:
+    def __init__(self, main):
+        from kivy.base import EventLoop
+        from kivy.core.window import Window
+
+        self.main = main
+        self.loop = EventLoop
+        self.app = main.EventsApp()
+        self.app.root = self.app.build()
+        Window.add_widget(self.app.root)
+        EventLoop.ensure_window()
+        self.window = Window
+        self.rng = random.Random(11)
+        self.home = (self.app.calendar.current_year, self.app.calendar.current_month)
+        self.frames(3)
+
+    def frames(self, n=1):
+        for _ in range(n):
+            self.loop.idle()
+
+    def drain(self):
+        # Progressive views fill in over several frames.
+        while self.building():
+            self.frames()
+
+    def building(self):
+        builds = [self.app.calendar._build]
+        builds += [getattr(m, "_build", None) for m in self.app._modal_pool.values()]
+        return any(b is not None and not b.done for b in builds)
+
+    def close_modals(self):
+        for child in list(self.window.children):
+            if isinstance(child, self.main.ModalView):
+                child.dismiss(animation=False)
+        self.frames()
+
+    def settle(self):
+        # Puts every pooled view into the same state before a measurement so
+        # the two snapshots differ only by what the run left behind.
+        cal = self.app.calendar
+        cal.current_year, cal.current_month = self.home
+        cal.update_calendar(*self.home)
+        self.drain()
+        self.app.open_popup_for_date(date(*self.home, 1).isoformat())
+        self.frames()
+        self.close_modals()
+        self.app.open_all_events(None)
+        self.drain()
+        self.close_modals()
+        self.app.open_compute_hours_popup()
+        self.frames()
+        self.close_modals()
+        self.frames(3)
+
+    def step(self, i):
+        cal = self.app.calendar
+        if self.rng.random() < 0.5:
+            cal._goto_next_month(None)
+        else:
+            cal._goto_prev_month(None)
+        if i % 3 == 0:
+            # Leave again before the month has filled in, cancelling its build.
+            self.frames()
+            cal._goto_next_month(None)
+            self.frames()
+            cal._goto_prev_month(None)
+        self.drain()
+
+        day = date(cal.current_year, cal.current_month, self.rng.randint(1, 28))
+        self.app.open_popup_for_date(day.isoformat())
+        self.frames()
+        modal = self.app._modal_pool[self.main.AddEditModal]
+        if i % 10 == 0:
+            # Add and drop a row before saving so the row pool is exercised
+            # without the stored data growing between iterations.
+            modal.add_blank_segment(None)
+            self.frames()
+            modal.remove_segment(len(modal.segments) - 1)
+            modal.on_save(None)
+        self.close_modals()
+
+        if i % 5 == 0:
+            self.app.open_all_events(None)
+            self.drain()
+            self.close_modals()
+        if i % 7 == 0:
+            self.app.open_compute_hours_popup()
+            self.frames()
+            self.close_modals()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--days", type=int, default=3 * 365, help="synthetic history")
+    parser.add_argument("--max-widgets", type=int, default=50, help="allowed growth")
+    parser.add_argument("--max-kib", type=int, default=1024, help="allowed growth")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--frames", type=int, default=8, help="traceback depth")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("KIVY_NO_ARGS", "1")
+    os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+    from kivy.config import Config
+
+    Config.set("graphics", "maxfps", "0")
+
+    os.chdir(make_workdir(args.days))
+    sys.path.insert(0, REPO)
+    import main as app_main
+    from kivy.uix.widget import Widget
+
+    # Tracing starts before the warmup so that objects replaced during the
+    # run show up as freed instead of everything new counting as growth.
+    tracemalloc.start(args.frames)
+    driver = Driver(app_main)
+    for i in range(args.warmup):
+        driver.step(i)
+
+    driver.settle()
+    gc.collect()
+    base_snapshot = tracemalloc.take_snapshot()
+    base_widgets = live_widgets(Widget)
+    base_types = type_counts()
+
+    started = time.perf_counter()
+    for i in range(args.iterations):
+        driver.step(args.warmup + i)
+    elapsed = time.perf_counter() - started
+
+    driver.settle()
+    gc.collect()
+    end_snapshot = tracemalloc.take_snapshot()
+    end_widgets = live_widgets(Widget)
+    end_types = type_counts()
+    tracemalloc.stop()
+
+    stats = end_snapshot.compare_to(base_snapshot, "traceback")
+    growth_kib = sum(stat.size_diff for stat in stats) / 1024.0
+    widget_growth = end_widgets - base_widgets
+
+    print(f"{args.iterations} iterations in {elapsed:.1f} s")
+    print(f"live widgets: {base_widgets} -> {end_widgets} ({widget_growth:+d})")
+    print(f"traced memory growth: {growth_kib:+.1f} KiB")
+    print("object types with most growth:")
+    grown = ((end_types[name] - base_types.get(name, 0), name) for name in end_types)
+    for diff, name in sorted(grown, reverse=True)[: args.top]:
+        if diff > 0:
+            print(f"  {diff:+8d}  {name}")
+    # Full tracebacks differ by caller (a save versus a month switch), so
+    # the diffs are summed per reported site to let frees cancel out.
+    sites = Counter()
+    for stat in stats:
+        sites[site(stat.traceback)] += stat.size_diff
+    print("allocation sites with most growth:")
+    for name, diff in sites.most_common(args.top):
+        if diff > 0:
+            print(f"  {diff / 1024.0:+9.1f} KiB  {name}")
+
+    failed = widget_growth > args.max_widgets or growth_kib > args.max_kib
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
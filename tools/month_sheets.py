@@ -0,0 +1,96 @@
+"""Render printable month sheets for a range of months to PNG files.
+
+Uses the app's MonthSheet, so the pages match the "Month Sheets" button
+of the hours calculator: the calendar grid and every worked day with its
+shifts, hours and memo. One set of widgets and one framebuffer are
+reused for every month.
+
+    SDL_VIDEODRIVER=offscreen python tools/month_sheets.py 2025-01 2025-12 -o sheets
+
+Reads events.json and templates.json from the current directory unless
+--events/--templates/--settings or --profile say otherwise. Hours follow
+the time zone in settings.json, as in the app.
+"""
+
+import argparse
+import os
+import sys
+import time
+from calendar import monthrange
+from datetime import date
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("first", metavar="FROM", help="first month, YYYY-MM")
+    parser.add_argument("last", metavar="TO", help="last month, YYYY-MM")
+    parser.add_argument("-o", "--output", default="sheets", help="output directory")
+    parser.add_argument("--events", default="events.json")
+    parser.add_argument("--templates", default="templates.json")
+    parser.add_argument("--settings", default="settings.json")
+    parser.add_argument("--profile", help="render this employee's store")
+    parser.add_argument("--profiles", default="profiles")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("KIVY_NO_ARGS", "1")
+    os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+    sys.path.insert(0, REPO)
+    from lenggy import (
+        EVENT_FILE,
+        TEMPLATE_FILE,
+        PayRules,
+        ShiftTable,
+        load_events,
+        load_settings,
+        load_templates,
+        parse_date_range,
+        profile_path,
+        profile_settings,
+    )
+
+    try:
+        start, end = parse_date_range(f"{args.first}-01", f"{args.last}-01")
+    except ValueError:
+        parser.error("months must use YYYY-MM")
+    if end < start:
+        parser.error("TO is before FROM")
+    settings = load_settings(args.settings)
+    if args.profile:
+        args.events = profile_path(args.profile, EVENT_FILE, args.profiles)
+        args.templates = profile_path(args.profile, TEMPLATE_FILE, args.profiles)
+        settings = profile_settings(settings, args.profile, args.profiles)
+
+    import main as app_main
+    from kivy.base import EventLoop
+
+    # The framebuffer needs a GL context; the window itself is never shown.
+    EventLoop.ensure_window()
+    events = load_events(args.events)
+    templates = load_templates(args.templates)
+    rules = PayRules.from_settings(settings)
+    months = list(app_main.months_between(start, end))
+    last_year, last_month = months[-1]
+    last = date(last_year, last_month, monthrange(last_year, last_month)[1])
+    table = ShiftTable(events, rules).with_templates(
+        templates, rules, start, last.toordinal()
+    )
+    began = time.perf_counter()
+    count = 0
+    for path in app_main.iter_month_sheets(
+        events,
+        templates,
+        table,
+        months,
+        args.output,
+        args.profile or "",
+    ):
+        print(path)
+        count += 1
+    print(f"{count} sheets in {time.perf_counter() - began:.1f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""End-to-end UI latency benchmark driven by synthetic touches.
+
+Starts the real EventsApp offscreen on a large synthetic events.json and
+taps through the common interactions: a calendar day, saving the edit
+modal, the month arrows, the event list and the hours calculator. Each
+tap goes through the input queue exactly like a device touch. For every
+interaction the benchmark reports p50/p95/p99 of two latencies:
+
+* first frame: from the input to the next frame flipped to the screen;
+* complete: to the first frame after the view has fully filled in
+  (progressive builds drained, the hours result shown).
+
+    SDL_VIDEODRIVER=offscreen python tools/ui_benchmark.py --rounds 50
+
+Runs are repeatable for a given --seed and --days; --json writes the
+numbers for comparing two builds.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+from leak_harness import REPO, make_workdir
+
+# Seconds an interaction may take before the run is abandoned.
+TIMEOUT = 30
+_touch_ids = itertools.count(1)
+
+
+def percentile(samples, pct):
+    # Nearest-rank percentile.
+    ordered = sorted(samples)
+    return ordered[max(0, -(-len(ordered) * pct // 100) - 1)]
+
+
+class Bench:
+    def __init__(self, main):
+        from kivy.base import EventLoop
+        from kivy.core.window import Window
+        from kivy.input.motionevent import MotionEvent
+
+        class SyntheticTouch(MotionEvent):
+            def depack(self, args):
+                # A left click, as the SDL provider reports a tap.
+                self.sx, self.sy = args
+                self.button = "left"
+                self.profile = ["pos", "button"]
+                super().depack(args)
+
+        self.touch_cls = SyntheticTouch
+        self.main = main
+        self.loop = EventLoop
+        self.app = main.EventsApp()
+        self.app.root = self.app.build()
+        Window.add_widget(self.app.root)
+        EventLoop.ensure_window()
+        self.window = Window
+        self.flip_time = None
+        Window.bind(on_flip=self._on_flip)
+        self.samples = {}
+        self.frames(5)
+
+    def _on_flip(self, window):
+        self.flip_time = time.perf_counter()
+
+    def frames(self, n=1):
+        for _ in range(n):
+            self.loop.idle()
+
+    def tap(self, widget):
+        # Queued like provider input, so it is dispatched at the start of
+        # the next frame together with everything a real touch triggers.
+        x, y = widget.to_window(*widget.center)
+        args = (x / self.window.width, y / self.window.height)
+        touch = self.touch_cls(
+            "bench", next(_touch_ids), args, is_touch=True, type_id="touch"
+        )
+        self.loop.input_events.append(("begin", touch))
+        self.loop.input_events.append(("end", touch))
+        return time.perf_counter()
+
+    def measure(self, name, widget, done=None):
+        start = self.tap(widget)
+        first = last = None
+        while True:
+            if time.perf_counter() - start > TIMEOUT:
+                raise RuntimeError(f"{name}: no result after {TIMEOUT} s")
+            self.flip_time = None
+            self.loop.idle()
+            if self.flip_time is not None:
+                last = self.flip_time
+                first = first or last
+            # A build can finish in a frame that changes nothing on screen;
+            # the last frame shown was then already the complete view.
+            if first and self.settled() and (done is None or done()):
+                break
+        self.samples.setdefault(name, ([], []))
+        self.samples[name][0].append((first - start) * 1000)
+        self.samples[name][1].append((last - start) * 1000)
+
+    def settled(self):
+        builds = [self.app.calendar._build]
+        builds += [getattr(m, "_build", None) for m in self.app._modal_pool.values()]
+        return all(b is None or b.done for b in builds)
+
+    def is_open(self, modal_cls):
+        modal = self.app._modal_pool.get(modal_cls)
+        return modal is not None and modal._window is not None
+
+    def find(self, root, cls, text=None):
+        for widget in root.walk():
+            if isinstance(widget, cls) and (text is None or widget.text == text):
+                return widget
+        raise LookupError(f"no {cls.__name__} {text or ''} under {root!r}")
+
+    def close_modals(self):
+        for child in list(self.window.children):
+            if isinstance(child, self.main.ModalView):
+                child.dismiss(animation=False)
+        self.frames(2)
+
+    def visible_cells(self):
+        # Day cells whose centre is inside the calendar's scroll viewport,
+        # i.e. the ones a finger could hit without scrolling.
+        scroll = self.app.calendar.scroll
+        left, bottom = scroll.to_window(scroll.x, scroll.y)
+        cells = []
+        for cell in self.app.calendar.walk():
+            if isinstance(cell, self.main.CalendarDayCell):
+                x, y = cell.to_window(*cell.center)
+                inside_x = left <= x < left + scroll.width
+                if inside_x and bottom <= y < bottom + scroll.height:
+                    cells.append(cell)
+        return cells
+
+    def round(self, rng):
+        main = self.main
+        calendar = self.app.calendar
+
+        arrow = self.find(calendar, main.Button, rng.choice("<>"))
+        self.measure("month switch", arrow)
+
+        # The calendar's ScrollView holds a tap back until it knows the touch
+        # is not a scroll, so the modal can open a frame or two later.
+        self.measure(
+            "open day",
+            rng.choice(self.visible_cells()),
+            done=lambda: self.is_open(main.AddEditModal),
+        )
+        modal = self.app._modal_pool[main.AddEditModal]
+        self.frames(2)
+        self.measure("save day", self.find(modal, main.Button, "Save"))
+        self.close_modals()
+
+        view_btn, hours_btn = [
+            w for w in self.app.root.walk() if isinstance(w, main.RoundedIconButton)
+        ][:2]
+        self.measure("event list", view_btn)
+        self.close_modals()
+
+        self.measure("open hours", hours_btn)
+        popup = self.app._modal_pool[main.DateRangeHoursPopup]
+        # The whole synthetic history, not just today.
+        popup.from_input.year_spinner.text = main.YEAR_VALUES[0]
+        popup.from_input.month_spinner.text = "01"
+        popup.from_input.day_spinner.text = "01"
+        self.frames(2)
+        label = popup.result_label
+        self.measure(
+            "calculate hours",
+            self.find(popup, main.Button, "Calculate"),
+            done=lambda: label.text and not label.text.startswith("Calculating"),
+        )
+        self.close_modals()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=30, help="taps per interaction")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--days", type=int, default=10 * 365, help="synthetic history")
+    parser.add_argument("--seed", type=int, default=5)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("KIVY_NO_ARGS", "1")
+    os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+    from kivy.config import Config
+
+    Config.set("graphics", "maxfps", "0")
+
+    os.chdir(make_workdir(args.days))
+    sys.path.insert(0, REPO)
+    import main as app_main
+
+    bench = Bench(app_main)
+    rng = random.Random(args.seed)
+    try:
+        for _ in range(args.warmup):
+            bench.round(rng)
+        bench.samples.clear()
+        for _ in range(args.rounds):
+            bench.round(rng)
+    except RuntimeError as e:
+        # Kivy's logger keeps tracebacks off the console here.
+        print(f"FAIL: {e}", file=sys.stderr)
+        return 1
+
+    results = {}
+    header = ("interaction", "first frame p50/p95/p99", "complete p50/p95/p99")
+    print(f"{header[0]:<16} {header[1]:>26}  {header[2]:>24}")
+    for name, (first, complete) in bench.samples.items():
+        results[name] = {
+            kind: {f"p{p}": round(percentile(samples, p), 2) for p in (50, 95, 99)}
+            for kind, samples in (("first_frame", first), ("complete", complete))
+        }
+        row = [
+            "/".join(f"{percentile(samples, p):.1f}" for p in (50, 95, 99))
+            for samples in (first, complete)
+        ]
+        print(f"{name:<16} {row[0]:>26}  {row[1]:>24}")
+    print("(milliseconds)")
+    if args.json:
+        with open(args.json, "w") as f:
+            report = {"days": args.days, "rounds": args.rounds, "results": results}
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())